@@ -0,0 +1,103 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class Contribution(NamedTuple):
+    """A CONTRIBUTED relationship along with the publication that it points at"""
+    name: str
+    publication: int
+    label: str
+    year: str
+    start_page: Optional[int]
+    end_page: Optional[int]
+    first_author: bool
+
+
+# The per author statistics, each one backing the endpoint that is noted next to it
+AUTHOR_STATISTICS = [
+    "articleCount",  # query-3
+    "inproceedingsCount",  # query-3
+    "incollectionCount",
+    "firstAuthorCoAuthors",  # query-4
+    "activeYears",  # query-6, query-15
+    "publicationsPerYear",  # query-8
+    "averageCoAuthors",  # query-16
+    "maxGap",  # query-17
+]
+
+# The activity of every author: the sorted active years, the publications of every one of them and the differences
+# between consecutive ones, which answer the queries over a range of years. They are stored along with the statistics,
+# but not indexed.
+AUTHOR_YEARS = [
+    "years",  # query-6, query-8, query-15, query-17
+    "yearPublications",  # query-8
+    "yearsDifferences",  # query-17
+]
+
+
+def group_works(contributions: Iterable[Contribution]) -> Dict[Tuple[int, int, int], List[Contribution]]:
+    """Groups the contributions by work. Publication nodes are shared by the works with the same title and year, so a
+    work is a publication along with its pages, as in the page comparisons of the queries. Contributions without pages
+    never match any other contribution.
+    :param contributions: The contributions
+    :return: The contributions of every work
+    """
+    works = defaultdict(list)
+    for contribution in contributions:
+        if contribution.start_page is not None and contribution.end_page is not None:
+            works[(contribution.publication, contribution.start_page, contribution.end_page)].append(contribution)
+    return works
+
+
+def compute_author_statistics(contributions: List[Contribution]) -> Tuple[List[dict], List[dict]]:
+    """Computes the statistics of the leaderboard queries for every author. The statistics give the same answers as
+    the Cypher of the queries, apart from averageCoAuthors that counts the co-authors of every publication, instead of
+    the co-authors with a greater internal id.
+    :param contributions: All the contributions of the database
+    :return: The statistics of every author and the statistics of every author per year
+    """
+    label_counts = defaultdict(lambda: defaultdict(int))
+    year_publications = defaultdict(lambda: defaultdict(int))
+    for contribution in contributions:
+        label_counts[contribution.name][contribution.label] += 1
+        if contribution.year is not None:
+            year_publications[contribution.name][int(contribution.year)] += 1
+
+    first_author_co_authors = defaultdict(int)
+    co_authors = defaultdict(int)
+    co_authored_publications = defaultdict(set)
+    year_co_authors = defaultdict(int)
+    for work in group_works(contributions).values():
+        for contribution in work:
+            others = sum(1 for other in work if other.name != contribution.name)
+            if not others:
+                continue
+            if contribution.first_author:
+                first_author_co_authors[contribution.name] += others
+            co_authors[contribution.name] += others
+            co_authored_publications[contribution.name].add(contribution.publication)
+            year_co_authors[(contribution.name, contribution.year)] += others
+
+    author_rows = []
+    for name, counts in label_counts.items():
+        publications = sum(counts.values())
+        years = sorted(year_publications[name])
+        differences = [year2 - year1 for year1, year2 in zip(years, years[1:])]
+        author_rows.append({
+            "name": name,
+            "articleCount": counts.get("Article"),
+            "inproceedingsCount": counts.get("Inproceedings"),
+            "incollectionCount": counts.get("Incollection"),
+            "firstAuthorCoAuthors": first_author_co_authors.get(name),
+            "activeYears": len(years),
+            "publicationsPerYear": publications / len(years) if years else None,
+            "averageCoAuthors": co_authors[name] / len(co_authored_publications[name]) if name in co_authors else None,
+            "maxGap": max(differences) if differences else None,
+            "years": years,
+            "yearPublications": [year_publications[name][year] for year in years],
+            "yearsDifferences": differences,
+        })
+
+    author_year_rows = [{"name": name, "year": year, "coAuthors": count}
+                        for (name, year), count in year_co_authors.items()]
+    return author_rows, author_year_rows
@@ -0,0 +1,50 @@
+from collections import defaultdict
+from typing import Iterable, List
+
+from app.analytics.author_statistics import Contribution, group_works
+
+
+def compute_co_authorships(contributions: Iterable[Contribution]) -> List[tuple]:
+    """Computes the CO_AUTHORED relationships of every pair of authors that have co-authored a work. The counts of a pair
+    are the number of CONTRIBUTED relationship pairs of the works, exactly as the two hop patterns of the queries count
+    them. Every pair is stored once, from the author with the smaller name to the other one.
+    :param contributions: All the contributions of the database
+    :return: The relationships in the (start name, properties, end name) format of the bulk insert
+    """
+    year_counts = defaultdict(lambda: defaultdict(int))
+    types = defaultdict(set)
+    first_author_counts = defaultdict(lambda: [0, 0])
+    for work in group_works(contributions).values():
+        authors = defaultdict(lambda: [0, 0])
+        for contribution in work:
+            authors[contribution.name][0] += 1
+            if contribution.first_author:
+                authors[contribution.name][1] += 1
+        if len(authors) < 2:
+            continue
+
+        year = work[0].year
+        label = work[0].label
+        names = sorted(authors)
+        for it, name1 in enumerate(names):
+            count1, first1 = authors[name1]
+            for name2 in names[it + 1:]:
+                count2, first2 = authors[name2]
+                pair = (name1, name2)
+                year_counts[pair][year] += count1 * count2
+                types[pair].add(label)
+                first_author_counts[pair][0] += first1 * count2
+                first_author_counts[pair][1] += first2 * count1
+
+    relationships = []
+    for pair, counts in year_counts.items():
+        years = sorted(counts)
+        relationships.append((pair[0], {
+            "years": years,
+            "counts": [counts[year] for year in years],
+            "total": sum(counts.values()),
+            "types": sorted(types[pair]),
+            "startFirstAuthor": first_author_counts[pair][0],
+            "endFirstAuthor": first_author_counts[pair][1],
+        }, pair[1]))
+    return relationships
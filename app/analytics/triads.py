@@ -0,0 +1,222 @@
+from multiprocessing import Pool
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.analytics.author_statistics import Contribution, group_works
+
+# The per author statistics of the co-authorship graph, each one backing the endpoint that is noted next to it
+TRIAD_STATISTICS = [
+    "openTriads",  # query-7
+    "friendsOfFriends",  # query-9
+]
+
+# The wedges or two hop paths that are expanded at once, bounding the memory of every block of authors
+BLOCK_PATHS = 4_000_000
+
+
+class CoAuthorGraph:
+    """The co-authorship graph as an adjacency index: the co-authors of every author are the sorted indices[indptr[a]:
+    indptr[a + 1]], and keys holds every co-authorship once as the sorted smaller * n + larger, so that a pair is looked
+    up with a binary search.
+    """
+
+    def __init__(self, names: List[str], first: np.ndarray, second: np.ndarray):
+        self.names = names
+        n = len(names)
+        self.keys = np.unique(np.minimum(first, second) * n + np.maximum(first, second))
+        start, end = np.divmod(self.keys, n)
+        sources = np.concatenate([start, end])
+        targets = np.concatenate([end, start])
+        order = np.lexsort((targets, sources))
+        self.indices = targets[order]
+        self.indptr = np.searchsorted(sources[order], np.arange(n + 1))
+        self.degrees = np.diff(self.indptr)
+
+    @property
+    def authors_count(self) -> int:
+        return len(self.names)
+
+    def find(self, first: np.ndarray, second: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Looks up pairs of authors in the co-authorships
+        :param first: The first author of every pair
+        :param second: The second author of every pair
+        :return: The position of every pair in keys and whether the pair has co-authored a work
+        """
+        keys = np.minimum(first, second) * self.authors_count + np.maximum(first, second)
+        positions = np.minimum(np.searchsorted(self.keys, keys), max(len(self.keys) - 1, 0))
+        found = self.keys[positions] == keys if len(self.keys) else np.zeros(len(keys), dtype=bool)
+        return positions, found
+
+
+def build_co_author_graph(contributions: Iterable[Contribution]) -> CoAuthorGraph:
+    """Builds the co-authorship graph of the authors that have co-authored a work, as the CO_AUTHORED relationships
+    :param contributions: All the contributions of the database
+    :return: The graph
+    """
+    index = {}
+    first = []
+    second = []
+    for work in group_works(contributions).values():
+        authors = sorted({index.setdefault(contribution.name, len(index)) for contribution in work})
+        for it, author1 in enumerate(authors):
+            for author2 in authors[it + 1:]:
+                first.append(author1)
+                second.append(author2)
+    names = [None] * len(index)
+    for name, author in index.items():
+        names[author] = name
+    return CoAuthorGraph(names, np.array(first, dtype=np.int64), np.array(second, dtype=np.int64))
+
+
+def expand(indptr: np.ndarray, rows: np.ndarray, offsets: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Lists the positions of the entries of some rows of an adjacency index, starting from an offset in each row
+    :param indptr: The row pointers of the index
+    :param rows: The rows
+    :param offsets: The first position of every row, the start of the row if None
+    :return: The row of every entry and its position
+    """
+    starts = indptr[rows] if offsets is None else offsets
+    lengths = indptr[rows + 1] - starts
+    entry_rows = np.repeat(np.arange(len(rows)), lengths)
+    positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    return entry_rows, positions
+
+
+def blocks(costs: np.ndarray, first: int, last: int) -> Iterable[Tuple[int, int]]:
+    """Splits a range of authors into consecutive blocks of about BLOCK_PATHS paths
+    :param costs: The paths of every author
+    :param first: The first author of the range
+    :param last: The end of the range
+    :return: The (start, end) of every block
+    """
+    cumulative = np.cumsum(costs[first:last])
+    start = first
+    while start < last:
+        done = cumulative[start - first - 1] if start > first else 0
+        end = first + int(np.searchsorted(cumulative, done + BLOCK_PATHS, side="right"))
+        end = max(end, start + 1)
+        yield start, end
+        start = end
+
+
+def count_triangles(graph: CoAuthorGraph, first: int, last: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Counts the triangles of the co-authorship graph that start from a range of authors. Every co-authorship is
+    directed from the author with fewer co-authors to the other one, so every triangle is found once, from its lowest
+    author, by closing the pairs of its outgoing co-authorships, and the out-degrees stay small even for the hubs.
+    :param graph: The graph
+    :param first: The first author of the range
+    :param last: The end of the range
+    :return: The triangles of every author of the graph that start from the range and the positions in keys of the
+    co-authorships of these triangles
+    """
+    rank = np.lexsort((np.arange(graph.authors_count), graph.degrees))
+    order = np.empty_like(rank)
+    order[rank] = np.arange(graph.authors_count)
+
+    counts = np.zeros(graph.authors_count, dtype=np.int64)
+    edges = []
+    authors = np.arange(first, last)
+    entry_rows, positions = expand(graph.indptr, authors)
+    outgoing = order[graph.indices[positions]] > order[authors[entry_rows]]
+    # The outgoing co-authorships of the range, as a smaller adjacency index
+    out_indices = graph.indices[positions[outgoing]]
+    out_indptr = np.concatenate([[0], np.cumsum(np.bincount(entry_rows[outgoing], minlength=len(authors)))])
+    out_degrees = np.diff(out_indptr)
+
+    for start, end in blocks(out_degrees * (out_degrees - 1) // 2, 0, len(authors)):
+        rows = np.arange(start, end)
+        # Every pair (v, w) of outgoing co-authors of u with v before w is a wedge, closed when v and w are co-authors
+        v_rows, v_positions = expand(out_indptr, rows)
+        w_rows, w_positions = expand(out_indptr, rows[v_rows], v_positions + 1)
+        u = authors[rows[v_rows][w_rows]]
+        v = out_indices[v_positions[w_rows]]
+        w = out_indices[w_positions]
+        vw, closed = graph.find(v, w)
+        u, v, w = u[closed], v[closed], w[closed]
+        counts += np.bincount(np.concatenate([u, v, w]), minlength=graph.authors_count)
+        edges += [vw[closed], graph.find(u, v)[0], graph.find(u, w)[0]]
+    return counts, np.unique(np.concatenate(edges)) if edges else np.zeros(0, dtype=np.int64)
+
+
+def count_two_hops(graph: CoAuthorGraph, first: int, last: int) -> np.ndarray:
+    """Counts the distinct authors that a range of authors reaches through their co-authors, which include the authors
+    themselves and the co-authors that share a triangle with them
+    :param graph: The graph
+    :param first: The first author of the range
+    :param last: The end of the range
+    :return: The count of every author of the range
+    """
+    counts = np.zeros(last - first, dtype=np.int64)
+    two_hops = np.bincount(np.repeat(np.arange(graph.authors_count), graph.degrees),
+                           weights=graph.degrees[graph.indices], minlength=graph.authors_count).astype(np.int64)
+    for start, end in blocks(two_hops, first, last):
+        hop_rows, hop_positions = expand(graph.indptr, np.arange(start, end))
+        path_rows, path_positions = expand(graph.indptr, graph.indices[hop_positions])
+        paths = hop_rows[path_rows] * graph.authors_count + graph.indices[path_positions]
+        paths.sort()
+        distinct = np.ones(len(paths), dtype=bool)
+        distinct[1:] = paths[1:] != paths[:-1]
+        counts[start - first:end - first] = np.bincount(paths[distinct] // graph.authors_count,
+                                                        minlength=end - start)
+    return counts
+
+
+# The graph of the worker processes, sent once when they start
+worker_graph: Optional[CoAuthorGraph] = None
+
+
+def init_worker(graph: CoAuthorGraph) -> None:
+    global worker_graph
+    worker_graph = graph
+
+
+def count_range(bounds: Tuple[int, int]) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+    first, last = bounds
+    return (first, *count_triangles(worker_graph, first, last), count_two_hops(worker_graph, first, last))
+
+
+def compute_triads(graph: CoAuthorGraph, workers: int = 1) -> List[dict]:
+    """Computes the triad statistics of every author of the co-authorship graph, splitting the authors into ranges of
+    similar cost among the worker processes:
+    - openTriads: The count of query 7, the squared number of co-authors minus the pairs of co-authors that have
+      worked together, for the authors with at least one such pair
+    - friendsOfFriends: The count of query 9, the authors that have not worked with the author but with a co-author.
+      These are the authors two hops away, apart from the author and the co-authors that share a triangle with it.
+    :param graph: The co-authorship graph
+    :param workers: The number of worker processes
+    :return: The statistics of every author, None where the query does not return the author
+    """
+    n = graph.authors_count
+    # Both counts cost about the squared degrees of the co-authors of an author
+    costs = np.cumsum(np.bincount(np.repeat(np.arange(n), graph.degrees), weights=graph.degrees[graph.indices],
+                                  minlength=n)) if n else np.zeros(0)
+    tasks = 4 * workers if workers > 1 else 1
+    bounds = np.searchsorted(costs, np.linspace(0, costs[-1] if n else 0, tasks + 1)[1:-1], side="right")
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [n]])
+    ranges = [(int(first), int(last)) for first, last in zip(starts, ends) if first < last]
+
+    triangles = np.zeros(n, dtype=np.int64)
+    in_triangles = np.zeros(len(graph.keys), dtype=bool)
+    two_hops = np.zeros(n, dtype=np.int64)
+    if workers > 1:
+        with Pool(processes=workers, initializer=init_worker, initargs=(graph,)) as pool:
+            for first, range_triangles, range_edges, range_two_hops in pool.imap_unordered(count_range, ranges):
+                triangles += range_triangles
+                in_triangles[range_edges] = True
+                two_hops[first:first + len(range_two_hops)] = range_two_hops
+    else:
+        for first, last in ranges:
+            range_triangles, range_edges = count_triangles(graph, first, last)
+            triangles += range_triangles
+            in_triangles[range_edges] = True
+            two_hops[first:last] = count_two_hops(graph, first, last)
+
+    start, end = np.divmod(graph.keys[in_triangles], max(n, 1))
+    friends_of_friends = two_hops - np.bincount(np.concatenate([start, end]), minlength=n) - (graph.degrees > 0)
+    open_triads = graph.degrees.astype(np.int64) ** 2 - triangles
+    return [{"name": name,
+             "openTriads": int(open_triads[author]) if triangles[author] else None,
+             "friendsOfFriends": int(friends_of_friends[author]) if friends_of_friends[author] else None}
+            for author, name in enumerate(graph.names)]
@@ -1,7 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import queries
+from app.api.v1.endpoints import authors, batches, queries, status, streams
 
 api_router = APIRouter()
 api_router.include_router(queries.router, tags=['queries'])
+api_router.include_router(batches.router, tags=['batches'])
+api_router.include_router(authors.router, tags=['authors'])
+api_router.include_router(streams.router, tags=['streams'])
+api_router.include_router(status.router, tags=['status'])
 
@@ -0,0 +1,22 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, Query
+
+from app.backends.base import GraphBackend, get_backend
+from app.core.config import settings
+from app.db.author_index import search_authors
+from app.db.query_executor import LOOKUP, run_backend_query
+from app.models.models import AuthorMatch
+
+router = APIRouter()
+
+
+@router.get('/authors/search', response_model=List[AuthorMatch])
+async def search(q: str = Query(..., min_length=1, description="A part of the name of the authors"),
+                 limit: int = Query(10, ge=1, le=settings.AUTHOR_SEARCH_MAX_RESULTS),
+                 backend: GraphBackend = Depends(get_backend)) -> Any:
+    """Find the authors (name, authors) whose name starts with the query, has a word that starts with it or is close
+    to it, regardless of case and accents. The homonyms that DBLP tells apart with a number, e.g. "Honggang Zhang
+    0002", are grouped under their common name, and the authors of a group are the exact names of the other queries.
+    """
+    result = await run_backend_query(search_authors, {'backend': backend, 'query': q, 'limit': limit}, LOOKUP)
+    return result
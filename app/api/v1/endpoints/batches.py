@@ -0,0 +1,59 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.backends.base import GraphBackend, get_backend
+from app.core.config import settings
+from app.core.serialization import serialize
+from app.db.query_executor import LOOKUP, run_backend_query
+from app.models.models import AuthorsBatch, AuthorTitleYears, AuthorYear, AuthorYearNameCounts, AuthorYearsBatch, \
+    AuthorYearTotalPages
+
+router = APIRouter()
+
+
+def check_batch_size(lookups: list) -> None:
+    """Rejects the batches with more lookups than BATCH_MAX_SIZE
+    :param lookups: The lookups of the batch
+    :return: None
+    """
+    if len(lookups) > settings.BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"A batch may have up to {settings.BATCH_MAX_SIZE} lookups")
+
+
+def distinct_lookups(lookups: List[AuthorYear]) -> List[dict]:
+    """Returns the distinct lookups of a batch, in their order
+    :param lookups: The lookups of the batch
+    :return: The distinct lookups
+    """
+    return [{'author': author, 'year': year}
+            for author, year in dict.fromkeys((lookup.author, lookup.year) for lookup in lookups)]
+
+
+@router.post('/query-1/batch', response_model=List[AuthorTitleYears])
+async def batch_query_1(batch: AuthorsBatch, backend: GraphBackend = Depends(get_backend)) -> Any:
+    """Query 1 for many authors in one request: the titles (title, year) of the publications of every author, grouped
+    by author.
+    """
+    check_batch_size(batch.authors)
+    result = await run_backend_query(backend.batch_query_1, {'authors': list(dict.fromkeys(batch.authors))}, LOOKUP)
+    return serialize(result, AuthorTitleYears)
+
+
+@router.post('/query-2/batch', response_model=List[AuthorYearNameCounts])
+async def batch_query_2(batch: AuthorYearsBatch, backend: GraphBackend = Depends(get_backend)) -> Any:
+    """Query 2 for many authors and years in one request: the co-authors (name, number of co-authorships) of every
+    author in the year, grouped by author and year.
+    """
+    check_batch_size(batch.lookups)
+    result = await run_backend_query(backend.batch_query_2, {'lookups': distinct_lookups(batch.lookups)}, LOOKUP)
+    return serialize(result, AuthorYearNameCounts)
+
+
+@router.post('/query-11/batch', response_model=List[AuthorYearTotalPages])
+async def batch_query_11(batch: AuthorYearsBatch, backend: GraphBackend = Depends(get_backend)) -> Any:
+    """Query 11 for many authors and years in one request: the number of pages that every author has published in the
+    year, grouped by author and year.
+    """
+    check_batch_size(batch.lookups)
+    result = await run_backend_query(backend.batch_query_11, {'lookups': distinct_lookups(batch.lookups)}, LOOKUP)
+    return serialize(result, AuthorYearTotalPages)
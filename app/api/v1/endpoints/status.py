@@ -0,0 +1,40 @@
+from typing import Any, Dict, Optional
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import metrics
+from app.db.db_connection import connect, uses_database
+from app.db.result_cache import result_cache
+from app.models.models import CacheStats, PoolStats, RouteMetrics
+
+router = APIRouter()
+
+
+@router.get('/status/db-pool', response_model=Optional[PoolStats])
+def db_pool() -> Any:
+    """Usage statistics of the database connection pool of this process, null if the query backend does not use the
+    database.
+    """
+    return connect().stats() if uses_database() else None
+
+
+@router.get('/status/cache', response_model=Optional[CacheStats])
+def cache() -> Any:
+    """Usage statistics of the query result cache of this process, null if the cache is disabled.
+    """
+    return result_cache.stats() if result_cache is not None else None
+
+
+@router.get('/status/metrics', response_model=Dict[str, RouteMetrics])
+def route_metrics() -> Any:
+    """Request counts, latency histograms, in-flight requests and query timings of every route of this process. The
+    time of a query is split into waiting for a thread, running in the backend and serializing the response.
+    """
+    return metrics.stats()
+
+
+@router.get('/status/metrics/prometheus', response_class=PlainTextResponse)
+def prometheus_metrics() -> Any:
+    """The metrics of /status/metrics in the text format of Prometheus.
+    """
+    return metrics.prometheus()
@@ -0,0 +1,146 @@
+import base64
+import binascii
+import json
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Sequence
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.backends.base import GraphBackend, get_backend
+from app.backends.neo4j_backend import Neo4jBackend
+from app.core.config import settings
+from app.db.query_executor import ANALYTICS, LOOKUP, stream_backend_query
+
+router = APIRouter()
+
+PAGE_SIZE = Query(settings.STREAM_PAGE_SIZE, ge=1, le=settings.STREAM_MAX_PAGE_SIZE,
+                  description="The number of rows of the page")
+AFTER = Query(None, description="The next_page token of the previous page, the first page if unset")
+
+# The types of the elements of the keys that the rows of every stream are ordered by, see GraphBackend. A list
+# stands for a list of integers.
+QUERY_1_KEY = (str, int)
+QUERY_14_KEY = (int, int)
+QUERY_15_KEY = (int,)
+
+
+def encode_page_token(key: list) -> str:
+    """Encodes the key of the last row of a page as the token of the next page
+    :param key: The key of the row
+    :return: The token
+    """
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode()
+
+
+def key_element_matches(value: Any, kind: type) -> bool:
+    """Checks an element of a decoded key. The types have to match exactly, so that e.g. a boolean or a float is not
+    taken for an integer.
+    :param value: The element
+    :param kind: Its expected type, list for a list of integers
+    :return: Whether the element has the type
+    """
+    if kind is list:
+        return type(value) is list and all(type(item) is int for item in value)
+    return type(value) is kind
+
+
+def decode_page_token(token: Optional[str], key_types: Sequence[type]) -> Optional[list]:
+    """Decodes the token of a page into the key of the row that the page starts after. Tokens that do not decode to a
+    key of the expected shape are rejected, so that the backends only get keys like the ones they returned.
+    :param token: The token, None for the first page
+    :param key_types: The types of the elements of the key of the stream
+    :return: The key of the row, None for the first page
+    """
+    if token is None:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (binascii.Error, ValueError):
+        key = None
+    if type(key) is not list or len(key) != len(key_types) or \
+            not all(key_element_matches(value, kind) for value, kind in zip(key, key_types)):
+        raise HTTPException(status_code=400, detail="Invalid page token")
+    return key
+
+
+async def ndjson_page(chunks: AsyncIterator[List[dict]], page_size: int) -> AsyncIterator[bytes]:
+    """Writes the rows of a page as they arrive, one JSON object per line, followed by a line with the token of the
+    next page, which is null on the last page. The rows are one more than the page, which tells whether there is a
+    next page.
+    :param chunks: The chunks of rows of the page, each with its key
+    :param page_size: The number of rows of the page
+    :return: The lines of the response
+    """
+    written = 0
+    last_key = None
+    more = False
+    try:
+        async for chunk in chunks:
+            lines = []
+            for row in chunk:
+                if written == page_size:
+                    more = True
+                    break
+                last_key = row["key"]
+                lines.append(json.dumps({field: value for field, value in row.items() if field != "key"}))
+                written += 1
+            if lines:
+                yield ("\n".join(lines) + "\n").encode()
+            if more:
+                break
+    finally:
+        await chunks.aclose()
+    yield (json.dumps({"next_page": encode_page_token(last_key) if more else None}) + "\n").encode()
+
+
+def stream_page(method: Callable[..., Iterator[dict]], parameters: dict, page_size: int, after: Optional[str],
+                key_types: Sequence[type], query_class: str) -> StreamingResponse:
+    """Streams a page of the result of a streaming query method as NDJSON
+    :param method: The streaming query method of the backend
+    :param parameters: The parameters of the query
+    :param page_size: The number of rows of the page
+    :param after: The token of the page
+    :param key_types: The types of the elements of the key of the stream
+    :param query_class: The class of the query, LOOKUP or ANALYTICS
+    :return: The response
+    """
+    parameters = {**parameters, 'limit': page_size + 1, 'after': decode_page_token(after, key_types)}
+    chunks = stream_backend_query(method, parameters, query_class)
+    return StreamingResponse(ndjson_page(chunks, page_size), media_type="application/x-ndjson")
+
+
+@router.get('/query-1/stream')
+async def stream_query_1(author: str, page_size: int = PAGE_SIZE, after: Optional[str] = AFTER,
+                         backend: GraphBackend = Depends(get_backend)) -> Any:
+    """Query 1 as NDJSON: the titles (title, year) of the publications of an author, ordered by year descending.
+    """
+    return stream_page(backend.stream_query_1, {'author': author}, page_size, after, QUERY_1_KEY, LOOKUP)
+
+
+@router.get('/query-14/stream')
+async def stream_query_14(page_size: int = PAGE_SIZE, after: Optional[str] = AFTER,
+                          backend: GraphBackend = Depends(get_backend)) -> Any:
+    """Query 14 as NDJSON: the pairs of authors (name1, name2) of different parts of the same book that have never
+    co-authored a work.
+    """
+    return stream_page(backend.stream_query_14, {}, page_size, after, QUERY_14_KEY, ANALYTICS)
+
+
+@router.get('/query-15/stream')
+async def stream_query_15(k: int, page_size: int = PAGE_SIZE, after: Optional[str] = AFTER,
+                          backend: GraphBackend = Depends(get_backend)) -> Any:
+    """Query 15 as NDJSON: the authors (name, consecutiveYears) that have published work for K consecutive years.
+    """
+    query_class = LOOKUP if settings.PRECOMPUTED_STATISTICS else ANALYTICS
+    return stream_page(backend.stream_query_15, {'k': k}, page_size, after, QUERY_15_KEY, query_class)
+
+
+@router.get('/query-17/stream')
+async def stream_query_17(page_size: int = PAGE_SIZE, after: Optional[str] = AFTER,
+                          backend: GraphBackend = Depends(get_backend)) -> Any:
+    """Query 17 as NDJSON: the authors (name, yearsDifferences) of consecutively published papers with more than a
+    given amount of years between them, ordered by the differences.
+    """
+    query_class = LOOKUP if settings.PRECOMPUTED_STATISTICS else ANALYTICS
+    # Cypher orders the differences as a zero-padded string, the other backends as the list itself
+    key_types = (str, int) if isinstance(backend, Neo4jBackend) else (list, int)
+    return stream_page(backend.stream_query_17, {}, page_size, after, key_types, query_class)
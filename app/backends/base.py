@@ -0,0 +1,188 @@
+from typing import Iterator, List, Optional, Protocol
+
+from app.backends.neo4j_backend import Neo4jBackend
+from app.backends.numpy_backend import get_numpy_backend
+from app.backends.sqlite_backend import get_sqlite_backend
+from app.core.config import settings
+from app.db.db_connection import connect
+
+
+class GraphBackend(Protocol):
+    """Answers the queries of the endpoints, one method per query. The methods block, so the endpoints run them on the
+    executor of their query class, and return the rows of the result as dictionaries.
+    """
+
+    def query_1(self, author: str) -> List[dict]:
+        """Find the titles (title, year) of publications that a particular author has published.
+        """
+        ...
+
+    def query_2(self, author: str, year: str) -> List[dict]:
+        """Find the co-authors of an author (name, number of co-authorships) for a particular year.
+        """
+        ...
+
+    def query_3(self, limit: int, inproc: bool = True) -> List[dict]:
+        """Find the top-K authors (name, count) with regard to most conference/journal publications.
+        """
+        ...
+
+    def query_4(self, limit: int) -> List[dict]:
+        """Find the top-K authors (name, count) with regard to most co-authors in a single work.
+        """
+        ...
+
+    def query_5(self, year: str, limit: int) -> List[dict]:
+        """Find the top-K authors (name, count) with regard to most co-authors in a particular year.
+        """
+        ...
+
+    def query_6(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        """Find the top-K authors (name, count) with regard to most active years, within an optional range of years.
+        """
+        ...
+
+    def query_7(self, limit: int) -> List[dict]:
+        """Find the top-K authors (name, count) with regard to most distinct pairs of co-authors that have not published
+        together.
+        """
+        ...
+
+    def query_8(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        """Find the top-K authors (name, count) with regard to largest average number of journal publications per year
+        (consider only active years), within an optional range of years.
+        """
+        ...
+
+    def query_9(self, limit: int) -> List[dict]:
+        """Find the top-K authors (name, count) that a given author has not worked with, with regard
+        to most co-authorships with authors that the given author has worked with.
+        """
+        ...
+
+    def query_10(self, year: str, limit: int) -> List[dict]:
+        """Find the authors (name, count) that have published more than three works in a given single year.
+        """
+        ...
+
+    def query_11(self, author: str, year: str) -> List[dict]:
+        """Find the number of pages that a particular author has published in a given year.
+        """
+        ...
+
+    def query_12(self, title: str, year: str, limit: int, first_author: bool = True) -> List[dict]:
+        """Find the top-K authors (name, count) with regard to articles published in a particular journal
+        as a first/last author in a given year.
+        """
+        ...
+
+    def query_13(self, title: str, limit: int) -> List[dict]:
+        """Find the three authors that have appeared as co-authors for the most times in a particular journal.
+        """
+        ...
+
+    def query_14(self, limit: int) -> List[dict]:
+        """Find pairs of authors that have appeared in different parts of the same book and have never co-authored a
+        work.
+        """
+        ...
+
+    def query_15(self, k: int, limit: int, start_year: Optional[int] = None,
+                 end_year: Optional[int] = None) -> List[dict]:
+        """Find the authors that have published work for K consecutive years, within an optional range of years.
+        """
+        ...
+
+    def query_16(self, limit: int) -> List[dict]:
+        """Find the top-K authors with regard to average number of co-authors in their publications.
+        """
+        ...
+
+    def query_17(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        """Find the authors of consecutively published papers with more than a given amount of years between them,
+        within an optional range of years.
+        """
+        ...
+
+    def query_18(self) -> List[dict]:
+        """Find the author (name, count) with the most parts in a single book of collective works.
+        """
+        ...
+
+    # The streaming variants of the queries with large results yield their rows in a stable order, each with the
+    # "key" that it is ordered by. Passing the key of the last row as after continues right after it, without
+    # rescanning the rows before it. The keys are opaque and only valid for the backend that returned them.
+
+    def author_names(self) -> List[str]:
+        """The names of all the authors, which the author search index is built from.
+        """
+        ...
+
+    def dataset_generation(self) -> Optional[int]:
+        """The generation of the dataset, which changes with every import.
+        """
+        ...
+
+    def stream_query_1(self, author: str, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        """Query 1, ordered by year descending.
+        """
+        ...
+
+    def stream_query_14(self, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        """Query 14, ordered by the pair of authors.
+        """
+        ...
+
+    def stream_query_15(self, k: int, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        """Query 15, ordered by author.
+        """
+        ...
+
+    def stream_query_17(self, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        """Query 17, ordered by the differences of the years.
+        """
+        ...
+
+    # The batched variants of the lookups answer many of them at once, one group per distinct lookup in their order,
+    # e.g. [{"author": ..., "year": ..., "result": [...]}]
+
+    def batch_query_1(self, authors: List[str]) -> List[dict]:
+        """Query 1 for every author.
+        """
+        ...
+
+    def batch_query_2(self, lookups: List[dict]) -> List[dict]:
+        """Query 2 for every lookup of an author and a year.
+        """
+        ...
+
+    def batch_query_11(self, lookups: List[dict]) -> List[dict]:
+        """Query 11 for every lookup of an author and a year.
+        """
+        ...
+
+
+def get_backend() -> Iterator[GraphBackend]:
+    """Returns the backend of QUERY_BACKEND for a request. The Neo4j backends hold a connection of the pool until the
+    request finishes, while the SQLite store and the NumPy snapshot of NUMPY_SNAPSHOT_PATH need none.
+    :return: The backend
+    """
+    if settings.QUERY_BACKEND == "sqlite":
+        yield get_sqlite_backend()
+        return
+    if settings.QUERY_BACKEND == "numpy" and settings.NUMPY_SNAPSHOT_PATH:
+        yield get_numpy_backend()
+        return
+
+    db_pool = connect()
+    graph = db_pool.acquire()
+    try:
+        if settings.QUERY_BACKEND == "numpy":
+            yield get_numpy_backend(graph)
+        else:
+            yield Neo4jBackend(graph, co_authored_edges=settings.CO_AUTHORED_EDGES,
+                               precomputed_statistics=settings.PRECOMPUTED_STATISTICS,
+                               publication_identity=settings.PUBLICATION_IDENTITY,
+                               profile_rate=settings.QUERY_PROFILE_RATE)
+    finally:
+        db_pool.release()
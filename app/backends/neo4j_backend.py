@@ -0,0 +1,668 @@
+import logging
+import random
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from py2neo import Graph
+
+from app.core.metrics import record_profile
+from app.db.result_cache import GENERATION_QUERY, result_cache
+
+logger = logging.getLogger(__name__)
+
+
+def author_statistic_query(statistic: str, alias: str = "count") -> str:
+    """Returns the query that reads the top-K authors of a statistic that was precomputed by the import
+    """
+    return f"MATCH (a:Author) " \
+           f"WHERE a.{statistic} IS NOT NULL " \
+           f"RETURN a.name AS name, a.{statistic} AS {alias} " \
+           f"ORDER BY {alias} DESC " \
+           f"LIMIT $limit"
+
+
+def year_range_condition(start_year: Optional[int], end_year: Optional[int], keyword: str = "WHERE") -> str:
+    """Returns the condition that keeps the publications n between $start_year and $end_year, either of which may be
+    unbounded, or nothing when the whole range is unbounded, so that the publications without a year are kept too
+    :param start_year: The first year of the range
+    :param end_year: The last year of the range
+    :param keyword: The keyword that introduces the condition, WHERE or AND
+    :return: The condition
+    """
+    if start_year is None and end_year is None:
+        return ""
+    return f"{keyword} toInteger(n.year) >= coalesce($start_year, toInteger(n.year)) " \
+           f"AND toInteger(n.year) <= coalesce($end_year, toInteger(n.year)) "
+
+
+def year_positions(author: str) -> str:
+    """Returns the positions of the precomputed years of an author that are between $start_year and $end_year
+    :param author: The variable of the author
+    :return: The expression of the positions
+    """
+    return f"[it IN range(0, size({author}.years) - 1) " \
+           f"WHERE {author}.years[it] >= coalesce($start_year, {author}.years[it]) " \
+           f"AND {author}.years[it] <= coalesce($end_year, {author}.years[it])]"
+
+
+# The differences between the consecutive years of a sorted list of years
+YEARS_DIFFERENCES = "[it IN range(1, size(years) - 1) | years[it] - years[it - 1]]"
+
+
+def summarize_profile(plan: dict, operators: int = 5) -> str:
+    """Summarizes the profile of a query: its total db hits, the rows it returned and the operators with the most db
+    hits, e.g. "db-hits=120412; rows=10; Expand(All)=98000, Filter=20000, NodeByLabelScan=2400"
+    :param plan: The profiled plan, as returned by the server
+    :param operators: The number of operators to list
+    :return: The summary
+    """
+    hits = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        hits.append((node.get("dbHits", 0), node.get("operatorType", "?").split("@")[0]))
+        stack += node.get("children", [])
+    hits.sort(reverse=True)
+    top = ", ".join(f"{operator}={count}" for count, operator in hits[:operators])
+    return f"db-hits={sum(count for count, _ in hits)}; rows={plan.get('rows', 0)}; {top}"
+
+
+def group_rows(keys: Sequence[tuple], rows: List[dict], fields: Tuple[str, ...]) -> List[dict]:
+    """Groups the rows of a batched query by the lookup that they answer, e.g. [{"author": ..., "result": [...]}]
+    :param keys: The distinct lookups of the batch, as tuples of the values of the fields
+    :param rows: The rows of the query, each with the fields of its lookup
+    :param fields: The fields of the lookups
+    :return: The rows of every lookup, in the order of the lookups
+    """
+    groups = {key: [] for key in keys}
+    for row in rows:
+        groups[tuple(row[field] for field in fields)].append(
+            {name: value for name, value in row.items() if name not in fields})
+    return [{**dict(zip(fields, key)), "result": result} for key, result in groups.items()]
+
+
+class Neo4jBackend:
+    """Answers the queries of the endpoints with Cypher. The results are served from the result cache, when it is
+    enabled, until an import changes the dataset.
+
+    With publication_identity the co-authors of a work are the authors of the same publication node, which the import
+    keys by its DBLP record, instead of the authors of the same publication with the same pages.
+    """
+
+    def __init__(self, db: Graph, co_authored_edges: bool = False, precomputed_statistics: bool = False,
+                 publication_identity: bool = False, profile_rate: float = 0):
+        self.db = db
+        self.co_authored_edges = co_authored_edges
+        self.precomputed_statistics = precomputed_statistics
+        self.publication_identity = publication_identity
+        self.profile_rate = profile_rate
+
+    def profile(self, query: str, parameters: Optional[dict] = None) -> List[dict]:
+        """Runs a Cypher query under PROFILE and attaches the summary of its plan to the metrics of the request
+        :param query: The Cypher query
+        :param parameters: The parameters of the query
+        :return: The records of the result
+        """
+        cursor = self.db.run("PROFILE " + query, parameters=parameters)
+        result = cursor.data()
+        profile = summarize_profile(cursor.plan() or {})
+        record_profile(profile)
+        logger.info("Profiled %s with %s: %s", " ".join(query.split()), parameters, profile)
+        return result
+
+    def run(self, query: str, parameters: Optional[dict] = None) -> List[dict]:
+        """Runs a Cypher query, or returns its cached result
+        :param query: The Cypher query
+        :param parameters: The parameters of the query
+        :return: The records of the result
+        """
+        if self.profile_rate and random.random() < self.profile_rate:
+            return self.profile(query, parameters)
+
+        if result_cache is None:
+            return self.db.run(query, parameters=parameters).data()
+
+        if result_cache.needs_generation_check():
+            result_cache.update_generation(self.db.evaluate(GENERATION_QUERY))
+
+        key = result_cache.key(query, parameters)
+        result = result_cache.get(key)
+        if result is None:
+            result = self.db.run(query, parameters=parameters).data()
+            result_cache.set(key, result)
+        return result
+
+    def stream(self, query: str, parameters: Optional[dict] = None) -> Iterator[dict]:
+        """Runs a Cypher query and yields its records as the driver receives them, bypassing the result cache
+        :param query: The Cypher query
+        :param parameters: The parameters of the query
+        :return: The records of the result
+        """
+        for record in self.db.run(query, parameters=parameters):
+            yield dict(record)
+
+    def query_1(self, author: str) -> List[dict]:
+        query = "MATCH (a:Author{name: $name})-[:CONTRIBUTED]->(n) " \
+                "RETURN n.title AS title, n.year AS year " \
+                "ORDER BY year DESC"
+        return self.run(query, {'name': author})
+
+    def query_2(self, author: str, year: str) -> List[dict]:
+        if self.co_authored_edges:
+            query = "MATCH (a1:Author{name: $name})-[c:CO_AUTHORED]-(a2:Author) " \
+                    "WHERE $year IN c.years " \
+                    "RETURN a2.name AS name, " \
+                    "[it IN range(0, SIZE(c.years) - 1) WHERE c.years[it] = $year | c.counts[it]][0] AS count " \
+                    "ORDER BY count DESC"
+        elif self.publication_identity:
+            query = "MATCH (a1:Author{name: $name})-[:CONTRIBUTED]->(n{year: $year})<-[:CONTRIBUTED]-(a2:Author) " \
+                    "RETURN a2.name as name, count(*) AS count " \
+                    "ORDER BY count DESC"
+        else:
+            query = "MATCH (a1:Author{name: $name})-[r1:CONTRIBUTED]->(n{year: $year})<-[r2:CONTRIBUTED]-(a2:Author)" \
+                    "WHERE r1.start_page = r2.start_page " \
+                    "AND r1.end_page = r2.end_page " \
+                    "RETURN a2.name as name, count(*) AS count " \
+                    "ORDER BY count DESC"
+        return self.run(query, {'name': author, 'year': year})
+
+    def query_3(self, limit: int, inproc: bool = True) -> List[dict]:
+        if self.precomputed_statistics:
+            query = author_statistic_query("inproceedingsCount" if inproc else "articleCount")
+        elif inproc:
+            query = "MATCH (a:Author)-[r:CONTRIBUTED]->(n:Inproceedings) " \
+                    "RETURN a.name AS name, COUNT(n) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        else:
+            query = "MATCH (a:Author)-[r:CONTRIBUTED]->(n:Article) " \
+                    "RETURN a.name AS name, COUNT(n) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        return self.run(query, {'limit': limit})
+
+    def query_4(self, limit: int) -> List[dict]:
+        if self.precomputed_statistics:
+            query = author_statistic_query("firstAuthorCoAuthors")
+            return self.run(query, {'limit': limit})
+
+        if self.co_authored_edges:
+            query = "MATCH (a1:Author)-[c:CO_AUTHORED]-(:Author) " \
+                    "WITH a1, " \
+                    "CASE WHEN startNode(c) = a1 THEN c.startFirstAuthor ELSE c.endFirstAuthor END AS coAuthors " \
+                    "WHERE coAuthors > 0 " \
+                    "RETURN a1.name AS name, SUM(coAuthors) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        elif self.publication_identity:
+            query = "MATCH (a1:Author)-[r1:CONTRIBUTED]->()<-[:CONTRIBUTED]-(a2:Author) " \
+                    "WHERE a1 <> a2 " \
+                    "AND r1.first_author = True " \
+                    "RETURN a1.name AS name, count(a2) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        else:
+            query = "MATCH (a1:Author)-[r1:CONTRIBUTED]->()<-[r2:CONTRIBUTED]-(a2:Author) " \
+                    "WHERE a1 <> a2 " \
+                    "AND r1.start_page = r2.start_page " \
+                    "AND r1.end_page = r2.end_page " \
+                    "AND r1.first_author = True " \
+                    "RETURN a1.name AS name, count(a2) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        return self.run(query, {'limit': limit})
+
+    def query_5(self, year: str, limit: int) -> List[dict]:
+        if self.precomputed_statistics:
+            query = "MATCH (s:AuthorYearStats{year: $year}) " \
+                    "RETURN s.name AS name, s.coAuthors AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+            return self.run(query, {'year': year, 'limit': limit})
+
+        if self.co_authored_edges:
+            query = "MATCH (a1:Author)-[c:CO_AUTHORED]-(:Author) " \
+                    "WHERE $year IN c.years " \
+                    "WITH a1, " \
+                    "[it IN range(0, SIZE(c.years) - 1) WHERE c.years[it] = $year | c.counts[it]][0] AS coAuthors " \
+                    "RETURN a1.name AS name, SUM(coAuthors) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        elif self.publication_identity:
+            query = "MATCH (a1:Author)-[:CONTRIBUTED]->(n{year: $year})<-[:CONTRIBUTED]-(a2:Author) " \
+                    "WHERE a1 <> a2 " \
+                    "RETURN a1.name AS name, COUNT(a2) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        else:
+            query = "MATCH (a1:Author)-[r1:CONTRIBUTED]->(n{year: $year})<-[r2:CONTRIBUTED]-(a2:Author) " \
+                    "WHERE a1 <> a2 " \
+                    "AND r1.start_page = r2.start_page " \
+                    "AND r1.end_page = r2.end_page " \
+                    "RETURN a1.name AS name, COUNT(a2) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        return self.run(query, {'year': year, 'limit': limit})
+
+    def query_6(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        parameters = {'start_year': start_year, 'end_year': end_year, 'limit': limit}
+        if self.precomputed_statistics and start_year is None and end_year is None:
+            query = author_statistic_query("activeYears")
+        elif self.precomputed_statistics:
+            query = f"MATCH (a:Author) " \
+                    f"WHERE a.activeYears > 0 " \
+                    f"WITH a, {year_positions('a')} AS positions " \
+                    f"WHERE size(positions) > 0 " \
+                    f"RETURN a.name AS name, size(positions) AS count " \
+                    f"ORDER BY count DESC " \
+                    f"LIMIT $limit"
+        else:
+            query = "MATCH (a:Author)-[:CONTRIBUTED]->(n) " \
+                    f"{year_range_condition(start_year, end_year)}" \
+                    "RETURN a.name AS name, count(distinct(n.year)) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        return self.run(query, parameters)
+
+    def query_7(self, limit: int) -> List[dict]:
+        if self.precomputed_statistics:
+            # Computed over the co-authorships of works, as with the CO_AUTHORED relationships
+            query = author_statistic_query("openTriads")
+        elif self.co_authored_edges:
+            # Co-authors have published together when they have co-authored a work, while the Cypher below counts any
+            # publication node that they share, which only differs for the publications without pages
+            query = "MATCH (author:Author)-[:CO_AUTHORED]-(coAuthor:Author) " \
+                    "WITH author, COUNT(coAuthor) AS coAuthors " \
+                    "MATCH (author)-[:CO_AUTHORED]-(coAuthor1:Author)-[:CO_AUTHORED]-(coAuthor2:Author)" \
+                    "-[:CO_AUTHORED]-(author) " \
+                    "WHERE id(coAuthor1) < id(coAuthor2) " \
+                    "RETURN author.name AS name, coAuthors^2 - COUNT(*) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        elif self.publication_identity:
+            query = "MATCH (a1:Author)-[:CONTRIBUTED]->()<-[:CONTRIBUTED]-(a2:Author) " \
+                    "WHERE a1 <> a2 " \
+                    "WITH a1 AS author, COLLECT(DISTINCT(a2)) AS coAuthors1, COLLECT(DISTINCT(a2)) AS coAuthors2 " \
+                    "UNWIND coAuthors1 AS coAuthor1 " \
+                    "UNWIND coAuthors2 AS coAuthor2 " \
+                    "MATCH (coAuthor1)-[:CONTRIBUTED]->(n)<-[:CONTRIBUTED]-(coAuthor2) " \
+                    "WHERE id(coAuthor1) < id(coAuthor2) " \
+                    "WITH coAuthors1, author, coAuthor1, coAuthor2, COUNT(*) AS worked " \
+                    "RETURN author.name AS name, SIZE(coAuthors1)^2 - COUNT(*) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        else:
+            query = "MATCH (a1:Author)-[r1:CONTRIBUTED]->()<-[r2:CONTRIBUTED]-(a2:Author) " \
+                    "WHERE a1 <> a2 " \
+                    "AND r1.start_page = r2.start_page " \
+                    "AND r1.end_page = r2.end_page " \
+                    "WITH a1 AS author, COLLECT(DISTINCT(a2)) AS coAuthors1, COLLECT(DISTINCT(a2)) AS coAuthors2 " \
+                    "UNWIND coAuthors1 AS coAuthor1 " \
+                    "UNWIND coAuthors2 AS coAuthor2 " \
+                    "MATCH (coAuthor1)-[r3:CONTRIBUTED]->(n)<-[r4:CONTRIBUTED]-(coAuthor2) " \
+                    "WHERE id(coAuthor1) < id(coAuthor2) " \
+                    "AND r3.start_page = r3.start_page " \
+                    "AND r4.end_page = r4.end_page " \
+                    "WITH coAuthors1, author, coAuthor1, coAuthor2, COUNT(*) AS worked " \
+                    "RETURN author.name AS name, SIZE(coAuthors1)^2 - COUNT(*) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        return self.run(query, {'limit': limit})
+
+    def query_8(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        parameters = {'start_year': start_year, 'end_year': end_year, 'limit': limit}
+        if self.precomputed_statistics and start_year is None and end_year is None:
+            query = author_statistic_query("publicationsPerYear")
+        elif self.precomputed_statistics:
+            query = f"MATCH (a:Author) " \
+                    f"WHERE a.activeYears > 0 " \
+                    f"WITH a, {year_positions('a')} AS positions " \
+                    f"WHERE size(positions) > 0 " \
+                    f"RETURN a.name AS name, " \
+                    f"toFloat(REDUCE(total = 0, it IN positions | total + a.yearPublications[it])) / size(positions) " \
+                    f"AS count " \
+                    f"ORDER BY count DESC " \
+                    f"LIMIT $limit"
+        else:
+            query = "MATCH (a:Author)-[:CONTRIBUTED]->(n) " \
+                    f"{year_range_condition(start_year, end_year)}" \
+                    "WITH a, COUNT(DISTINCT(n.year)) AS activeYears, COUNT(n.title) AS publications " \
+                    "RETURN a.name AS name, toFloat(publications) / activeYears AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        return self.run(query, parameters)
+
+    def query_9(self, limit: int) -> List[dict]:
+        if self.precomputed_statistics:
+            query = author_statistic_query("friendsOfFriends")
+        elif self.co_authored_edges:
+            query = "MATCH (a1:Author)-[:CO_AUTHORED]-(a2:Author)-[:CO_AUTHORED]-(a3:Author) " \
+                    "WHERE a3 <> a1 " \
+                    "AND NOT (a1)-[:CO_AUTHORED]-(a3) " \
+                    "RETURN a1.name AS name, COUNT(DISTINCT a3) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        elif self.publication_identity:
+            query = "MATCH (a1:Author)-[:CONTRIBUTED]->(work1)<-[:CONTRIBUTED]-(a2:Author)-[:CONTRIBUTED]->" \
+                    "(work2)<-[:CONTRIBUTED]-(a3:Author) " \
+                    "WHERE work1 <> work2 " \
+                    "AND a1 <> a2 " \
+                    "AND a2 <> a3 " \
+                    "AND a3 <> a1 " \
+                    "WITH a1, a3 " \
+                    "OPTIONAL MATCH (a1)-[:CONTRIBUTED]->(work)<-[:CONTRIBUTED]-(a3) " \
+                    "WHERE a1 <> a3 " \
+                    "WITH a1, a3, work " \
+                    "WHERE work IS NULL " \
+                    "RETURN a1.name AS name, COUNT(DISTINCT a3) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        else:
+            query = "MATCH (a1:Author)-[r1:CONTRIBUTED]->(work1)<-[r2_1:CONTRIBUTED]-(a2:Author)-[r2_2:CONTRIBUTED]->" \
+                    "(work2)<-[r3:CONTRIBUTED]-(a3:Author) " \
+                    "WHERE work1 <> work2 " \
+                    "AND a1 <> a2 " \
+                    "AND a2 <> a3 " \
+                    "AND a3 <> a1 " \
+                    "AND r1.start_page = r2_1.start_page " \
+                    "AND r1.end_page = r2_1.end_page " \
+                    "AND r2_2.start_page = r3.start_page " \
+                    "AND r2_2.end_page = r3.end_page " \
+                    "WITH a1, a3 " \
+                    "OPTIONAL MATCH (a1)-[rr1:CONTRIBUTED]->(work)<-[rr2:CONTRIBUTED]-(a3) " \
+                    "WHERE a1 <> a3 " \
+                    "AND rr1.start_page = rr2.start_page " \
+                    "AND rr1.end_page = rr2.end_page " \
+                    "WITH a1, a3, work " \
+                    "WHERE work IS NULL " \
+                    "RETURN a1.name AS name, COUNT(DISTINCT a3) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        return self.run(query, {'limit': limit})
+
+    def query_10(self, year: str, limit: int) -> List[dict]:
+        query = "MATCH (a:Author)-[:CONTRIBUTED]->(n{year: $year}) " \
+                "WITH a, COUNT(n.title) AS count " \
+                "WHERE count > 3 " \
+                "RETURN a.name AS name, count " \
+                "ORDER BY count DESC " \
+                "LIMIT $limit"
+        return self.run(query, {'year': year, 'limit': limit})
+
+    def query_11(self, author: str, year: str) -> List[dict]:
+        query = "MATCH (a:Author{name: $name})-[r:CONTRIBUTED]->(n{year: $year}) " \
+                "RETURN SUM(r.total_pages) AS total_pages"
+        return self.run(query, {'name': author, 'year': year})
+
+    def query_12(self, title: str, year: str, limit: int, first_author: bool = True) -> List[dict]:
+        if first_author:
+            query = "MATCH (a:Author)-[r:CONTRIBUTED{first_author: True}]->(ar:Article{year: $year})-[:PUBLISHED]->" \
+                    "(j:Journal{title: $title}) " \
+                    "RETURN a.name AS name, COUNT(ar) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        else:
+            query = "MATCH (a:Author)-[r:CONTRIBUTED{last_author: True}]->(ar:Article{year: $year})-[:PUBLISHED]->" \
+                    "(j:Journal{title: $title}) " \
+                    "RETURN a.name AS name, COUNT(ar) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+        return self.run(query, {'title': title, 'year': year, 'limit': limit})
+
+    def query_13(self, title: str, limit: int) -> List[dict]:
+        if self.publication_identity:
+            query = "MATCH (a1:Author)-[:CONTRIBUTED]->(ar:Article)-[:PUBLISHED]->(j:Journal{title: $title}) " \
+                    "MATCH (a2:Author)-[:CONTRIBUTED]->(ar) " \
+                    "MATCH (a3:Author)-[:CONTRIBUTED]->(ar) " \
+                    "WHERE id(a1) < id(a2) < id(a3) " \
+                    "RETURN a1.name AS name1, a2.name AS name2, a3.name AS name3, count(ar) AS count " \
+                    "ORDER BY count DESC " \
+                    "LIMIT $limit"
+            return self.run(query, {'title': title, 'limit': limit})
+
+        query = "MATCH (a1:Author)-[r1:CONTRIBUTED]->(ar:Article)-[:PUBLISHED]->(j:Journal{title: $title}) " \
+                "MATCH (a2:Author)-[r2:CONTRIBUTED]->(ar:Article)-[:PUBLISHED]->(j:Journal{title: $title}) " \
+                "MATCH (a3:Author)-[r3:CONTRIBUTED]->(ar:Article)-[:PUBLISHED]->(j:Journal{title: $title}) " \
+                "WHERE id(a1) < id(a2) < id(a3) " \
+                "AND r1.start_page = r2.start_page " \
+                "AND r1.end_page = r2.end_page " \
+                "AND r3.start_page = r2.start_page " \
+                "AND r3.end_page = r2.end_page " \
+                "AND r1.start_page = r3.start_page " \
+                "AND r1.end_page = r3.end_page " \
+                "RETURN a1.name AS name1, a2.name AS name2, a3.name AS name3, count(ar) AS count " \
+                "ORDER BY count DESC " \
+                "LIMIT $limit"
+        return self.run(query, {'title': title, 'limit': limit})
+
+    def query_14(self, limit: int) -> List[dict]:
+        query = "MATCH (a1:Author)-[r1:CONTRIBUTED]->(c1:Incollection)-[:PUBLISHED]->(b:Book)<-" \
+                "[:PUBLISHED]-(c2:Incollection)<-[r2:CONTRIBUTED]-(a2:Author) " \
+                "WHERE id(a1) < id(a2) " \
+                f"{self._different_works()}"
+        if self.co_authored_edges:
+            query += "AND NOT (a1)-[:CO_AUTHORED]-(a2) "
+        else:
+            query += f"WITH a1, a2 " \
+                     f"{self._shared_work()}" \
+                     f"WITH a1, a2, work " \
+                     f"WHERE work IS NULL "
+        query += "RETURN DISTINCT a1.name AS name1, a2.name AS name2 " \
+                 "LIMIT $limit"
+        return self.run(query, {'limit': limit})
+
+    def _different_works(self) -> str:
+        """Returns the condition of query 14 that the contributions r1 and r2 to the incollections c1 and c2 are to
+        different works
+        :return: The condition
+        """
+        if self.publication_identity:
+            return "AND c1 <> c2 "
+        return "AND r1.start_page <> r2.start_page " \
+               "AND r1.end_page <> r2.end_page "
+
+    def _shared_work(self) -> str:
+        """Returns the optional match of query 14 of a work that the authors a1 and a2 have co-authored
+        :return: The optional match
+        """
+        if self.publication_identity:
+            return "OPTIONAL MATCH (a1)-[:CONTRIBUTED]->(work)<-[:CONTRIBUTED]-(a2) "
+        return "OPTIONAL MATCH (a1)-[r1:CONTRIBUTED]->(work)<-[r2:CONTRIBUTED]-(a2) " \
+               "WHERE r1.start_page = r2.start_page " \
+               "AND r1.end_page = r2.end_page "
+
+    def query_15(self, k: int, limit: int, start_year: Optional[int] = None,
+                 end_year: Optional[int] = None) -> List[dict]:
+        # The consecutive years are the differences between the distinct years of an author, one less than the years
+        parameters = {'k': k, 'start_year': start_year, 'end_year': end_year, 'limit': limit}
+        if self.precomputed_statistics and start_year is None and end_year is None:
+            query = "MATCH (a1:Author) " \
+                    "WHERE a1.activeYears = $k + 1 " \
+                    "RETURN a1.name AS name, $k AS consecutiveYears " \
+                    "LIMIT $limit"
+        elif self.precomputed_statistics:
+            query = f"MATCH (a1:Author) " \
+                    f"WHERE a1.activeYears >= $k + 1 " \
+                    f"WITH a1, size({year_positions('a1')}) - 1 AS consecutiveYears " \
+                    f"WHERE consecutiveYears = $k " \
+                    f"RETURN a1.name AS name, consecutiveYears " \
+                    f"LIMIT $limit"
+        else:
+            query = "MATCH (a1:Author)-[:CONTRIBUTED]->(n) " \
+                    "WHERE n.year IS NOT NULL " \
+                    f"{year_range_condition(start_year, end_year, 'AND')}" \
+                    "WITH a1, COUNT(DISTINCT n.year) - 1 AS consecutiveYears " \
+                    "WHERE consecutiveYears = $k " \
+                    "RETURN a1.name AS name, consecutiveYears " \
+                    "LIMIT $limit"
+        return self.run(query, parameters)
+
+    def query_16(self, limit: int) -> List[dict]:
+        if self.precomputed_statistics:
+            query = author_statistic_query("averageCoAuthors", alias="averageCoAuthors")
+            return self.run(query, {'limit': limit})
+
+        if self.publication_identity:
+            query = "MATCH (a1:Author)-[:CONTRIBUTED]->(n)<-[:CONTRIBUTED]-(a2:Author) " \
+                    "WHERE id(a1) < id(a2) " \
+                    "WITH a1, COLLECT(a2) AS coAuthors, COLLECT(DISTINCT n) AS publications " \
+                    "RETURN a1.name AS name, toFloat(SIZE(coAuthors)) / toFloat(SIZE(publications)) " \
+                    "AS averageCoAuthors " \
+                    "ORDER BY averageCoAuthors DESC " \
+                    "LIMIT $limit"
+            return self.run(query, {'limit': limit})
+
+        query = "MATCH (a1:Author)-[r1:CONTRIBUTED]->(n)<-[r2:CONTRIBUTED]-(a2:Author) " \
+                "WHERE id(a1) < id(a2) " \
+                "AND r1.start_page = r2.start_page " \
+                "AND r1.end_page = r2.end_page " \
+                "WITH a1, COLLECT(a2) AS coAuthors, COLLECT(DISTINCT n) AS publications " \
+                "RETURN a1.name AS name, toFloat(SIZE(coAuthors)) / toFloat(SIZE(publications)) AS averageCoAuthors " \
+                "ORDER BY averageCoAuthors DESC " \
+                "LIMIT $limit"
+        return self.run(query, {'limit': limit})
+
+    def query_17(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        query = self._years_differences(start_year, end_year) + \
+                "RETURN a1.name AS name, yearsDifferences " \
+                "ORDER BY yearsDifferences ASC " \
+                "LIMIT $limit"
+        return self.run(query, {'start_year': start_year, 'end_year': end_year, 'limit': limit})
+
+    def _years_differences(self, start_year: Optional[int] = None, end_year: Optional[int] = None) -> str:
+        """Returns the start of query 17: the authors a1 with the yearsDifferences between their consecutive years in a
+        range, for the authors with a gap of at least two years
+        :param start_year: The first year of the range, unbounded if None
+        :param end_year: The last year of the range, unbounded if None
+        :return: The start of the query
+        """
+        if self.precomputed_statistics and start_year is None and end_year is None:
+            return "MATCH (a1:Author) " \
+                   "WHERE a1.maxGap >= 2 " \
+                   "WITH a1, a1.yearsDifferences AS yearsDifferences "
+        if self.precomputed_statistics:
+            # The years of a range are consecutive in the years of the author, so a gap in the range is a gap overall
+            return f"MATCH (a1:Author) " \
+                   f"WHERE a1.maxGap >= 2 " \
+                   f"WITH a1, [it IN {year_positions('a1')} | a1.years[it]] AS years " \
+                   f"WITH a1, {YEARS_DIFFERENCES} AS yearsDifferences " \
+                   f"WHERE ANY(year IN yearsDifferences WHERE year >= 2) "
+        return "MATCH (a1:Author)-[:CONTRIBUTED]->(n) " \
+               "WHERE n.year IS NOT NULL " \
+               f"{year_range_condition(start_year, end_year, 'AND')}" \
+               "WITH DISTINCT a1, toInteger(n.year) AS year " \
+               "ORDER BY year " \
+               "WITH a1, COLLECT(year) AS years " \
+               f"WITH a1, {YEARS_DIFFERENCES} AS yearsDifferences " \
+               "WHERE ANY(year IN yearsDifferences WHERE year >= 2) "
+
+    def query_18(self) -> List[dict]:
+        query = "MATCH (a1:Author)-[r:CONTRIBUTED]->(:Incollection)-[:PUBLISHED]->(b:Book) " \
+                "RETURN a1.name AS name, b.title AS title, COUNT(r) AS parts " \
+                "ORDER BY parts DESC " \
+                "LIMIT 1"
+        return self.run(query)
+
+    def author_names(self) -> List[str]:
+        return [record[0] for record in self.db.run("MATCH (a:Author) RETURN a.name")]
+
+    def dataset_generation(self) -> Optional[int]:
+        return self.db.evaluate(GENERATION_QUERY)
+
+    def stream_query_1(self, author: str, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        query = "MATCH (a:Author{name: $name})-[r:CONTRIBUTED]->(n) " \
+                "WITH r, n, coalesce(n.year, '') AS sortYear " \
+                "WHERE $after IS NULL " \
+                "OR sortYear < $after[0] " \
+                "OR (sortYear = $after[0] AND id(r) > $after[1]) " \
+                "RETURN n.title AS title, toInteger(n.year) AS year, [sortYear, id(r)] AS key " \
+                "ORDER BY key[0] DESC, key[1] " \
+                "LIMIT $limit"
+        return self.stream(query, {'name': author, 'after': after, 'limit': limit})
+
+    def stream_query_14(self, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        query = "MATCH (a1:Author)-[r1:CONTRIBUTED]->(c1:Incollection)-[:PUBLISHED]->(b:Book)<-" \
+                "[:PUBLISHED]-(c2:Incollection)<-[r2:CONTRIBUTED]-(a2:Author) " \
+                "WHERE id(a1) < id(a2) " \
+                "AND ($after IS NULL OR id(a1) > $after[0] OR (id(a1) = $after[0] AND id(a2) > $after[1])) " \
+                f"{self._different_works()}"
+        if self.co_authored_edges:
+            query += "AND NOT (a1)-[:CO_AUTHORED]-(a2) "
+        else:
+            query += f"WITH DISTINCT a1, a2 " \
+                     f"{self._shared_work()}" \
+                     f"WITH a1, a2, work " \
+                     f"WHERE work IS NULL "
+        query += "RETURN DISTINCT a1.name AS name1, a2.name AS name2, [id(a1), id(a2)] AS key " \
+                 "ORDER BY key[0], key[1] " \
+                 "LIMIT $limit"
+        return self.stream(query, {'after': after, 'limit': limit})
+
+    def stream_query_15(self, k: int, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        if self.precomputed_statistics:
+            query = "MATCH (a1:Author) " \
+                    "WHERE a1.activeYears = $k + 1 " \
+                    "AND ($after IS NULL OR id(a1) > $after[0]) " \
+                    "WITH a1, $k AS consecutiveYears "
+        else:
+            query = "MATCH (a1:Author)-[:CONTRIBUTED]->(n) " \
+                    "WHERE n.year IS NOT NULL " \
+                    "AND ($after IS NULL OR id(a1) > $after[0]) " \
+                    "WITH a1, COUNT(DISTINCT n.year) - 1 AS consecutiveYears " \
+                    "WHERE consecutiveYears = $k "
+        query += "RETURN a1.name AS name, consecutiveYears, [id(a1)] AS key " \
+                 "ORDER BY key[0] " \
+                 "LIMIT $limit"
+        return self.stream(query, {'k': k, 'after': after, 'limit': limit})
+
+    def stream_query_17(self, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        # Lists cannot be compared with <, so the differences are also ordered as zero-padded strings, which sort
+        # like the lists
+        query = self._years_differences() + \
+                "WITH a1, yearsDifferences, " \
+                "REDUCE(output = '', year IN yearsDifferences | output + right('0000' + year, 4) + ',') AS sortKey " \
+                "WHERE $after IS NULL " \
+                "OR sortKey > $after[0] " \
+                "OR (sortKey = $after[0] AND id(a1) > $after[1]) " \
+                "RETURN a1.name AS name, yearsDifferences, [sortKey, id(a1)] AS key " \
+                "ORDER BY key[0], key[1] " \
+                "LIMIT $limit"
+        return self.stream(query, {'after': after, 'limit': limit})
+
+    def batch_query_1(self, authors: List[str]) -> List[dict]:
+        query = "UNWIND $names AS name " \
+                "MATCH (a:Author{name: name})-[:CONTRIBUTED]->(n) " \
+                "RETURN name AS author, n.title AS title, n.year AS year " \
+                "ORDER BY year DESC"
+        return group_rows([(author,) for author in authors], self.run(query, {'names': authors}), ("author",))
+
+    def batch_query_2(self, lookups: List[dict]) -> List[dict]:
+        if self.co_authored_edges:
+            query = "UNWIND $lookups AS lookup " \
+                    "MATCH (a1:Author{name: lookup.author})-[c:CO_AUTHORED]-(a2:Author) " \
+                    "WHERE lookup.year IN c.years " \
+                    "RETURN lookup.author AS author, lookup.year AS year, a2.name AS name, " \
+                    "[it IN range(0, SIZE(c.years) - 1) WHERE c.years[it] = lookup.year | c.counts[it]][0] AS count " \
+                    "ORDER BY count DESC"
+        elif self.publication_identity:
+            query = "UNWIND $lookups AS lookup " \
+                    "MATCH (a1:Author{name: lookup.author})-[:CONTRIBUTED]->(n{year: lookup.year})" \
+                    "<-[:CONTRIBUTED]-(a2:Author) " \
+                    "RETURN lookup.author AS author, lookup.year AS year, a2.name as name, count(*) AS count " \
+                    "ORDER BY count DESC"
+        else:
+            query = "UNWIND $lookups AS lookup " \
+                    "MATCH (a1:Author{name: lookup.author})-[r1:CONTRIBUTED]->(n{year: lookup.year})" \
+                    "<-[r2:CONTRIBUTED]-(a2:Author) " \
+                    "WHERE r1.start_page = r2.start_page " \
+                    "AND r1.end_page = r2.end_page " \
+                    "RETURN lookup.author AS author, lookup.year AS year, a2.name as name, count(*) AS count " \
+                    "ORDER BY count DESC"
+        keys = [(lookup["author"], lookup["year"]) for lookup in lookups]
+        return group_rows(keys, self.run(query, {'lookups': lookups}), ("author", "year"))
+
+    def batch_query_11(self, lookups: List[dict]) -> List[dict]:
+        query = "UNWIND $lookups AS lookup " \
+                "OPTIONAL MATCH (a:Author{name: lookup.author})-[r:CONTRIBUTED]->(n{year: lookup.year}) " \
+                "RETURN lookup.author AS author, lookup.year AS year, SUM(r.total_pages) AS total_pages"
+        keys = [(lookup["author"], lookup["year"]) for lookup in lookups]
+        return group_rows(keys, self.run(query, {'lookups': lookups}), ("author", "year"))
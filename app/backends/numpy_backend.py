@@ -0,0 +1,776 @@
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import combinations
+from threading import Lock
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from py2neo import Graph
+from scipy import sparse
+
+from app.core.config import settings
+from app.db.parsed_snapshot import FIRST_AUTHOR, LAST_AUTHOR, MISSING_PAGES, ParsedSnapshot, relationships_name
+from app.db.result_cache import GENERATION_QUERY
+
+PUBLICATION_LABELS = ["Article", "Inproceedings", "Incollection"]
+VENUE_LABELS = ["Journal", "Conference", "Book"]
+ARTICLE, INPROCEEDINGS, INCOLLECTION = range(3)
+JOURNAL, CONFERENCE, BOOK = range(3)
+
+# Rows of the author by author products that are multiplied at once, bounding the memory of queries 7 and 9
+BLOCK_SIZE = 4096
+
+
+def as_array(values: Sequence, dtype, missing=None) -> np.ndarray:
+    """Converts a column of values to an array, replacing the missing values
+    :param values: The values
+    :param dtype: The type of the array
+    :param missing: The value that replaces None
+    :return: The array
+    """
+    return np.array([missing if value is None else value for value in values], dtype=dtype)
+
+
+def incidence(rows: np.ndarray, columns: np.ndarray, shape: Tuple[int, int]) -> "sparse.csr_matrix":
+    """Returns the sparse matrix that counts the times every (row, column) pair appears
+    :param rows: The row of every pair
+    :param columns: The column of every pair
+    :param shape: The shape of the matrix
+    :return: The matrix
+    """
+    return sparse.coo_matrix((np.ones(len(rows), dtype=np.int64), (rows, columns)), shape=shape).tocsr()
+
+
+class Snapshot:
+    """Compact copy of the graph as integer arrays. Authors, publications and venues are numbered by their internal
+    id, so that the id comparisons of the queries become comparisons of the numbers. A work is a publication along with
+    the pages of the contributions, as in the page comparisons of the queries.
+    """
+
+    def __init__(self, author_names: np.ndarray, publication_label: np.ndarray, publication_title: np.ndarray,
+                 years: List[str], publication_year: np.ndarray, venue_label: np.ndarray, venue_title: np.ndarray,
+                 contribution_author: np.ndarray, contribution_publication: np.ndarray, start_page: np.ndarray,
+                 end_page: np.ndarray, total_pages: np.ndarray, first_author: np.ndarray, last_author: np.ndarray,
+                 published_publication: np.ndarray, published_venue: np.ndarray):
+        """
+        :param author_names: The name of every author, by its number
+        :param publication_label: The index in PUBLICATION_LABELS of the label of every publication, by its number
+        :param publication_title: The title of every publication, None if it has none
+        :param years: The sorted distinct years of the publications
+        :param publication_year: The index in years of the year of every publication, -1 if it has none
+        :param venue_label: The index in VENUE_LABELS of the label of every venue, by its number
+        :param venue_title: The title of every venue
+        :param contribution_author: The author of every CONTRIBUTED relationship
+        :param contribution_publication: The publication of every CONTRIBUTED relationship
+        :param start_page: The start page of every CONTRIBUTED relationship, -1 if it has none
+        :param end_page: The end page of every CONTRIBUTED relationship, -1 if it has none
+        :param total_pages: The total pages of every CONTRIBUTED relationship, 0 if it has none
+        :param first_author: Whether every CONTRIBUTED relationship is of the first author
+        :param last_author: Whether every CONTRIBUTED relationship is of the last author
+        :param published_publication: The publication of every PUBLISHED relationship
+        :param published_venue: The venue of every PUBLISHED relationship
+        """
+        self.author_names = author_names
+        self.author_index = {name: it for it, name in enumerate(self.author_names)}
+        self.authors_count = len(author_names)
+
+        self.publication_label = publication_label
+        self.publication_title = publication_title
+        self.publication_has_title = np.array([title is not None for title in publication_title], dtype=bool)
+        self.years = years
+        self.year_index = {year: it for it, year in enumerate(self.years)}
+        self.publication_year = publication_year
+        self.publications_count = len(publication_label)
+
+        self.venue_label = venue_label
+        self.venue_title = venue_title
+        self.venue_index = {(label, title): it for it, (label, title) in enumerate(zip(self.venue_label,
+                                                                                       self.venue_title))}
+
+        self.contribution_author = contribution_author
+        self.contribution_publication = contribution_publication
+        self.start_page = start_page
+        self.end_page = end_page
+        self.total_pages = total_pages
+        self.first_author = first_author
+        self.last_author = last_author
+        self.contribution_year = self.publication_year[self.contribution_publication]
+        self.contribution_label = self.publication_label[self.contribution_publication]
+
+        self.published_publication = published_publication
+        self.published_venue = published_venue
+
+        shape = (self.authors_count, self.publications_count)
+        # Number of CONTRIBUTED relationships of every author to every publication
+        self.author_publications = incidence(self.contribution_author, self.contribution_publication, shape)
+        self.author_publications_csc = self.author_publications.tocsc()
+        # Number of PUBLISHED relationships of every publication to every venue
+        self.publication_venues = incidence(self.published_publication, self.published_venue,
+                                            (self.publications_count, len(venue_label)))
+
+        self._create_works()
+        self._create_author_years()
+        self._results = {}
+
+    @classmethod
+    def from_rows(cls, authors: List[tuple], publications: List[tuple], venues: List[tuple],
+                  contributions: List[tuple], published: List[tuple]) -> "Snapshot":
+        """Creates the snapshot of the rows of the nodes and the relationships of the database, numbering the nodes in
+        the order of their internal ids
+        :param authors: The (id, name) of every author
+        :param publications: The (id, label, title, year) of every publication
+        :param venues: The (id, label, title) of every venue
+        :param contributions: The (author id, publication id, start_page, end_page, total_pages, first_author,
+        last_author) of every CONTRIBUTED relationship
+        :param published: The (publication id, venue id) of every PUBLISHED relationship
+        :return: The snapshot
+        """
+        authors = sorted(authors)
+        publications = sorted(publications)
+        venues = sorted(venues)
+        author_ids = np.array([row[0] for row in authors], dtype=np.int64)
+        publication_ids = np.array([row[0] for row in publications], dtype=np.int64)
+        venue_ids = np.array([row[0] for row in venues], dtype=np.int64)
+
+        years = [row[3] for row in publications]
+        distinct_years = sorted({year for year in years if year is not None})
+        year_index = {year: it for it, year in enumerate(distinct_years)}
+
+        contribution_columns = list(zip(*contributions)) or [()] * 7
+        published_columns = list(zip(*published)) or [()] * 2
+        return cls(author_names=np.array([row[1] for row in authors], dtype=object),
+                   publication_label=np.array([PUBLICATION_LABELS.index(row[1]) for row in publications],
+                                              dtype=np.int8),
+                   publication_title=np.array([row[2] for row in publications], dtype=object),
+                   years=distinct_years,
+                   publication_year=as_array([year_index.get(year) for year in years], np.int64, -1),
+                   venue_label=np.array([VENUE_LABELS.index(row[1]) for row in venues], dtype=np.int8),
+                   venue_title=np.array([row[2] for row in venues], dtype=object),
+                   contribution_author=np.searchsorted(author_ids, as_array(contribution_columns[0], np.int64)),
+                   contribution_publication=np.searchsorted(publication_ids,
+                                                            as_array(contribution_columns[1], np.int64)),
+                   start_page=as_array(contribution_columns[2], np.int64, -1),
+                   end_page=as_array(contribution_columns[3], np.int64, -1),
+                   total_pages=as_array(contribution_columns[4], np.int64, 0),
+                   first_author=as_array(contribution_columns[5], bool, False),
+                   last_author=as_array(contribution_columns[6], bool, False),
+                   published_publication=np.searchsorted(publication_ids, as_array(published_columns[0], np.int64)),
+                   published_venue=np.searchsorted(venue_ids, as_array(published_columns[1], np.int64)))
+
+    def _create_works(self) -> None:
+        with_pages = np.flatnonzero((self.start_page >= 0) & (self.end_page >= 0))
+        keys = np.stack([self.contribution_publication[with_pages], self.start_page[with_pages],
+                         self.end_page[with_pages]], axis=1)
+        if len(keys):
+            keys, work = np.unique(keys, axis=0, return_inverse=True)
+            work = work.reshape(-1)
+        else:
+            work = np.zeros(0, dtype=np.int64)
+        # The works are sorted by publication, since they are sorted by their keys
+        self.work_publication = keys[:, 0]
+        self.work_year = self.publication_year[self.work_publication]
+        self.works_count = len(keys)
+
+        shape = (self.authors_count, self.works_count)
+        authors = self.contribution_author[with_pages]
+        # Number of contributions of every author to every work and of the ones as first author
+        self.author_works = incidence(authors, work, shape)
+        self.author_works_csc = self.author_works.tocsc()
+        first = self.first_author[with_pages]
+        self.first_author_works = incidence(authors[first], work[first], shape)
+        self.work_size = np.bincount(work, minlength=self.works_count)
+        self._year_works = {}
+
+        # Number of CONTRIBUTED relationship pairs of every pair of authors in the same works
+        self.co_authorships = (self.author_works @ self.author_works.T).tocsr()
+        co_authorships = self.co_authorships.tocoo()
+        others = co_authorships.row != co_authorships.col
+        rows = co_authorships.row[others].astype(np.int64)
+        columns = co_authorships.col[others].astype(np.int64)
+        self.co_authors = incidence(rows, columns, (self.authors_count, self.authors_count))
+        self.co_author_keys = np.sort(rows * self.authors_count + columns)
+
+    def _create_author_years(self) -> None:
+        self.year_values = np.array([int(year) for year in self.years], dtype=np.int64)
+        with_year = self.contribution_year >= 0
+        keys = np.unique(self.contribution_author[with_year] * len(self.years) + self.contribution_year[with_year])
+        self.author_years_ptr = np.searchsorted(keys // max(len(self.years), 1), np.arange(self.authors_count + 1))
+        self.author_years = self.year_values[keys % max(len(self.years), 1)]
+
+    def are_co_authors(self, keys: np.ndarray) -> np.ndarray:
+        """Returns whether the pairs of authors have co-authored a work
+        :param keys: The pairs of authors, as author1 * authors_count + author2
+        :return: Whether every pair has co-authored a work
+        """
+        if not len(self.co_author_keys):
+            return np.zeros(len(keys), dtype=bool)
+        found = np.minimum(np.searchsorted(self.co_author_keys, keys), len(self.co_author_keys) - 1)
+        return self.co_author_keys[found] == keys
+
+    def year_works(self, year: str) -> Optional[Tuple["sparse.csr_matrix", np.ndarray]]:
+        """Returns the contributions of every author to the works of a year
+        :param year: The year
+        :return: The authors by works matrix and the size of every work, or None if there are no publications in the
+        year
+        """
+        if year not in self.year_index:
+            return None
+        if year not in self._year_works:
+            works = np.flatnonzero(self.work_year == self.year_index[year])
+            self._year_works[year] = (self.author_works_csc[:, works].tocsr(), self.work_size[works])
+        return self._year_works[year]
+
+    def author_years_between(self, start_year: Optional[int], end_year: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the active years of every author within a range, as the author_years_ptr and author_years of the
+        snapshot
+        :param start_year: The first year of the range, unbounded if None
+        :param end_year: The last year of the range, unbounded if None
+        :return: The row pointers and the sorted years of every author
+        """
+        if start_year is None and end_year is None:
+            return self.author_years_ptr, self.author_years
+        between = self.years_between(self.author_years, start_year, end_year)
+        entry_author = np.repeat(np.arange(self.authors_count), np.diff(self.author_years_ptr))
+        counts = np.bincount(entry_author[between], minlength=self.authors_count)
+        return np.concatenate([[0], np.cumsum(counts)]), self.author_years[between]
+
+    @staticmethod
+    def years_between(years: np.ndarray, start_year: Optional[int], end_year: Optional[int]) -> np.ndarray:
+        """Returns whether the years are within a range
+        :param years: The years
+        :param start_year: The first year of the range, unbounded if None
+        :param end_year: The last year of the range, unbounded if None
+        :return: Whether every year is within the range
+        """
+        between = np.ones(len(years), dtype=bool)
+        if start_year is not None:
+            between &= years >= start_year
+        if end_year is not None:
+            between &= years <= end_year
+        return between
+
+    def cached(self, name: str, compute):
+        """Returns a result that does not depend on any parameter, computing it once per snapshot
+        :param name: The name of the result
+        :param compute: The function that computes it
+        :return: The result
+        """
+        if name not in self._results:
+            self._results[name] = compute()
+        return self._results[name]
+
+
+def leaderboard(snapshot: Snapshot, counts: np.ndarray, limit: Optional[int], alias: str = "count",
+                where: Optional[np.ndarray] = None) -> List[dict]:
+    """Returns the authors with the highest counts, as the ORDER BY count DESC LIMIT of the queries
+    :param snapshot: The snapshot
+    :param counts: The count of every author
+    :param limit: The number of authors, all if None
+    :param alias: The name of the count in the rows
+    :param where: The authors that may be returned, the ones with positive counts if None
+    :return: The rows of the result
+    """
+    authors = np.flatnonzero(counts > 0 if where is None else where)
+    authors = authors[np.argsort(-counts[authors], kind="stable")][:limit]
+    return [{"name": snapshot.author_names[author], alias: counts[author].item()} for author in authors]
+
+
+class NumpyBackend:
+    """Answers the queries of the endpoints from an in-memory snapshot of the graph, with the same results as their
+    Cypher. The snapshot is loaded from the database, or from NUMPY_SNAPSHOT_PATH without one, and reloaded whenever an
+    import changes the dataset.
+    """
+
+    def __init__(self, snapshot: Snapshot, generation: Optional[int] = None):
+        self.snapshot = snapshot
+        self.generation = generation
+        self._checked = time.monotonic()
+        self._reload_lock = Lock()
+
+    @classmethod
+    def load(cls, db: Optional[Graph]) -> "NumpyBackend":
+        """Loads the snapshot of the graph
+        :param db: The graph database, None when the snapshot is read from NUMPY_SNAPSHOT_PATH
+        :return: The backend
+        """
+        generation = read_generation(db)
+        return cls(read_snapshot(db), generation)
+
+    def refresh(self, db: Optional[Graph]) -> None:
+        """Reloads the snapshot if the dataset generation has changed, checking at most every
+        CACHE_GENERATION_CHECK_INTERVAL seconds. The previous snapshot keeps answering while the new one loads, and
+        while there is no generation, e.g. during an import that has cleaned the database.
+        :param db: The graph database, None when the snapshot is read from NUMPY_SNAPSHOT_PATH
+        :return: None
+        """
+        if time.monotonic() - self._checked <= settings.CACHE_GENERATION_CHECK_INTERVAL:
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._checked = time.monotonic()
+            generation = read_generation(db)
+            if generation is not None and generation != self.generation:
+                self.snapshot = read_snapshot(db)
+                self.generation = generation
+        finally:
+            self._reload_lock.release()
+
+    def query_1(self, author: str) -> List[dict]:
+        s = self.snapshot
+        if author not in s.author_index:
+            return []
+        publications = s.contribution_publication[s.contribution_author == s.author_index[author]]
+        rows = [{"title": s.publication_title[it], "year": s.years[s.publication_year[it]]
+                 if s.publication_year[it] >= 0 else None} for it in publications]
+        return sorted(rows, key=lambda row: row["year"] or "", reverse=True)
+
+    def query_2(self, author: str, year: str) -> List[dict]:
+        s = self.snapshot
+        year_works = s.year_works(year)
+        if author not in s.author_index or year_works is None:
+            return []
+        author_works, _ = year_works
+        row = author_works[s.author_index[author]]
+        counts = np.asarray((author_works @ row.T).todense()).ravel()
+        # Two contributions of the author to the same work also match each other
+        counts[s.author_index[author]] -= row.sum()
+        return leaderboard(s, counts, None)
+
+    def query_3(self, limit: int, inproc: bool = True) -> List[dict]:
+        s = self.snapshot
+        label = INPROCEEDINGS if inproc else ARTICLE
+        counts = np.bincount(s.contribution_author[s.contribution_label == label], minlength=s.authors_count)
+        return leaderboard(s, counts, limit)
+
+    def query_4(self, limit: int) -> List[dict]:
+        s = self.snapshot
+        first = s.first_author_works
+        others = first.multiply(s.work_size[np.newaxis, :]) - first.multiply(s.author_works)
+        return leaderboard(s, np.asarray(others.sum(axis=1)).ravel(), limit)
+
+    def query_5(self, year: str, limit: int) -> List[dict]:
+        s = self.snapshot
+        year_works = s.year_works(year)
+        if year_works is None:
+            return []
+        author_works, work_size = year_works
+        others = author_works.multiply(work_size[np.newaxis, :]) - author_works.multiply(author_works)
+        return leaderboard(s, np.asarray(others.sum(axis=1)).ravel(), limit)
+
+    def query_6(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        s = self.snapshot
+        author_years_ptr, _ = s.author_years_between(start_year, end_year)
+        return leaderboard(s, np.diff(author_years_ptr), limit)
+
+    def query_7(self, limit: int) -> List[dict]:
+        s = self.snapshot
+        counts, pairs = s.cached("query_7", lambda: self._co_author_pairs_together())
+        return leaderboard(s, counts, limit, where=pairs > 0)
+
+    def _co_author_pairs_together(self) -> Tuple[np.ndarray, np.ndarray]:
+        # The pairs of authors, by ascending id, that share a publication with pages, as matched by the query
+        s = self.snapshot
+        with_start = s.start_page >= 0
+        with_end = s.end_page >= 0
+        shape = (s.authors_count, s.publications_count)
+        shared = (incidence(s.contribution_author[with_start], s.contribution_publication[with_start], shape) @
+                  incidence(s.contribution_author[with_end], s.contribution_publication[with_end], shape).T)
+        shared = sparse.triu(shared, k=1).tocsr()
+        shared.data[:] = 1
+
+        pairs = np.zeros(s.authors_count, dtype=np.int64)
+        for start in range(0, s.authors_count, BLOCK_SIZE):
+            co_authors = s.co_authors[start:start + BLOCK_SIZE]
+            pairs[start:start + BLOCK_SIZE] = np.asarray((co_authors @ shared).multiply(co_authors).sum(axis=1)).ravel()
+        co_authors_count = s.co_authors.getnnz(axis=1).astype(np.int64)
+        return co_authors_count ** 2 - pairs, pairs
+
+    def query_8(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        s = self.snapshot
+        selected = s.publication_has_title[s.contribution_publication]
+        if start_year is not None or end_year is not None:
+            with_year = s.contribution_year >= 0
+            selected &= with_year & s.years_between(s.year_values[np.where(with_year, s.contribution_year, 0)],
+                                                    start_year, end_year)
+        publications = np.bincount(s.contribution_author[selected], minlength=s.authors_count)
+        active_years = np.diff(s.author_years_between(start_year, end_year)[0])
+        counts = publications / np.maximum(active_years, 1)
+        return leaderboard(s, counts, limit, where=active_years > 0)
+
+    def query_9(self, limit: int) -> List[dict]:
+        s = self.snapshot
+        counts = s.cached("query_9", lambda: self._friends_of_friends())
+        return leaderboard(s, counts, limit)
+
+    def _friends_of_friends(self) -> np.ndarray:
+        # A path through a co-author does not count when both co-authorships come from the same single publication,
+        # since the query needs two different publications
+        s = self.snapshot
+        single = self._single_publication_co_authors()
+        counts = np.zeros(s.authors_count, dtype=np.int64)
+        for start in range(0, s.authors_count, BLOCK_SIZE):
+            paths = (s.co_authors[start:start + BLOCK_SIZE] @ s.co_authors -
+                     single[start:start + BLOCK_SIZE] @ single.T).tocoo()
+            rows = paths.row[paths.data > 0].astype(np.int64) + start
+            columns = paths.col[paths.data > 0].astype(np.int64)
+            keep = (rows != columns) & ~s.are_co_authors(rows * s.authors_count + columns)
+            counts += np.bincount(rows[keep], minlength=s.authors_count)
+        return counts
+
+    def _single_publication_co_authors(self) -> "sparse.csr_matrix":
+        # Matrix of the authors by (co-author, publication), for the co-authors that share a single publication
+        s = self.snapshot
+        works = s.author_works_csc
+        sizes = np.diff(works.indptr)
+        entry_work = np.repeat(np.arange(s.works_count), sizes)
+        lengths = sizes[entry_work]
+        entry = np.repeat(np.arange(len(works.indices)), lengths)
+        partner = works.indptr[entry_work][entry] + np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths,
+                                                                                         lengths)
+        authors = works.indices[entry].astype(np.int64)
+        co_authors = works.indices[partner].astype(np.int64)
+        publications = s.work_publication[entry_work[entry]]
+        others = authors != co_authors
+        triples = np.unique(np.stack([authors[others] * s.authors_count + co_authors[others], publications[others]],
+                                     axis=1), axis=0).reshape(-1, 2)
+        pairs, first, publications_count = np.unique(triples[:, 0], return_index=True, return_counts=True)
+        singles = triples[first[publications_count == 1]]
+        columns = np.unique(singles[:, 0] % s.authors_count * s.publications_count + singles[:, 1],
+                            return_inverse=True)[1].reshape(-1)
+        return incidence(singles[:, 0] // s.authors_count, columns, (s.authors_count, len(singles)))
+
+    def query_10(self, year: str, limit: int) -> List[dict]:
+        s = self.snapshot
+        if year not in s.year_index:
+            return []
+        in_year = (s.contribution_year == s.year_index[year]) & s.publication_has_title[s.contribution_publication]
+        counts = np.bincount(s.contribution_author[in_year], minlength=s.authors_count)
+        return leaderboard(s, counts, limit, where=counts > 3)
+
+    def query_11(self, author: str, year: str) -> List[dict]:
+        s = self.snapshot
+        if author not in s.author_index or year not in s.year_index:
+            return [{"total_pages": 0}]
+        selected = (s.contribution_author == s.author_index[author]) & (s.contribution_year == s.year_index[year])
+        return [{"total_pages": s.total_pages[selected].sum().item()}]
+
+    def query_12(self, title: str, year: str, limit: int, first_author: bool = True) -> List[dict]:
+        s = self.snapshot
+        journal = s.venue_index.get((JOURNAL, title))
+        if journal is None or year not in s.year_index:
+            return []
+        publications = np.asarray(s.publication_venues[:, journal].todense()).ravel()
+        publications[(s.publication_label != ARTICLE) | (s.publication_year != s.year_index[year])] = 0
+        selected = s.first_author if first_author else s.last_author
+        weights = publications[s.contribution_publication[selected]]
+        counts = np.bincount(s.contribution_author[selected], weights=weights, minlength=s.authors_count)
+        counts = counts.astype(np.int64)
+        return leaderboard(s, counts, limit)
+
+    def query_13(self, title: str, limit: int) -> List[dict]:
+        s = self.snapshot
+        journal = s.venue_index.get((JOURNAL, title))
+        if journal is None:
+            return []
+        journal_publications = s.publication_venues[:, journal].tocoo()
+        counts = defaultdict(int)
+        for publication, published in zip(journal_publications.row, journal_publications.data):
+            if s.publication_label[publication] != ARTICLE:
+                continue
+            # Each of the three patterns of the query matches every PUBLISHED relationship to the journal
+            multiplicity = published ** 3
+            first, last = np.searchsorted(s.work_publication, [publication, publication + 1])
+            for work in range(first, last):
+                start, end = s.author_works_csc.indptr[work], s.author_works_csc.indptr[work + 1]
+                authors = zip(s.author_works_csc.indices[start:end], s.author_works_csc.data[start:end])
+                for (author1, count1), (author2, count2), (author3, count3) in combinations(sorted(authors), 3):
+                    counts[(author1, author2, author3)] += count1 * count2 * count3 * multiplicity
+        rows = sorted(counts.items(), key=lambda item: -item[1])[:limit]
+        return [{"name1": s.author_names[authors[0]], "name2": s.author_names[authors[1]],
+                 "name3": s.author_names[authors[2]], "count": int(count)} for authors, count in rows]
+
+    def query_14(self, limit: int) -> List[dict]:
+        s = self.snapshot
+        pairs = self._book_pairs(limit)
+        return [{"name1": s.author_names[author1], "name2": s.author_names[author2]} for author1, author2 in pairs]
+
+    def _book_pairs(self, limit: Optional[int]) -> List[Tuple[int, int]]:
+        # The query has no order, so the pairs are matched book by book until there are enough of them, all of them
+        # without a limit. The parts of a book are compared in chunks, since the books with many parts have too many
+        # pairs to compare at once.
+        s = self.snapshot
+        pairs = {}
+        for edge, author, start_page, end_page in s.cached("book_parts", self._book_parts):
+            chunk = max(1, min(BLOCK_SIZE ** 2 // len(edge), limit or BLOCK_SIZE ** 2))
+            for first in range(0, len(edge), chunk):
+                rows = slice(first, first + chunk)
+                matches = ((edge[rows, None] != edge[None, :]) & (author[rows, None] < author[None, :]) &
+                           (start_page[rows, None] != start_page[None, :]) &
+                           (end_page[rows, None] != end_page[None, :]))
+                matched_rows, matched_columns = np.nonzero(matches)
+                keys = author[rows][matched_rows] * s.authors_count + author[matched_columns]
+                step = max(4 * (limit or 0), BLOCK_SIZE)
+                for key_first in range(0, len(keys), step):
+                    part = keys[key_first:key_first + step]
+                    for key in part[~s.are_co_authors(part)].tolist():
+                        pairs.setdefault(key, None)
+                    if limit is not None and len(pairs) >= limit:
+                        return [divmod(key, s.authors_count) for key in list(pairs)[:limit]]
+        return [divmod(key, s.authors_count) for key in pairs]
+
+    def _book_parts(self) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        # The PUBLISHED relationship, author and pages of the contributions with pages to the parts of every book
+        s = self.snapshot
+        contributions = np.argsort(s.contribution_publication, kind="stable")
+        publication_ptr = np.searchsorted(s.contribution_publication[contributions],
+                                          np.arange(s.publications_count + 1))
+        edges = np.flatnonzero(s.venue_label[s.published_venue] == BOOK)
+        edges = edges[s.publication_label[s.published_publication[edges]] == INCOLLECTION]
+        edges = edges[np.argsort(s.published_venue[edges], kind="stable")]
+
+        lengths = publication_ptr[s.published_publication[edges] + 1] - publication_ptr[s.published_publication[edges]]
+        parts = np.repeat(publication_ptr[s.published_publication[edges]], lengths) + np.arange(lengths.sum()) - \
+            np.repeat(np.cumsum(lengths) - lengths, lengths)
+        parts = contributions[parts]
+        edge = np.repeat(edges, lengths)
+        valid = (s.start_page[parts] >= 0) & (s.end_page[parts] >= 0)
+        edge, parts = edge[valid], parts[valid]
+
+        books = []
+        for part in np.split(np.arange(len(edge)), np.flatnonzero(np.diff(s.published_venue[edge])) + 1):
+            if len(part):
+                books.append((edge[part], s.contribution_author[parts[part]], s.start_page[parts[part]],
+                              s.end_page[parts[part]]))
+        return books
+
+    def query_15(self, k: int, limit: int, start_year: Optional[int] = None,
+                 end_year: Optional[int] = None) -> List[dict]:
+        s = self.snapshot
+        consecutive_years = np.diff(s.author_years_between(start_year, end_year)[0]) - 1
+        authors = np.flatnonzero((consecutive_years == k) & (consecutive_years >= 0))[:limit]
+        return [{"name": s.author_names[author], "consecutiveYears": k} for author in authors]
+
+    def query_16(self, limit: int) -> List[dict]:
+        s = self.snapshot
+        co_authors = np.asarray(sparse.triu(s.co_authorships, k=1).sum(axis=1)).ravel()
+        # The publications of every author that have a co-author with a greater id in the same work
+        works = s.author_works_csc
+        last_author = np.zeros(s.works_count, dtype=np.int64)
+        if len(works.indices):
+            last_author = np.maximum.reduceat(works.indices, works.indptr[:-1])
+        entry_work = np.repeat(np.arange(s.works_count), np.diff(works.indptr))
+        authors = works.indices.astype(np.int64)
+        before_last = authors < last_author[entry_work]
+        keys = np.unique(authors[before_last] * s.publications_count + s.work_publication[entry_work[before_last]])
+        publications = np.bincount(keys // s.publications_count, minlength=s.authors_count)
+        averages = co_authors / np.maximum(publications, 1)
+        return leaderboard(s, averages, limit, alias="averageCoAuthors", where=co_authors > 0)
+
+    def query_17(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        return [{"name": row["name"], "yearsDifferences": row["yearsDifferences"]}
+                for row in self._query_17(start_year, end_year)[:limit]]
+
+    def _query_17(self, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        # The authors with a gap in their years, ordered by their differences and then by index
+        s = self.snapshot
+
+        def compute() -> List[dict]:
+            author_years_ptr, author_years = s.author_years_between(start_year, end_year)
+            rows = []
+            for author in range(s.authors_count):
+                differences = np.diff(author_years[author_years_ptr[author]:author_years_ptr[author + 1]]).tolist()
+                if any(difference >= 2 for difference in differences):
+                    rows.append({"name": s.author_names[author], "yearsDifferences": differences,
+                                 "key": [differences, author]})
+            return sorted(rows, key=lambda row: row["key"])
+
+        # Only the whole range is cached, since the ranges are as many as the requests
+        if start_year is None and end_year is None:
+            return s.cached("query_17", compute)
+        return compute()
+
+    def query_18(self) -> List[dict]:
+        s = self.snapshot
+        incollections = s.author_publications.multiply((s.publication_label == INCOLLECTION)[np.newaxis, :])
+        books = s.publication_venues.multiply((s.venue_label == BOOK)[np.newaxis, :])
+        parts = (sparse.csr_matrix(incollections) @ sparse.csr_matrix(books)).tocoo()
+        if not parts.nnz:
+            return []
+        best = np.argmax(parts.data)
+        return [{"name": s.author_names[parts.row[best]], "title": s.venue_title[parts.col[best]],
+                 "parts": parts.data[best].item()}]
+
+    def author_names(self) -> List[str]:
+        return self.snapshot.author_names.tolist()
+
+    def dataset_generation(self) -> Optional[int]:
+        return self.generation
+
+    def stream_query_1(self, author: str, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        s = self.snapshot
+        if author not in s.author_index:
+            return
+        contributions = np.flatnonzero(s.contribution_author == s.author_index[author])
+        rows = []
+        for contribution in contributions.tolist():
+            year = s.publication_year[s.contribution_publication[contribution]]
+            rows.append({"title": s.publication_title[s.contribution_publication[contribution]],
+                         "year": int(s.years[year]) if year >= 0 else None,
+                         "key": [str(s.years[year]) if year >= 0 else "", contribution]})
+        # Years descending, then contributions ascending
+        rows.sort(key=lambda row: row["key"][1])
+        rows.sort(key=lambda row: row["key"][0], reverse=True)
+        if after:
+            rows = [row for row in rows if row["key"][0] < after[0] or
+                    (row["key"][0] == after[0] and row["key"][1] > after[1])]
+        yield from rows[:limit]
+
+    def stream_query_14(self, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        s = self.snapshot
+        keys = s.cached("book_pairs", lambda: np.array(sorted(author1 * s.authors_count + author2 for author1, author2
+                                                              in self._book_pairs(None)), dtype=np.int64))
+        first = np.searchsorted(keys, after[0] * s.authors_count + after[1], side="right") if after else 0
+        for key in keys[first:first + limit].tolist():
+            author1, author2 = divmod(key, s.authors_count)
+            yield {"name1": s.author_names[author1], "name2": s.author_names[author2], "key": [author1, author2]}
+
+    def stream_query_15(self, k: int, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        s = self.snapshot
+        consecutive_years = np.diff(s.author_years_ptr) - 1
+        authors = np.flatnonzero((consecutive_years == k) & (consecutive_years >= 0))
+        if after:
+            authors = authors[np.searchsorted(authors, after[0], side="right"):]
+        for author in authors[:limit].tolist():
+            yield {"name": s.author_names[author], "consecutiveYears": k, "key": [author]}
+
+    def stream_query_17(self, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        rows = self._query_17()
+        first = bisect_right([row["key"] for row in rows], after) if after else 0
+        yield from rows[first:first + limit]
+
+    # There is no round-trip to save in the local backends, so the batches are answered lookup by lookup
+    def batch_query_1(self, authors: List[str]) -> List[dict]:
+        return [{"author": author, "result": self.query_1(author)} for author in authors]
+
+    def batch_query_2(self, lookups: List[dict]) -> List[dict]:
+        return [{**lookup, "result": self.query_2(lookup["author"], lookup["year"])} for lookup in lookups]
+
+    def batch_query_11(self, lookups: List[dict]) -> List[dict]:
+        return [{**lookup, "result": self.query_11(lookup["author"], lookup["year"])} for lookup in lookups]
+
+
+def load_snapshot(db: Graph) -> Snapshot:
+    """Reads the nodes and relationships that the queries need from the database
+    :param db: The graph database
+    :return: The snapshot of the graph
+    """
+    authors = db.run("MATCH (a:Author) RETURN id(a), a.name").to_table()
+    publications = db.run("MATCH (n) WHERE n:Article OR n:Inproceedings OR n:Incollection "
+                          "RETURN id(n), labels(n)[0], n.title, n.year").to_table()
+    venues = db.run("MATCH (v) WHERE v:Journal OR v:Conference OR v:Book "
+                    "RETURN id(v), labels(v)[0], v.title").to_table()
+    contributions = db.run("MATCH (a:Author)-[r:CONTRIBUTED]->(n) "
+                           "RETURN id(a), id(n), r.start_page, r.end_page, r.total_pages, "
+                           "coalesce(r.first_author, false), coalesce(r.last_author, false)").to_table()
+    published = db.run("MATCH (n)-[:PUBLISHED]->(v) RETURN id(n), id(v)").to_table()
+    return Snapshot.from_rows(authors, publications, venues, contributions, published)
+
+
+def load_parsed_snapshot(path: str, start_year: int, end_year: int) -> Snapshot:
+    """Reads the nodes and relationships that the queries need from the records of a year window of a snapshot of the
+    parsed dump, which holds the same graph as the database seeded from it with the same years. The nodes of every
+    label are numbered after the ones of the previous labels, so the relationship columns are used as they are, only
+    offset, and only the strings are decoded.
+    :param path: The path of the snapshot written by `data_import.py -snapshot`
+    :param start_year: The first year of the records
+    :param end_year: The last year of the records
+    :return: The snapshot of the graph
+    """
+    parsed = ParsedSnapshot(path).window(start_year, end_year)
+    author_names = np.array(list(parsed.column("Author", "name")), dtype=object)
+
+    titles = [parsed.column(label, "title") for label in PUBLICATION_LABELS]
+    publication_counts = [len(column) for column in titles]
+    publication_offsets = np.concatenate([[0], np.cumsum(publication_counts)])
+    publication_years = np.concatenate([parsed.column(label, "year").integers() for label in PUBLICATION_LABELS])
+    distinct_years = np.unique(publication_years[publication_years >= 0])
+
+    venue_titles = [parsed.column(label, "title") for label in VENUE_LABELS]
+    venue_offsets = np.concatenate([[0], np.cumsum([len(column) for column in venue_titles])])
+
+    contributions = []
+    published = []
+    for it, (publication_label, venue_label) in enumerate(zip(PUBLICATION_LABELS, VENUE_LABELS)):
+        contributions.append(parsed.relationships(relationships_name("CONTRIBUTED", "Author", publication_label)))
+        columns = parsed.relationships(relationships_name("PUBLISHED", publication_label, venue_label))
+        published.append((columns["start_ids"] + publication_offsets[it], columns["end_ids"] + venue_offsets[it]))
+
+    def contribution_column(name: str) -> np.ndarray:
+        return np.concatenate([columns[name] for columns in contributions]).astype(np.int64)
+
+    start_pages = contribution_column("start_pages")
+    missing_pages = start_pages == MISSING_PAGES
+    positions = contribution_column("positions")
+    return Snapshot(author_names=author_names,
+                    publication_label=np.repeat(np.arange(len(PUBLICATION_LABELS), dtype=np.int8),
+                                                publication_counts),
+                    publication_title=np.array([title for column in titles for title in column], dtype=object),
+                    years=[str(year) for year in distinct_years.tolist()],
+                    publication_year=np.where(publication_years >= 0,
+                                              np.searchsorted(distinct_years, publication_years), -1),
+                    venue_label=np.repeat(np.arange(len(VENUE_LABELS), dtype=np.int8),
+                                          [len(column) for column in venue_titles]),
+                    venue_title=np.array([title for column in venue_titles for title in column], dtype=object),
+                    contribution_author=contribution_column("start_ids"),
+                    contribution_publication=np.concatenate([
+                        columns["end_ids"] + publication_offsets[it] for it, columns in enumerate(contributions)]),
+                    start_page=np.where(missing_pages, -1, start_pages),
+                    end_page=np.where(missing_pages, -1, contribution_column("end_pages")),
+                    total_pages=np.where(missing_pages, 0, contribution_column("total_pages")),
+                    first_author=positions == FIRST_AUTHOR,
+                    last_author=positions == LAST_AUTHOR,
+                    published_publication=np.concatenate([publications for publications, _ in published]),
+                    published_venue=np.concatenate([venues for _, venues in published]))
+
+
+def read_snapshot(db: Optional[Graph]) -> Snapshot:
+    """Reads the snapshot of the graph from NUMPY_SNAPSHOT_PATH if set, otherwise from the database
+    :param db: The graph database, None when NUMPY_SNAPSHOT_PATH is set
+    :return: The snapshot of the graph
+    """
+    if settings.NUMPY_SNAPSHOT_PATH:
+        return load_parsed_snapshot(settings.NUMPY_SNAPSHOT_PATH, settings.NUMPY_SNAPSHOT_START_YEAR,
+                                    settings.NUMPY_SNAPSHOT_END_YEAR)
+    return load_snapshot(db)
+
+
+def read_generation(db: Optional[Graph]) -> Optional[int]:
+    """Returns the dataset generation of the source of the snapshot. The snapshot of NUMPY_SNAPSHOT_PATH is rewritten
+    by every import that saves it, so its generation is the time it was written, in milliseconds like the generations
+    of the database.
+    :param db: The graph database, None when NUMPY_SNAPSHOT_PATH is set
+    :return: The generation, None if there is none
+    """
+    if settings.NUMPY_SNAPSHOT_PATH:
+        parsed = ParsedSnapshot.find(settings.NUMPY_SNAPSHOT_PATH)
+        return int(parsed.manifest["created"] * 1000) if parsed is not None else None
+    return db.evaluate(GENERATION_QUERY)
+
+
+numpy_backend: Optional[NumpyBackend] = None
+numpy_backend_lock = Lock()
+
+
+def get_numpy_backend(db: Optional[Graph] = None) -> NumpyBackend:
+    """Returns the NumPy backend of the process, loading its snapshot on first use
+    :param db: The graph database, None when NUMPY_SNAPSHOT_PATH is set
+    :return: The backend
+    """
+    global numpy_backend
+    with numpy_backend_lock:
+        if numpy_backend is None:
+            numpy_backend = NumpyBackend.load(db)
+    numpy_backend.refresh(db)
+    return numpy_backend
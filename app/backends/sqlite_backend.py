@@ -0,0 +1,489 @@
+import os
+import sqlite3
+from bisect import bisect_right
+from itertools import groupby
+from threading import Lock, local
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from app.analytics.triads import CoAuthorGraph, compute_triads
+from app.core.config import settings
+
+# Internal ids are assigned in insertion order, like the ids of Neo4j in a freshly imported database
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS authors (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS publications (id INTEGER PRIMARY KEY, label TEXT NOT NULL, key TEXT NOT NULL UNIQUE, "
+    "title TEXT, year TEXT, mdate TEXT)",
+    "CREATE TABLE IF NOT EXISTS venues (id INTEGER PRIMARY KEY, label TEXT NOT NULL, title TEXT, "
+    "UNIQUE (label, title))",
+    "CREATE TABLE IF NOT EXISTS contributions (id INTEGER PRIMARY KEY, author INTEGER NOT NULL, "
+    "publication INTEGER NOT NULL, start_page INTEGER, end_page INTEGER, total_pages INTEGER, "
+    "first_author INTEGER NOT NULL DEFAULT 0, last_author INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS published (id INTEGER PRIMARY KEY, publication INTEGER NOT NULL, "
+    "venue INTEGER NOT NULL)",
+    # The counts of queries 7 and 9 of every author that they return, precomputed by create_table_indices
+    "CREATE TABLE IF NOT EXISTS author_triads (author INTEGER PRIMARY KEY, open_triads INTEGER, "
+    "friends_of_friends INTEGER)",
+]
+
+# Created once all the data have been inserted, which is faster than updating them on every insert
+INDICES = [
+    "CREATE INDEX IF NOT EXISTS ContributionsAuthorIndex ON contributions (author)",
+    "CREATE INDEX IF NOT EXISTS ContributionsWorkIndex ON contributions (publication, start_page, end_page)",
+    "CREATE INDEX IF NOT EXISTS PublicationsYearIndex ON publications (year)",
+    "CREATE INDEX IF NOT EXISTS PublishedPublicationIndex ON published (publication)",
+    "CREATE INDEX IF NOT EXISTS PublishedVenueIndex ON published (venue)",
+    # The co-authors of every author, along with the number of their co-authored publications and one of them, which
+    # tells whether two co-authorships come from different publications
+    "CREATE TABLE IF NOT EXISTS co_authors AS "
+    "SELECT r1.author AS author, r2.author AS co_author, COUNT(DISTINCT r1.publication) AS publications, "
+    "MIN(r1.publication) AS publication "
+    "FROM contributions r1 "
+    "JOIN contributions r2 ON r2.publication = r1.publication "
+    "AND r2.start_page = r1.start_page "
+    "AND r2.end_page = r1.end_page "
+    "WHERE r1.author <> r2.author "
+    "GROUP BY r1.author, r2.author",
+    "CREATE UNIQUE INDEX IF NOT EXISTS CoAuthorsIndex ON co_authors (author, co_author)",
+    "CREATE INDEX IF NOT EXISTS CoAuthorsReverseIndex ON co_authors (co_author, author)",
+    "ANALYZE",
+]
+
+
+def create_tables(connection: sqlite3.Connection) -> None:
+    """Creates the tables of the local store
+    :param connection: The connection to the store
+    :return: None
+    """
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.commit()
+
+
+def create_table_indices(connection: sqlite3.Connection, workers: int = 1) -> None:
+    """Creates the indices and the co-author tables of the local store, once all the data have been inserted
+    :param connection: The connection to the store
+    :param workers: The number of worker processes that precompute the counts of queries 7 and 9
+    :return: None
+    """
+    for statement in INDICES:
+        connection.execute(statement)
+    insert_triads(connection, workers)
+    connection.commit()
+
+
+def insert_triads(connection: sqlite3.Connection, workers: int = 1) -> None:
+    """Precomputes the counts of queries 7 and 9 of every author from the co_authors table, with the same engine as the
+    statistics of the database. Both queries compare the co-authors of every author with each other, which takes too
+    long to run as a self join on every request. The co_authors table holds the co-authorships of the same pages of a
+    publication, which are also the pairs of co-authors that the queries consider to have published together, since
+    all the contributions of a publication have its pages.
+    :param connection: The connection to the store
+    :param workers: The number of worker processes
+    :return: None
+    """
+    author_ids = np.array([row[0] for row in connection.execute("SELECT id FROM authors ORDER BY id")],
+                          dtype=np.int64)
+    pairs = np.array(connection.execute("SELECT author, co_author FROM co_authors WHERE author < co_author").fetchall(),
+                     dtype=np.int64).reshape(-1, 2)
+    graph = CoAuthorGraph(author_ids.tolist(), np.searchsorted(author_ids, pairs[:, 0]),
+                          np.searchsorted(author_ids, pairs[:, 1]))
+    connection.executemany("INSERT INTO author_triads (author, open_triads, friends_of_friends) VALUES (?, ?, ?)",
+                           ((row["name"], row["openTriads"], row["friendsOfFriends"])
+                            for row in compute_triads(graph, workers)
+                            if row["openTriads"] is not None or row["friendsOfFriends"] is not None))
+
+
+def year_range_condition(start_year: Optional[int], end_year: Optional[int], keyword: str = "WHERE") -> str:
+    """Returns the condition that keeps the publications n between :start_year and :end_year, either of which may be
+    unbounded, or nothing when the whole range is unbounded, so that the publications without a year are kept too
+    :param start_year: The first year of the range
+    :param end_year: The last year of the range
+    :param keyword: The keyword that introduces the condition, WHERE or AND
+    :return: The condition
+    """
+    if start_year is None and end_year is None:
+        return ""
+    return f"{keyword} CAST(n.year AS INTEGER) " \
+           f"BETWEEN coalesce(:start_year, CAST(n.year AS INTEGER)) AND coalesce(:end_year, CAST(n.year AS INTEGER)) "
+
+
+class SqliteBackend:
+    """Answers the queries of the endpoints from a local SQLite copy of the graph, which `data_import.py -export_sqlite`
+    creates from the same parsed records as the database. Tests and benchmarks can run on it without a Neo4j server.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = local()
+
+    def connection(self) -> sqlite3.Connection:
+        """Returns the read-only connection of the current thread, since SQLite connections cannot be shared between
+        threads
+        :return: The connection to the store
+        """
+        if getattr(self._local, "connection", None) is None:
+            self._local.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.connection.row_factory = sqlite3.Row
+        return self._local.connection
+
+    def run(self, query: str, parameters: Optional[dict] = None) -> List[dict]:
+        return [dict(row) for row in self.connection().execute(query, parameters or {})]
+
+    def query_1(self, author: str) -> List[dict]:
+        query = "SELECT n.title AS title, n.year AS year " \
+                "FROM authors a " \
+                "JOIN contributions r ON r.author = a.id " \
+                "JOIN publications n ON n.id = r.publication " \
+                "WHERE a.name = :name " \
+                "ORDER BY year DESC"
+        return self.run(query, {'name': author})
+
+    def query_2(self, author: str, year: str) -> List[dict]:
+        query = "SELECT a2.name AS name, COUNT(*) AS count " \
+                "FROM authors a1 " \
+                "JOIN contributions r1 ON r1.author = a1.id " \
+                "JOIN publications n ON n.id = r1.publication " \
+                "JOIN contributions r2 ON r2.publication = r1.publication " \
+                "AND r2.start_page = r1.start_page " \
+                "AND r2.end_page = r1.end_page " \
+                "AND r2.id <> r1.id " \
+                "JOIN authors a2 ON a2.id = r2.author " \
+                "WHERE a1.name = :name " \
+                "AND n.year = :year " \
+                "GROUP BY a2.id " \
+                "ORDER BY count DESC"
+        return self.run(query, {'name': author, 'year': year})
+
+    def query_3(self, limit: int, inproc: bool = True) -> List[dict]:
+        query = "SELECT a.name AS name, COUNT(*) AS count " \
+                "FROM contributions r " \
+                "JOIN publications n ON n.id = r.publication " \
+                "JOIN authors a ON a.id = r.author " \
+                "WHERE n.label = :label " \
+                "GROUP BY r.author " \
+                "ORDER BY count DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'label': "Inproceedings" if inproc else "Article", 'limit': limit})
+
+    def query_4(self, limit: int) -> List[dict]:
+        query = "SELECT a1.name AS name, COUNT(*) AS count " \
+                "FROM contributions r1 " \
+                "JOIN contributions r2 ON r2.publication = r1.publication " \
+                "AND r2.start_page = r1.start_page " \
+                "AND r2.end_page = r1.end_page " \
+                "AND r2.author <> r1.author " \
+                "JOIN authors a1 ON a1.id = r1.author " \
+                "WHERE r1.first_author " \
+                "GROUP BY r1.author " \
+                "ORDER BY count DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'limit': limit})
+
+    def query_5(self, year: str, limit: int) -> List[dict]:
+        query = "SELECT a1.name AS name, COUNT(*) AS count " \
+                "FROM publications n " \
+                "JOIN contributions r1 ON r1.publication = n.id " \
+                "JOIN contributions r2 ON r2.publication = r1.publication " \
+                "AND r2.start_page = r1.start_page " \
+                "AND r2.end_page = r1.end_page " \
+                "AND r2.author <> r1.author " \
+                "JOIN authors a1 ON a1.id = r1.author " \
+                "WHERE n.year = :year " \
+                "GROUP BY r1.author " \
+                "ORDER BY count DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'year': year, 'limit': limit})
+
+    def query_6(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        query = "SELECT a.name AS name, COUNT(DISTINCT n.year) AS count " \
+                "FROM contributions r " \
+                "JOIN publications n ON n.id = r.publication " \
+                "JOIN authors a ON a.id = r.author " \
+                f"{year_range_condition(start_year, end_year)}" \
+                "GROUP BY r.author " \
+                "ORDER BY count DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'start_year': start_year, 'end_year': end_year, 'limit': limit})
+
+    def query_7(self, limit: int) -> List[dict]:
+        # Precomputed by the export, see insert_triads
+        query = "SELECT a.name AS name, t.open_triads AS count " \
+                "FROM author_triads t " \
+                "JOIN authors a ON a.id = t.author " \
+                "WHERE t.open_triads IS NOT NULL " \
+                "ORDER BY count DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'limit': limit})
+
+    def query_8(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        query = "SELECT a.name AS name, CAST(COUNT(n.title) AS REAL) / COUNT(DISTINCT n.year) AS count " \
+                "FROM contributions r " \
+                "JOIN publications n ON n.id = r.publication " \
+                "JOIN authors a ON a.id = r.author " \
+                f"{year_range_condition(start_year, end_year)}" \
+                "GROUP BY r.author " \
+                "HAVING COUNT(DISTINCT n.year) > 0 " \
+                "ORDER BY count DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'start_year': start_year, 'end_year': end_year, 'limit': limit})
+
+    def query_9(self, limit: int) -> List[dict]:
+        # Precomputed by the export, see insert_triads
+        query = "SELECT a.name AS name, t.friends_of_friends AS count " \
+                "FROM author_triads t " \
+                "JOIN authors a ON a.id = t.author " \
+                "WHERE t.friends_of_friends IS NOT NULL " \
+                "ORDER BY count DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'limit': limit})
+
+    def query_10(self, year: str, limit: int) -> List[dict]:
+        query = "SELECT a.name AS name, COUNT(n.title) AS count " \
+                "FROM publications n " \
+                "JOIN contributions r ON r.publication = n.id " \
+                "JOIN authors a ON a.id = r.author " \
+                "WHERE n.year = :year " \
+                "GROUP BY r.author " \
+                "HAVING count > 3 " \
+                "ORDER BY count DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'year': year, 'limit': limit})
+
+    def query_11(self, author: str, year: str) -> List[dict]:
+        query = "SELECT COALESCE(SUM(r.total_pages), 0) AS total_pages " \
+                "FROM authors a " \
+                "JOIN contributions r ON r.author = a.id " \
+                "JOIN publications n ON n.id = r.publication " \
+                "WHERE a.name = :name " \
+                "AND n.year = :year"
+        return self.run(query, {'name': author, 'year': year})
+
+    def query_12(self, title: str, year: str, limit: int, first_author: bool = True) -> List[dict]:
+        query = f"SELECT a.name AS name, COUNT(*) AS count " \
+                f"FROM venues j " \
+                f"JOIN published e ON e.venue = j.id " \
+                f"JOIN publications ar ON ar.id = e.publication " \
+                f"JOIN contributions r ON r.publication = ar.id " \
+                f"JOIN authors a ON a.id = r.author " \
+                f"WHERE j.label = 'Journal' " \
+                f"AND j.title = :title " \
+                f"AND ar.label = 'Article' " \
+                f"AND ar.year = :year " \
+                f"AND r.{'first_author' if first_author else 'last_author'} " \
+                f"GROUP BY r.author " \
+                f"ORDER BY count DESC " \
+                f"LIMIT :limit"
+        return self.run(query, {'title': title, 'year': year, 'limit': limit})
+
+    def query_13(self, title: str, limit: int) -> List[dict]:
+        # Each of the three patterns of the Cypher matches every PUBLISHED relationship to the journal
+        query = "SELECT a1.name AS name1, a2.name AS name2, a3.name AS name3, COUNT(*) AS count " \
+                "FROM venues j " \
+                "JOIN published e1 ON e1.venue = j.id " \
+                "JOIN publications ar ON ar.id = e1.publication " \
+                "JOIN published e2 ON e2.publication = ar.id AND e2.venue = j.id " \
+                "JOIN published e3 ON e3.publication = ar.id AND e3.venue = j.id " \
+                "JOIN contributions r1 ON r1.publication = ar.id " \
+                "JOIN contributions r2 ON r2.publication = ar.id " \
+                "AND r2.start_page = r1.start_page " \
+                "AND r2.end_page = r1.end_page " \
+                "AND r2.author > r1.author " \
+                "JOIN contributions r3 ON r3.publication = ar.id " \
+                "AND r3.start_page = r2.start_page " \
+                "AND r3.end_page = r2.end_page " \
+                "AND r3.author > r2.author " \
+                "JOIN authors a1 ON a1.id = r1.author " \
+                "JOIN authors a2 ON a2.id = r2.author " \
+                "JOIN authors a3 ON a3.id = r3.author " \
+                "WHERE j.label = 'Journal' " \
+                "AND j.title = :title " \
+                "AND ar.label = 'Article' " \
+                "GROUP BY r1.author, r2.author, r3.author " \
+                "ORDER BY count DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'title': title, 'limit': limit})
+
+    def query_14(self, limit: int) -> List[dict]:
+        query = "SELECT DISTINCT a1.name AS name1, a2.name AS name2 " \
+                "FROM venues b " \
+                "JOIN published e1 ON e1.venue = b.id " \
+                "JOIN publications i1 ON i1.id = e1.publication " \
+                "JOIN published e2 ON e2.venue = b.id AND e2.id <> e1.id " \
+                "JOIN publications i2 ON i2.id = e2.publication " \
+                "JOIN contributions r1 ON r1.publication = i1.id " \
+                "JOIN contributions r2 ON r2.publication = i2.id " \
+                "AND r2.author > r1.author " \
+                "AND r2.start_page <> r1.start_page " \
+                "AND r2.end_page <> r1.end_page " \
+                "JOIN authors a1 ON a1.id = r1.author " \
+                "JOIN authors a2 ON a2.id = r2.author " \
+                "WHERE b.label = 'Book' " \
+                "AND i1.label = 'Incollection' " \
+                "AND i2.label = 'Incollection' " \
+                "AND NOT EXISTS (" \
+                "  SELECT 1 FROM co_authors c WHERE c.author = r1.author AND c.co_author = r2.author" \
+                ") " \
+                "LIMIT :limit"
+        return self.run(query, {'limit': limit})
+
+    def query_15(self, k: int, limit: int, start_year: Optional[int] = None,
+                 end_year: Optional[int] = None) -> List[dict]:
+        query = "SELECT a.name AS name, COUNT(DISTINCT n.year) - 1 AS consecutiveYears " \
+                "FROM contributions r " \
+                "JOIN publications n ON n.id = r.publication " \
+                "JOIN authors a ON a.id = r.author " \
+                "WHERE n.year IS NOT NULL " \
+                f"{year_range_condition(start_year, end_year, 'AND')}" \
+                "GROUP BY r.author " \
+                "HAVING consecutiveYears = :k " \
+                "LIMIT :limit"
+        return self.run(query, {'k': k, 'start_year': start_year, 'end_year': end_year, 'limit': limit})
+
+    def query_16(self, limit: int) -> List[dict]:
+        query = "SELECT a1.name AS name, " \
+                "CAST(COUNT(*) AS REAL) / COUNT(DISTINCT r1.publication) AS averageCoAuthors " \
+                "FROM contributions r1 " \
+                "JOIN contributions r2 ON r2.publication = r1.publication " \
+                "AND r2.start_page = r1.start_page " \
+                "AND r2.end_page = r1.end_page " \
+                "AND r2.author > r1.author " \
+                "JOIN authors a1 ON a1.id = r1.author " \
+                "GROUP BY r1.author " \
+                "ORDER BY averageCoAuthors DESC " \
+                "LIMIT :limit"
+        return self.run(query, {'limit': limit})
+
+    def query_17(self, limit: int, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        return [{"name": row["name"], "yearsDifferences": row["yearsDifferences"]}
+                for row in self._query_17(start_year, end_year)[:limit]]
+
+    def _query_17(self, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[dict]:
+        # The authors with a gap in their years, ordered by their differences and then by id
+        query = "SELECT a.id AS author, a.name AS name, " \
+                "y.year - LAG(y.year) OVER (PARTITION BY y.author ORDER BY y.year) AS difference " \
+                "FROM (" \
+                "  SELECT DISTINCT r.author AS author, CAST(n.year AS INTEGER) AS year " \
+                "  FROM contributions r " \
+                "  JOIN publications n ON n.id = r.publication " \
+                "  WHERE n.year IS NOT NULL " \
+                f"  {year_range_condition(start_year, end_year, 'AND')}" \
+                ") y " \
+                "JOIN authors a ON a.id = y.author " \
+                "ORDER BY y.author, y.year"
+        rows = []
+        for (author, name), years in groupby(self.run(query, {'start_year': start_year, 'end_year': end_year}),
+                                             key=lambda row: (row["author"], row["name"])):
+            differences = [row["difference"] for row in years][1:]
+            if any(difference >= 2 for difference in differences):
+                rows.append({"name": name, "yearsDifferences": differences, "key": [differences, author]})
+        return sorted(rows, key=lambda row: row["key"])
+
+    def query_18(self) -> List[dict]:
+        query = "SELECT a.name AS name, b.title AS title, COUNT(*) AS parts " \
+                "FROM contributions r " \
+                "JOIN publications i ON i.id = r.publication " \
+                "JOIN published e ON e.publication = i.id " \
+                "JOIN venues b ON b.id = e.venue " \
+                "JOIN authors a ON a.id = r.author " \
+                "WHERE i.label = 'Incollection' " \
+                "AND b.label = 'Book' " \
+                "GROUP BY r.author, b.id " \
+                "ORDER BY parts DESC " \
+                "LIMIT 1"
+        return self.run(query)
+
+    def author_names(self) -> List[str]:
+        return [row[0] for row in self.connection().execute("SELECT name FROM authors")]
+
+    def dataset_generation(self) -> Optional[int]:
+        # Every export rewrites the store
+        return os.stat(self.path).st_mtime_ns
+
+    def stream_query_1(self, author: str, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        query = "SELECT n.title AS title, CAST(n.year AS INTEGER) AS year, COALESCE(n.year, '') AS sort_year, " \
+                "r.id AS contribution " \
+                "FROM authors a " \
+                "JOIN contributions r ON r.author = a.id " \
+                "JOIN publications n ON n.id = r.publication " \
+                "WHERE a.name = :name " \
+                "AND (:after_year IS NULL " \
+                "OR sort_year < :after_year " \
+                "OR (sort_year = :after_year AND r.id > :after_id)) " \
+                "ORDER BY sort_year DESC, r.id " \
+                "LIMIT :limit"
+        after_year, after_id = after or (None, None)
+        for row in self.run(query, {'name': author, 'after_year': after_year, 'after_id': after_id, 'limit': limit}):
+            yield {"title": row["title"], "year": row["year"], "key": [row["sort_year"], row["contribution"]]}
+
+    def stream_query_14(self, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        query = "SELECT DISTINCT a1.name AS name1, a2.name AS name2, r1.author AS author1, r2.author AS author2 " \
+                "FROM venues b " \
+                "JOIN published e1 ON e1.venue = b.id " \
+                "JOIN publications i1 ON i1.id = e1.publication " \
+                "JOIN published e2 ON e2.venue = b.id AND e2.id <> e1.id " \
+                "JOIN publications i2 ON i2.id = e2.publication " \
+                "JOIN contributions r1 ON r1.publication = i1.id " \
+                "JOIN contributions r2 ON r2.publication = i2.id " \
+                "AND r2.author > r1.author " \
+                "AND r2.start_page <> r1.start_page " \
+                "AND r2.end_page <> r1.end_page " \
+                "JOIN authors a1 ON a1.id = r1.author " \
+                "JOIN authors a2 ON a2.id = r2.author " \
+                "WHERE b.label = 'Book' " \
+                "AND i1.label = 'Incollection' " \
+                "AND i2.label = 'Incollection' " \
+                "AND (r1.author, r2.author) > (:after_author1, :after_author2) " \
+                "AND NOT EXISTS (" \
+                "  SELECT 1 FROM co_authors c WHERE c.author = r1.author AND c.co_author = r2.author" \
+                ") " \
+                "ORDER BY author1, author2 " \
+                "LIMIT :limit"
+        after_author1, after_author2 = after or (-1, -1)
+        for row in self.run(query, {'after_author1': after_author1, 'after_author2': after_author2, 'limit': limit}):
+            yield {"name1": row["name1"], "name2": row["name2"], "key": [row["author1"], row["author2"]]}
+
+    def stream_query_15(self, k: int, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        query = "SELECT r.author AS author, a.name AS name, COUNT(DISTINCT n.year) - 1 AS consecutiveYears " \
+                "FROM contributions r " \
+                "JOIN publications n ON n.id = r.publication " \
+                "JOIN authors a ON a.id = r.author " \
+                "WHERE n.year IS NOT NULL " \
+                "AND r.author > :after " \
+                "GROUP BY r.author " \
+                "HAVING consecutiveYears = :k " \
+                "ORDER BY r.author " \
+                "LIMIT :limit"
+        for row in self.run(query, {'k': k, 'after': after[0] if after else -1, 'limit': limit}):
+            yield {"name": row["name"], "consecutiveYears": row["consecutiveYears"], "key": [row["author"]]}
+
+    def stream_query_17(self, limit: int, after: Optional[list] = None) -> Iterator[dict]:
+        rows = self._query_17()
+        first = bisect_right([row["key"] for row in rows], after) if after else 0
+        yield from rows[first:first + limit]
+
+    # There is no round-trip to save in the local backends, so the batches are answered lookup by lookup
+    def batch_query_1(self, authors: List[str]) -> List[dict]:
+        return [{"author": author, "result": self.query_1(author)} for author in authors]
+
+    def batch_query_2(self, lookups: List[dict]) -> List[dict]:
+        return [{**lookup, "result": self.query_2(lookup["author"], lookup["year"])} for lookup in lookups]
+
+    def batch_query_11(self, lookups: List[dict]) -> List[dict]:
+        return [{**lookup, "result": self.query_11(lookup["author"], lookup["year"])} for lookup in lookups]
+
+
+sqlite_backend: Optional[SqliteBackend] = None
+sqlite_backend_lock = Lock()
+
+
+def get_sqlite_backend() -> SqliteBackend:
+    """Returns the SQLite backend of the process, opening the store of SQLITE_PATH on first use
+    :return: The backend
+    """
+    global sqlite_backend
+    with sqlite_backend_lock:
+        if sqlite_backend is None:
+            sqlite_backend = SqliteBackend(settings.SQLITE_PATH)
+        return sqlite_backend
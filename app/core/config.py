@@ -1,5 +1,5 @@
 import secrets
-from typing import List, Union
+from typing import List, Optional, Union
 
 from pydantic import AnyHttpUrl, BaseSettings, validator
 
@@ -28,6 +28,74 @@ class Settings(BaseSettings):
     DB_HOST: str
     DB_PASSWORD: str
 
+    # Connection pool shared by all the requests of a process
+    DB_POOL_MAX_SIZE: int = 100
+    # Seconds after which a connection is closed and replaced by a new one
+    DB_POOL_MAX_AGE: float = 3600
+    # Seconds to wait for a free connection before failing the request
+    DB_POOL_ACQUISITION_TIMEOUT: float = 60
+    # Seconds that the pool may stay idle before it is checked with a trivial query, no checks if unset
+    DB_POOL_LIVENESS_CHECK_TIMEOUT: Optional[float] = None
+
+    # Queries that may run at the same time per class: cheap lookups of a single author or journal and the heavy
+    # aggregations over the whole graph, which queue up once the limit is reached
+    QUERY_CONCURRENCY_LOOKUP: int = 32
+    QUERY_CONCURRENCY_ANALYTICS: int = 4
+
+    # Read queries 3, 4, 5, 6, 7, 8, 9, 15, 16 and 17 from the statistics precomputed by the import
+    PRECOMPUTED_STATISTICS: bool = False
+    # Find the co-authors of queries 2, 4, 5, 7, 9 and 14 through the CO_AUTHORED relationships created by the import
+    CO_AUTHORED_EDGES: bool = False
+    # Tell apart the works of the co-authors of queries 2, 4, 5, 7, 9, 13, 14 and 16 by their publication node, which
+    # the import keys by its DBLP record, instead of by the pages of their contributions
+    PUBLICATION_IDENTITY: bool = False
+
+    # Where the queries are answered: "neo4j" runs their Cypher, "numpy" keeps a snapshot of the graph in memory and
+    # "sqlite" reads the local store written by `data_import.py -export_sqlite`, without a Neo4j server
+    QUERY_BACKEND: str = "neo4j"
+    SQLITE_PATH: str = "dblp.sqlite"
+    # Load the numpy backend from a snapshot of the parsed dump written by `data_import.py -snapshot`, instead of
+    # reading the graph from the database, so that it runs without a Neo4j server
+    NUMPY_SNAPSHOT_PATH: Optional[str] = None
+    # The years of the records that are read from the snapshot, which holds all of them, the -start_year and -end_year
+    # of the import
+    NUMPY_SNAPSHOT_START_YEAR: int = 2010
+    NUMPY_SNAPSHOT_END_YEAR: int = 2014
+
+    # Cache of the query results, dropped whenever an import changes the dataset
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 1024
+    # Seconds after which a cached result expires, never if unset
+    CACHE_TTL: Optional[float] = 3600
+    # Seconds between the checks for a new dataset generation
+    CACHE_GENERATION_CHECK_INTERVAL: float = 30
+    # Share the cache between the API processes through Redis, e.g. redis://localhost:6379/0
+    CACHE_REDIS_URL: Optional[str] = None
+
+    # Encode the results of the query and batch endpoints with orjson and validate only the rows that do not already
+    # have the types of their response model, instead of validating every row
+    FAST_SERIALIZATION: bool = False
+
+    # The lookups that a batch endpoint accepts in one request
+    BATCH_MAX_SIZE: int = 1000
+
+    # The groups of authors that the author search returns at most
+    AUTHOR_SEARCH_MAX_RESULTS: int = 100
+
+    # The streaming endpoints of the queries with large results write pages of this many rows by default, up to the
+    # maximum, fetching them from the backend in chunks
+    STREAM_PAGE_SIZE: int = 1000
+    STREAM_MAX_PAGE_SIZE: int = 100000
+    STREAM_CHUNK_ROWS: int = 500
+
+    # Per-route request counts, latency histograms and query timings, served by /status/metrics
+    METRICS_ENABLED: bool = True
+    # Log the queries that take longer than this many seconds, including their wait for a thread, never if unset
+    SLOW_QUERY_SECONDS: Optional[float] = 5
+    # Debugging: the fraction of the Cypher queries that run under PROFILE, which reports their db hits and plan in
+    # the X-Query-Profile header and the log. Profiled queries bypass the result cache
+    QUERY_PROFILE_RATE: float = 0
+
     class Config:
         case_sensitive = True
         env_file = '.env'
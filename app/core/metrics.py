@@ -0,0 +1,264 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, List, Optional
+
+from starlette.routing import Match
+
+from app.core.config import settings
+
+# Upper bounds in seconds of the latency histograms, wide enough for the slowest analytics
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Histogram:
+    """Counts the observed values per bucket, like a Prometheus histogram"""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates a quantile as the upper bound of the bucket that contains it
+        :param q: The quantile, between 0 and 1
+        :return: The estimate or None if nothing was observed
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def cumulative_counts(self) -> List[tuple]:
+        """Returns the number of observed values up to every bucket bound, the last one being +Inf
+        :return: The (bound, count) pairs
+        """
+        counts = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            counts.append((bound, cumulative))
+        return counts
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {str(bound): count for bound, count in self.cumulative_counts()},
+        }
+
+
+class RequestRecord:
+    """What the queries of a request report to the metrics middleware"""
+
+    def __init__(self):
+        self.queue_seconds = 0.0
+        self.db_seconds = 0.0
+        self.rows = 0
+        # When the last query returned its result, which starts the serialization of the response
+        self.finished = None
+        self.serialization_seconds = None
+        self.profile = None
+
+
+class RouteMetrics:
+    """The metrics of a route: how many requests it serves, how long they take and where the time goes"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latency = Histogram()
+        # Time waiting for a thread of the query class, running the query and turning the rows into the response
+        self.queue = Histogram()
+        self.db = Histogram()
+        self.serialization = Histogram()
+        self.queries = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "latency_seconds": self.latency.stats(),
+            "queue_seconds": self.queue.stats(),
+            "db_seconds": self.db.stats(),
+            "serialization_seconds": self.serialization.stats(),
+            "queries": self.queries,
+            "rows": self.rows,
+            "bytes": self.bytes,
+        }
+
+
+class MetricsRegistry:
+    """The metrics of every route of this process"""
+
+    def __init__(self):
+        self.routes: Dict[str, RouteMetrics] = {}
+        self._lock = Lock()
+
+    def _route(self, route: str) -> RouteMetrics:
+        if route not in self.routes:
+            self.routes[route] = RouteMetrics()
+        return self.routes[route]
+
+    def start(self, route: str) -> None:
+        with self._lock:
+            self._route(route).in_flight += 1
+
+    def finish(self, route: str, status: int, seconds: float, record: RequestRecord, size: int) -> None:
+        """Records a finished request
+        :param route: The path of the route
+        :param status: The status code of the response
+        :param seconds: The time from receiving the request to sending the whole response
+        :param record: What the queries of the request reported
+        :param size: The size of the response body in bytes
+        :return: None
+        """
+        with self._lock:
+            metrics = self._route(route)
+            metrics.in_flight -= 1
+            metrics.requests += 1
+            if status >= 500:
+                metrics.errors += 1
+            metrics.latency.observe(seconds)
+            metrics.bytes += size
+            if record.finished is not None:
+                metrics.queries += 1
+                metrics.rows += record.rows
+                metrics.queue.observe(record.queue_seconds)
+                metrics.db.observe(record.db_seconds)
+                if record.serialization_seconds is not None:
+                    metrics.serialization.observe(record.serialization_seconds)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {route: metrics.stats() for route, metrics in sorted(self.routes.items())}
+
+    def prometheus(self) -> str:
+        """Returns the metrics in the text format of Prometheus
+        :return: The metrics
+        """
+        lines = []
+        with self._lock:
+            routes = sorted(self.routes.items())
+            for name, kind, value in [("http_requests_total", "counter", lambda m: m.requests),
+                                      ("http_request_errors_total", "counter", lambda m: m.errors),
+                                      ("http_requests_in_flight", "gauge", lambda m: m.in_flight),
+                                      ("query_rows_total", "counter", lambda m: m.rows),
+                                      ("query_result_bytes_total", "counter", lambda m: m.bytes)]:
+                lines.append(f"# TYPE dblp_{name} {kind}")
+                lines += [f'dblp_{name}{{route="{route}"}} {value(metrics)}' for route, metrics in routes]
+
+            for name, histogram in [("http_request_duration_seconds", lambda m: m.latency),
+                                    ("query_queue_seconds", lambda m: m.queue),
+                                    ("query_db_seconds", lambda m: m.db),
+                                    ("query_serialization_seconds", lambda m: m.serialization)]:
+                lines.append(f"# TYPE dblp_{name} histogram")
+                for route, metrics in routes:
+                    for bound, count in histogram(metrics).cumulative_counts():
+                        lines.append(f'dblp_{name}_bucket{{route="{route}",le="{bound}"}} {count}')
+                    lines.append(f'dblp_{name}_sum{{route="{route}"}} {histogram(metrics).sum}')
+                    lines.append(f'dblp_{name}_count{{route="{route}"}} {histogram(metrics).count}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+current_request: ContextVar[Optional[RequestRecord]] = ContextVar("current_request", default=None)
+
+
+def record_query(queue_seconds: float, db_seconds: float, rows: int, finished: float) -> None:
+    """Reports a query to the metrics of the current request, if any
+    :param queue_seconds: The time the query waited for a thread
+    :param db_seconds: The time the query ran
+    :param rows: The number of rows of the result
+    :param finished: When the query returned, as a time.perf_counter() value
+    :return: None
+    """
+    record = current_request.get()
+    if record is not None:
+        record.queue_seconds += queue_seconds
+        record.db_seconds += db_seconds
+        record.rows += rows
+        record.finished = finished
+
+
+def record_profile(profile: str) -> None:
+    """Attaches the profile of a query to the current request, which returns it in the X-Query-Profile header
+    :param profile: The summary of the profile
+    :return: None
+    """
+    record = current_request.get()
+    if record is not None:
+        record.profile = profile
+
+
+def route_path(scope: dict) -> str:
+    """Returns the path of the route that serves a request, so that the metrics are not split by query parameters
+    :param scope: The ASGI scope of the request
+    :return: The path of the route
+    """
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Measures every request, from receiving it to sending the last byte of the response. The queries of the request
+    report their queue and database time through the current_request context variable, and the time from the last
+    query returning to the response starting is the serialization of the result.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route = route_path(scope)
+        record = RequestRecord()
+        token = current_request.set(record)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_measured(message: dict) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if record.finished is not None:
+                    record.serialization_seconds = time.perf_counter() - record.finished
+                if record.profile is not None:
+                    message = {**message, "headers": list(message.get("headers", [])) +
+                               [(b"x-query-profile", record.profile.encode("latin-1", "replace"))]}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        metrics.start(route)
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            current_request.reset(token)
+            metrics.finish(route, status, time.perf_counter() - start, record, size)
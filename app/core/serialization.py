@@ -0,0 +1,100 @@
+from typing import Any, Callable, Dict, List, Optional, Type
+
+import orjson
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+from starlette.responses import Response
+
+from app.core.config import settings
+
+# The types of the fields that a row may already have, so that the validation would return the value as it is
+PLAIN_TYPES = (str, int, float, bool)
+
+row_checks: Dict[Type[BaseModel], Callable[[Any], bool]] = {}
+
+
+def field_check(field: ModelField) -> Optional[Callable[[Any], bool]]:
+    """Returns a check of the values that the validation of a field would return unchanged. The types have to match
+    exactly, since the validation converts the subclasses, e.g. an int for a float field or a numpy float.
+    :param field: The field of a model
+    :return: The check or None if the field has a type that is always validated
+    """
+    kind = field.type_
+    if isinstance(kind, type) and issubclass(kind, BaseModel):
+        item_check = row_check(kind)
+    elif kind in PLAIN_TYPES:
+        def item_check(value: Any) -> bool:
+            return type(value) is kind
+    else:
+        return None
+
+    if field.shape == SHAPE_SINGLETON:
+        value_check = item_check
+    elif field.shape == SHAPE_LIST:
+        def value_check(value: Any) -> bool:
+            return type(value) is list and all(map(item_check, value))
+    else:
+        return None
+
+    if field.allow_none:
+        return lambda value: value is None or value_check(value)
+    return value_check
+
+
+def row_check(model: Type[BaseModel]) -> Callable[[Any], bool]:
+    """Returns a check of the rows that are already what the validation against a model would return: dicts with
+    exactly the fields of the model, each with a value of the type of its field. The check is built once per model.
+    :param model: The model of the rows
+    :return: The check
+    """
+    if model not in row_checks:
+        fields = [(field.alias, field_check(field)) for field in model.__fields__.values()]
+        names = {name for name, _ in fields}
+        if any(check is None for _, check in fields):
+            row_checks[model] = lambda row: False
+        else:
+            row_checks[model] = lambda row: type(row) is dict and row.keys() == names and \
+                all(check(row[name]) for name, check in fields)
+    return row_checks[model]
+
+
+def validated_rows(rows: List[Any], model: Type[BaseModel]) -> List[Any]:
+    """Validates only the rows that do not already match a model, e.g. the years that Neo4j returns as strings, and
+    keeps the rest as they are
+    :param rows: The rows of a result
+    :param model: The model of the rows
+    :return: The rows as the validation against the model would return them
+    """
+    check = row_check(model)
+    if all(map(check, rows)):
+        return rows
+    return [row if check(row) else model.parse_obj(row).dict(by_alias=True) for row in rows]
+
+
+def dumps(content: Any) -> bytes:
+    """Encodes a value as JSON with orjson
+    :param content: The value
+    :return: The encoded JSON
+    """
+    return orjson.dumps(content)
+
+
+class FastJSONResponse(Response):
+    """A JSON response encoded straight to bytes with orjson"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def serialize(result: List[Any], model: Type[BaseModel]) -> Any:
+    """Returns the result of an endpoint for FastAPI to validate against its response model and encode, or, with
+    FAST_SERIALIZATION, as a response that only validates the rows that do not match the model and is encoded with
+    orjson. FastAPI sends a returned response as it is, while the response model still documents the endpoint.
+    :param result: The rows of the result
+    :param model: The model of the rows, the item of the response model of the endpoint
+    :return: The result or the response
+    """
+    if not settings.FAST_SERIALIZATION:
+        return result
+    return FastJSONResponse(validated_rows(result, model))
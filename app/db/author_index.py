@@ -0,0 +1,168 @@
+import math
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.backends.base import GraphBackend
+from app.core.config import settings
+
+# DBLP tells apart the authors with the same name with a four digit suffix, e.g. "Honggang Zhang 0002"
+HOMONYM_SUFFIX = re.compile(r"\s+\d{4}$")
+SEPARATORS = re.compile(r"[\W_]+")
+# The letters that are not decomposed into a base letter and an accent
+LETTERS = str.maketrans({"ø": "o", "ł": "l", "đ": "d", "ð": "d", "ħ": "h", "ı": "i", "æ": "ae", "œ": "oe",
+                         "þ": "th"})
+# The share of the trigrams of a query that a name needs to have to be a fuzzy match
+MIN_SHARED_TRIGRAMS = 0.5
+
+EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def fold(name: str) -> str:
+    """Folds a name for matching: without accents, in lower case and with single spaces between its words
+    :param name: The name
+    :return: The folded name
+    """
+    decomposed = unicodedata.normalize("NFKD", name.casefold().translate(LETTERS))
+    letters = "".join(character for character in decomposed if not unicodedata.combining(character))
+    return SEPARATORS.sub(" ", letters).strip()
+
+
+def trigrams(key: str) -> List[str]:
+    """Returns the distinct trigrams of a folded name, padded so that the start and the end of the name count too
+    :param key: The folded name
+    :return: The trigrams
+    """
+    padded = f" {key} "
+    return list(dict.fromkeys(padded[it:it + 3] for it in range(len(padded) - 2)))
+
+
+class AuthorIndex:
+    """Finds authors by a part of their name. The homonyms, the names that only differ by their DBLP suffix, are
+    grouped under their folded name, and every group is found by:
+    - the names that start with the query, from a sorted list of the folded names
+    - the names with a word that starts with the query, from a sorted list of the ends of the names from every word
+    - the names that share most of their trigrams with the query, from a posting list of every trigram, when the
+      prefixes find fewer groups than requested
+    """
+
+    def __init__(self, names: List[str], generation: Optional[int] = None):
+        self.generation = generation
+        self.checked = time.monotonic()
+
+        groups: Dict[str, List[str]] = {}
+        for name in names:
+            groups.setdefault(fold(HOMONYM_SUFFIX.sub("", name)), []).append(name)
+        self.keys = sorted(key for key in groups if key)
+        # The name without a suffix comes first, then the homonyms in the order of their suffixes
+        self.authors = [sorted(groups[key], key=lambda name: (HOMONYM_SUFFIX.search(name) is not None, name))
+                        for key in self.keys]
+
+        words = sorted((key[it + 1:], group) for group, key in enumerate(self.keys)
+                       for it, character in enumerate(key) if character == " ")
+        self.words = [word for word, _ in words]
+        self.word_groups = [group for _, group in words]
+
+        postings: Dict[str, List[int]] = {}
+        self.trigram_counts = np.zeros(len(self.keys), dtype=np.int64)
+        for group, key in enumerate(self.keys):
+            key_trigrams = trigrams(key)
+            self.trigram_counts[group] = len(key_trigrams)
+            for trigram in key_trigrams:
+                postings.setdefault(trigram, []).append(group)
+        self.postings = {trigram: np.array(groups, dtype=np.int64) for trigram, groups in postings.items()}
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        """Finds the groups of authors that match a query, best matches first
+        :param query: A part of the name of the authors, in any case and with or without accents
+        :param limit: The number of groups
+        :return: The name and the authors of every group
+        """
+        key = fold(HOMONYM_SUFFIX.sub("", query))
+        if not key:
+            return []
+
+        found = list(dict.fromkeys(self._prefixed(self.keys, range(len(self.keys)), key, limit)))
+        if len(found) < limit:
+            found = list(dict.fromkeys(found + self._prefixed(self.words, self.word_groups, key, limit)))
+        if len(found) < limit:
+            found = list(dict.fromkeys(found + self._similar(key, limit)))
+        return [{"name": HOMONYM_SUFFIX.sub("", self.authors[group][0]), "authors": self.authors[group]}
+                for group in found[:limit]]
+
+    @staticmethod
+    def _prefixed(keys: List[str], groups: Sequence[int], key: str, limit: int) -> List[int]:
+        # The keys are sorted, so the ones that start with the key follow each other, the shortest first
+        found = []
+        for it in range(bisect_left(keys, key), len(keys)):
+            if not keys[it].startswith(key) or len(found) == limit:
+                break
+            found.append(groups[it])
+        return found
+
+    def _similar(self, key: str, limit: int) -> List[int]:
+        # A name that shares enough trigrams with the query shares at least one of its rarest trigrams, so only the
+        # groups of these are candidates
+        key_trigrams = trigrams(key)
+        postings = sorted((self.postings.get(trigram, EMPTY) for trigram in key_trigrams), key=len)
+        needed = max(1, math.ceil(len(key_trigrams) * MIN_SHARED_TRIGRAMS))
+        candidates = np.unique(np.concatenate(postings[:len(postings) - needed + 1]))
+        if not len(candidates):
+            return []
+        shared = np.zeros(len(candidates), dtype=np.int64)
+        for posting in postings:
+            if len(posting):
+                positions = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+                shared += posting[positions] == candidates
+        similar = shared >= needed
+        candidates, shared = candidates[similar], shared[similar]
+        similarity = shared / (len(key_trigrams) + self.trigram_counts[candidates] - shared)
+        return candidates[np.lexsort((candidates, -similarity))][:limit].tolist()
+
+
+author_index: Optional[AuthorIndex] = None
+author_index_lock = Lock()
+author_index_reload_lock = Lock()
+
+
+def get_author_index(backend: GraphBackend) -> AuthorIndex:
+    """Returns the author index of the process, building it on first use from the authors of a backend. It is rebuilt
+    when an import changes the dataset generation, which is checked at most every CACHE_GENERATION_CHECK_INTERVAL
+    seconds, and the previous index keeps answering while the new one builds.
+    :param backend: The backend of the request
+    :return: The index
+    """
+    global author_index
+    with author_index_lock:
+        if author_index is None:
+            author_index = AuthorIndex(backend.author_names(), backend.dataset_generation())
+            return author_index
+
+    index = author_index
+    if time.monotonic() - index.checked <= settings.CACHE_GENERATION_CHECK_INTERVAL:
+        return index
+    if not author_index_reload_lock.acquire(blocking=False):
+        return index
+    try:
+        index.checked = time.monotonic()
+        generation = backend.dataset_generation()
+        if generation != index.generation:
+            author_index = AuthorIndex(backend.author_names(), generation)
+    finally:
+        author_index_reload_lock.release()
+    return author_index
+
+
+def search_authors(backend: GraphBackend, query: str, limit: int) -> List[dict]:
+    """Finds the groups of authors that match a query
+    :param backend: The backend of the request, which the index is built from
+    :param query: A part of the name of the authors
+    :param limit: The number of groups
+    :return: The name and the authors of every group
+    """
+    return get_author_index(backend).search(query, limit)
@@ -1,7 +1,144 @@
+import time
+from threading import BoundedSemaphore, Lock
+from typing import Optional
+
+from fastapi import HTTPException
 from py2neo import Graph
 
 from app.core.config import settings
 
 
+class ConnectionPool:
+    """A single py2neo Graph per process, whose Bolt connection pool is shared by every request. The number of
+    connections that can be in use at the same time is bounded by the pool size, so callers wait for a free connection
+    up to the acquisition timeout instead of blocking forever inside py2neo.
+    """
+
+    def __init__(self, host: str, password: str, max_size: int, max_age: float, acquisition_timeout: float,
+                 liveness_check_timeout: Optional[float] = None):
+        self.graph = Graph(host=host, password=password, max_size=max_size, max_age=max_age)
+        self.max_size = max_size
+        self.acquisition_timeout = acquisition_timeout
+        self.liveness_check_timeout = liveness_check_timeout
+
+        self._slots = BoundedSemaphore(max_size)
+        self._lock = Lock()
+        self._last_used = time.monotonic()
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._liveness_failures = 0
+
+    def acquire(self) -> Graph:
+        """Waits for a free connection and returns the shared graph
+        :return: The graph database
+        """
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.acquisition_timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise HTTPException(status_code=503, detail="No database connection available")
+
+        with self._lock:
+            self._acquisitions += 1
+            self._wait_time += time.monotonic() - started
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            idle = time.monotonic() - self._last_used
+
+        if self.liveness_check_timeout is not None and idle > self.liveness_check_timeout:
+            self._check_liveness()
+        return self.graph
+
+    def release(self) -> None:
+        """Gives back a connection acquired with acquire()
+        :return: None
+        """
+        with self._lock:
+            self._in_use -= 1
+            self._last_used = time.monotonic()
+        self._slots.release()
+
+    def stats(self) -> dict:
+        """Returns the usage statistics of the pool
+        :return: The statistics
+        """
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "connections_in_use": sum(self.graph.service.connector.in_use.values()),
+                "acquisitions": self._acquisitions,
+                "timeouts": self._timeouts,
+                "average_wait_ms": 1000 * self._wait_time / self._acquisitions if self._acquisitions else 0.0,
+                "liveness_failures": self._liveness_failures,
+            }
+
+    def close(self) -> None:
+        """Closes all the connections of the pool
+        :return: None
+        """
+        self.graph.service.connector.close()
+
+    def _check_liveness(self) -> None:
+        # Connections that stayed idle for long may have been dropped by the server or a firewall, in which case the
+        # free connections are discarded and new ones are opened on the next query
+        try:
+            self.graph.run("RETURN 1").evaluate()
+        except Exception:
+            with self._lock:
+                self._liveness_failures += 1
+            connector = self.graph.service.connector
+            for profile in list(connector.in_use):
+                connector.prune(profile)
+
+
+pool: Optional[ConnectionPool] = None
+pool_lock = Lock()
+
+
+def uses_database() -> bool:
+    """Tells whether the query backend of QUERY_BACKEND reads the database through the connection pool, which the
+    SQLite store and the NumPy snapshot of NUMPY_SNAPSHOT_PATH do not
+    :return: Whether the pool is used
+    """
+    if settings.QUERY_BACKEND == "sqlite":
+        return False
+    return not (settings.QUERY_BACKEND == "numpy" and settings.NUMPY_SNAPSHOT_PATH)
+
+
+def connect() -> ConnectionPool:
+    """Creates the connection pool of the process, if it does not exist yet
+    :return: The connection pool
+    """
+    global pool
+    with pool_lock:
+        if pool is None:
+            pool = ConnectionPool(host=settings.DB_HOST, password=settings.DB_PASSWORD,
+                                  max_size=settings.DB_POOL_MAX_SIZE, max_age=settings.DB_POOL_MAX_AGE,
+                                  acquisition_timeout=settings.DB_POOL_ACQUISITION_TIMEOUT,
+                                  liveness_check_timeout=settings.DB_POOL_LIVENESS_CHECK_TIMEOUT)
+        return pool
+
+
+def disconnect() -> None:
+    """Closes the connection pool of the process
+    :return: None
+    """
+    global pool
+    with pool_lock:
+        if pool is not None:
+            pool.close()
+            pool = None
+
+
 def get_db():
-    yield Graph(host=settings.DB_HOST, password=settings.DB_PASSWORD)
+    db_pool = connect()
+    graph = db_pool.acquire()
+    try:
+        yield graph
+    finally:
+        db_pool.release()
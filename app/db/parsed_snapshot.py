@@ -0,0 +1,370 @@
+import copy
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Bumped whenever the layout of the files or the extracted data change, so that older snapshots are not read
+SNAPSHOT_VERSION = 3
+MANIFEST_FILE = "manifest.json"
+
+# Marks the pages of a contribution as missing in the page columns
+MISSING_PAGES = -1
+# The positions of a contributing author in the position column
+FIRST_AUTHOR = 1
+LAST_AUTHOR = 2
+# The labels of the publication and the venue nodes of the records, in the order of the label column of the records
+PUBLICATION_VENUE_LABELS = [("Article", "Journal"), ("Inproceedings", "Conference"), ("Incollection", "Book")]
+AUTHOR_LABEL = "Author"
+
+
+def file_digest(path: str) -> str:
+    """Returns the SHA-256 of the content of a file, read in chunks
+    :param path: The path of the file
+    :return: The hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_key(source: str, options: dict) -> str:
+    """Returns the key of the snapshot of a source file, which changes along with the content of the file, the options
+    that change the extracted data and the snapshot version
+    :param source: The path of the source file
+    :param options: The options of the import, JSON serializable
+    :return: The key
+    """
+    digest = hashlib.sha256(f"{SNAPSHOT_VERSION}\n{file_digest(source)}\n".encode())
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    return digest.hexdigest()[:32]
+
+
+def relationships_name(rel_type: str, start_label: str, end_label: str) -> str:
+    """Returns the name of the files of the relationships of a type between two labels
+    :param rel_type: The type of the relationships
+    :param start_label: The label of the start nodes
+    :param end_label: The label of the end nodes
+    :return: The name
+    """
+    return f"{rel_type}-{start_label}-{end_label}"
+
+
+class StringColumn:
+    """A column of strings stored as their concatenated UTF-8 bytes along with the offset that every string starts at,
+    read through memory mapping. A string is only decoded when it is accessed.
+    """
+
+    def __init__(self, path: str):
+        offsets = np.load(f"{path}.offsets.npy", mmap_mode="r")
+        self.starts = offsets[:-1]
+        self.ends = offsets[1:]
+        if os.path.getsize(f"{path}.bin"):
+            with open(f"{path}.bin", "rb") as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # Empty files cannot be memory mapped
+            self.data = b""
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, it: int) -> str:
+        return self.data[int(self.starts[it]):int(self.ends[it])].decode("utf-8", "surrogatepass")
+
+    def __iter__(self) -> Iterator[str]:
+        for start, end in zip(self.starts.tolist(), self.ends.tolist()):
+            yield self.data[start:end].decode("utf-8", "surrogatepass")
+
+    def select(self, ids: np.ndarray) -> "StringColumn":
+        """Returns the column of some of the strings, which shares the memory mapped bytes of this one
+        :param ids: The positions of the strings, in their new order
+        :return: The column
+        """
+        column = copy.copy(self)
+        column.starts = self.starts[ids]
+        column.ends = self.ends[ids]
+        return column
+
+    def integers(self, missing: int = -1) -> np.ndarray:
+        """Parses all the strings as non-negative decimal integers at once from their bytes, e.g. the years
+        :param missing: The value of the strings that are not such an integer
+        :return: The integers
+        """
+        lengths = self.ends - self.starts
+        strings = np.repeat(np.arange(len(self)), lengths)
+        # The position in the bytes of the column of every byte of the strings
+        positions = np.arange(len(strings)) + np.repeat(self.starts - (np.cumsum(lengths) - lengths), lengths)
+        digits = np.frombuffer(self.data, dtype=np.uint8)[positions].astype(np.int64) - ord("0")
+        # The power of ten of every digit is the number of digits after it in its string
+        powers = self.ends[strings] - 1 - positions
+        values = np.bincount(strings, weights=digits * 10 ** powers, minlength=len(self)).astype(np.int64)
+        invalid = np.bincount(strings, weights=(digits < 0) | (digits > 9), minlength=len(self)) > 0
+        # Longer strings would overflow or lose precision in the float weights
+        return np.where(invalid | (lengths == 0) | (lengths > 15), missing, values)
+
+    @staticmethod
+    def write(path: str, values: Iterable[str]) -> int:
+        """Writes a column of strings
+        :param path: The path of the files without their extension
+        :param values: The strings
+        :return: The number of strings
+        """
+        offsets = array("q", [0])
+        with open(f"{path}.bin", "wb") as f:
+            for value in values:
+                encoded = value.encode("utf-8", "surrogatepass")
+                f.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+        np.save(f"{path}.offsets.npy", np.frombuffer(offsets, dtype=np.int64))
+        return len(offsets) - 1
+
+
+class KeyColumn:
+    """The keys of the nodes of a label: the values of their only key field, or tuples of the values of their key
+    fields
+    """
+
+    def __init__(self, columns: List[StringColumn]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def __getitem__(self, it: int) -> Union[str, tuple]:
+        if len(self.columns) == 1:
+            return self.columns[0][it]
+        return tuple(column[it] for column in self.columns)
+
+    def __iter__(self) -> Iterator[Union[str, tuple]]:
+        if len(self.columns) == 1:
+            return iter(self.columns[0])
+        return zip(*self.columns)
+
+
+class SnapshotWriter:
+    """Writes a snapshot to a temporary directory that is renamed to its final path once it is complete, so that an
+    interrupted write never leaves a snapshot that looks valid
+    """
+
+    def __init__(self, path: str, source: str, options: dict):
+        self.path = path
+        self.temporary_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(self.temporary_path, ignore_errors=True)
+        os.makedirs(self.temporary_path)
+        self.manifest = {"version": SNAPSHOT_VERSION, "source": os.path.abspath(source), "options": options,
+                         "created": time.time(), "nodes": {}, "relationships": {}, "records": {}}
+
+    def write_nodes(self, label: str, fields: Tuple[str, ...], keys: List, properties: Dict[int, dict]) -> None:
+        """Writes the nodes of a label
+        :param label: The label of the nodes
+        :param fields: The key fields of the nodes
+        :param keys: The key of every node, a tuple if there are multiple key fields
+        :param properties: The rest of the properties of the nodes that have any, by node id
+        :return: None
+        """
+        for it, field in enumerate(fields):
+            values = keys if len(fields) == 1 else (key[it] for key in keys)
+            StringColumn.write(os.path.join(self.temporary_path, f"{label}.{field}"), values)
+        with open(os.path.join(self.temporary_path, f"{label}.properties.json"), "w") as f:
+            json.dump(properties, f)
+        self.manifest["nodes"][label] = {"fields": list(fields), "count": len(keys)}
+
+    def write_relationships(self, name: str, columns: Dict[str, array]) -> None:
+        """Writes the columns of a set of relationships
+        :param name: The name of the relationships, see relationships_name
+        :param columns: The arrays of the columns by their name
+        :return: None
+        """
+        for column, values in columns.items():
+            np.save(os.path.join(self.temporary_path, f"{name}.{column}.npy"),
+                    np.frombuffer(values, dtype=np.dtype(values.typecode)))
+        self.manifest["relationships"][name] = {"columns": list(columns),
+                                                "count": len(next(iter(columns.values())))}
+
+    def write_records(self, columns: Dict[str, array]) -> None:
+        """Writes the columns of the parsed records, in the order they were parsed
+        :param columns: The arrays of the columns by their name, see SnapshotWindow
+        :return: None
+        """
+        for column, values in columns.items():
+            np.save(os.path.join(self.temporary_path, f"records.{column}.npy"),
+                    np.frombuffer(values, dtype=np.dtype(values.typecode)))
+        self.manifest["records"] = {"columns": list(columns), "count": len(next(iter(columns.values())))}
+
+    def close(self) -> None:
+        """Writes the manifest and moves the snapshot to its path, replacing any previous snapshot with the same key
+        :return: None
+        """
+        with open(os.path.join(self.temporary_path, MANIFEST_FILE), "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.rename(self.temporary_path, self.path)
+
+    def abort(self) -> None:
+        """Removes the partially written snapshot
+        :return: None
+        """
+        shutil.rmtree(self.temporary_path, ignore_errors=True)
+
+
+class ParsedSnapshot:
+    """A snapshot of the parsed dump written by `data_import.py -snapshot`. The columns are memory mapped, so only
+    the pages that are accessed are read from the disk.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        if self.manifest["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Snapshot {path} has version {self.manifest['version']} instead of {SNAPSHOT_VERSION}")
+        self.path = path
+
+    @staticmethod
+    def find(path: str) -> Optional["ParsedSnapshot"]:
+        """Opens the snapshot of a path if a complete one exists
+        :param path: The path of the snapshot
+        :return: The snapshot or None
+        """
+        if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            return None
+        return ParsedSnapshot(path)
+
+    def nodes(self, label: str) -> Tuple[KeyColumn, Dict[int, dict]]:
+        """Reads the nodes of a label
+        :param label: The label of the nodes
+        :return: The keys of the nodes, by node id, and the rest of their properties for the nodes that have any
+        """
+        fields = self.manifest["nodes"][label]["fields"]
+        keys = KeyColumn([StringColumn(os.path.join(self.path, f"{label}.{field}")) for field in fields])
+        with open(os.path.join(self.path, f"{label}.properties.json")) as f:
+            properties = {int(node_id): node_properties for node_id, node_properties in json.load(f).items()}
+        return keys, properties
+
+    def column(self, label: str, field: str) -> StringColumn:
+        """Reads a key field of the nodes of a label, without their other properties
+        :param label: The label of the nodes
+        :param field: The key field
+        :return: The values of the field, by node id
+        """
+        if field not in self.manifest["nodes"][label]["fields"]:
+            raise KeyError(f"{label} nodes have no key field {field}")
+        return StringColumn(os.path.join(self.path, f"{label}.{field}"))
+
+    def relationships(self, name: str) -> Dict[str, np.ndarray]:
+        """Reads the columns of a set of relationships
+        :param name: The name of the relationships, see relationships_name
+        :return: The memory mapped arrays of the columns by their name
+        """
+        return {column: np.load(os.path.join(self.path, f"{name}.{column}.npy"), mmap_mode="r")
+                for column in self.manifest["relationships"][name]["columns"]}
+
+    def records(self) -> Dict[str, np.ndarray]:
+        """Reads the columns of the parsed records
+        :return: The memory mapped arrays of the columns by their name
+        """
+        return {column: np.load(os.path.join(self.path, f"records.{column}.npy"), mmap_mode="r")
+                for column in self.manifest["records"]["columns"]}
+
+    def window(self, start_year: int, end_year: int) -> "ParsedSnapshot":
+        """Selects the records of a year window, since the snapshot holds the records of all the years
+        :param start_year: The first year of the selected records
+        :param end_year: The last year of the selected records
+        :return: The snapshot of the selected records, this one if it has no records outside of the window
+        """
+        years = self.records()["years"]
+        if len(years) and start_year <= years.min() and years.max() <= end_year:
+            return self
+        return SnapshotWindow(self, start_year, end_year)
+
+
+def first_seen(ids: np.ndarray) -> np.ndarray:
+    """Returns the distinct ids in the order they first appear
+    :param ids: The ids
+    :return: The distinct ids
+    """
+    distinct, first = np.unique(ids, return_index=True)
+    return distinct[np.argsort(first)]
+
+
+class SnapshotWindow(ParsedSnapshot):
+    """The records of a year window of a snapshot. The nodes of every label are numbered in the order they are first
+    seen in the selected records and the relationships keep the order of their records, so the window holds the same
+    data as a parse of the input file limited to the window. The records columns of the snapshot are their label, as
+    the index in PUBLICATION_VENUE_LABELS, the id of their publication, their year and their number of authors.
+    """
+
+    def __init__(self, snapshot: ParsedSnapshot, start_year: int, end_year: int):
+        """
+        :param snapshot: The snapshot of the records of all the years
+        :param start_year: The first year of the selected records
+        :param end_year: The last year of the selected records
+        """
+        self.manifest = snapshot.manifest
+        self.path = snapshot.path
+        self.snapshot = snapshot
+        # The ids in the snapshot of the selected nodes by their new id, and their new id by their id in the snapshot
+        self.node_ids: Dict[str, np.ndarray] = {}
+        self.new_ids: Dict[str, np.ndarray] = {}
+        # The selected rows of every set of relationships, along with the labels of their start and end nodes
+        self.rows: Dict[str, Tuple[np.ndarray, str, str]] = {}
+
+        records = snapshot.records()
+        selected = (records["years"] >= start_year) & (records["years"] <= end_year)
+        self.records_count = int(np.count_nonzero(selected))
+        contribution_records = []
+        contribution_authors = []
+        for it, (publication_label, venue_label) in enumerate(PUBLICATION_VENUE_LABELS):
+            label_records = np.flatnonzero(records["labels"] == it)
+            label_selected = selected[label_records]
+            authors_counts = records["authors"][label_records]
+
+            published = relationships_name("PUBLISHED", publication_label, venue_label)
+            self.rows[published] = (np.flatnonzero(label_selected), publication_label, venue_label)
+            contributed = relationships_name("CONTRIBUTED", AUTHOR_LABEL, publication_label)
+            contribution_rows = np.flatnonzero(np.repeat(label_selected, authors_counts))
+            self.rows[contributed] = (contribution_rows, AUTHOR_LABEL, publication_label)
+
+            self.select(publication_label, first_seen(records["publication_ids"][label_records[label_selected]]))
+            self.select(venue_label, first_seen(snapshot.relationships(published)["end_ids"][label_selected]))
+            contribution_records.append(np.repeat(label_records, authors_counts)[contribution_rows])
+            contribution_authors.append(snapshot.relationships(contributed)["start_ids"][contribution_rows])
+
+        # The authors are seen across the records of all the labels
+        order = np.argsort(np.concatenate(contribution_records), kind="stable")
+        self.select(AUTHOR_LABEL, first_seen(np.concatenate(contribution_authors)[order]))
+
+    def select(self, label: str, ids: np.ndarray) -> None:
+        """Selects the nodes of a label
+        :param label: The label of the nodes
+        :param ids: The ids in the snapshot of the selected nodes, in their new order
+        :return: None
+        """
+        self.node_ids[label] = ids
+        self.new_ids[label] = np.full(self.manifest["nodes"][label]["count"], -1, dtype=np.int32)
+        self.new_ids[label][ids] = np.arange(len(ids), dtype=np.int32)
+
+    def nodes(self, label: str) -> Tuple[KeyColumn, Dict[int, dict]]:
+        keys, properties = self.snapshot.nodes(label)
+        new_ids = self.new_ids[label]
+        return KeyColumn([column.select(self.node_ids[label]) for column in keys.columns]), \
+            {int(new_ids[node_id]): node_properties for node_id, node_properties in properties.items()
+             if new_ids[node_id] >= 0}
+
+    def column(self, label: str, field: str) -> StringColumn:
+        return self.snapshot.column(label, field).select(self.node_ids[label])
+
+    def relationships(self, name: str) -> Dict[str, np.ndarray]:
+        rows, start_label, end_label = self.rows[name]
+        columns = {column: values[rows] for column, values in self.snapshot.relationships(name).items()}
+        columns["start_ids"] = self.new_ids[start_label][columns["start_ids"]]
+        columns["end_ids"] = self.new_ids[end_label][columns["end_ids"]]
+        return columns
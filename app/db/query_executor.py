@@ -0,0 +1,118 @@
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import current_request, record_query
+
+# Cheap lookups anchored on a single author or journal
+LOOKUP = "lookup"
+# Aggregations over the whole graph
+ANALYTICS = "analytics"
+
+logger = logging.getLogger(__name__)
+
+executors: Dict[str, ThreadPoolExecutor] = {}
+executors_lock = Lock()
+
+
+def get_executor(query_class: str) -> ThreadPoolExecutor:
+    """Returns the thread pool that runs the queries of a class, creating it on first use. Every class has its own
+    pool, sized by its concurrency limit, so slow analytics queue up behind each other instead of taking the threads
+    of the cheap lookups.
+    :param query_class: The class of the query, LOOKUP or ANALYTICS
+    :return: The thread pool of the class
+    """
+    with executors_lock:
+        if query_class not in executors:
+            max_workers = settings.QUERY_CONCURRENCY_LOOKUP if query_class == LOOKUP \
+                else settings.QUERY_CONCURRENCY_ANALYTICS
+            executors[query_class] = ThreadPoolExecutor(max_workers=max_workers,
+                                                        thread_name_prefix=f"query-{query_class}")
+        return executors[query_class]
+
+
+async def run_backend_query(method: Callable[..., List[dict]], parameters: Optional[dict] = None,
+                            query_class: str = LOOKUP) -> List[dict]:
+    """Runs a query method of a backend without blocking the event loop
+    :param method: The query method of the backend
+    :param parameters: The parameters of the query
+    :param query_class: The class of the query, LOOKUP or ANALYTICS
+    :return: The records of the result
+    """
+    loop = asyncio.get_running_loop()
+    # The query runs in the context of the request, so that the backend can attach a profile to its metrics
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+    started = None
+
+    def run() -> List[dict]:
+        nonlocal started
+        started = time.perf_counter()
+        return context.run(method, **(parameters or {}))
+
+    result = await loop.run_in_executor(get_executor(query_class), run)
+    finished = time.perf_counter()
+    queue_seconds, db_seconds = started - submitted, finished - started
+    record_query(queue_seconds, db_seconds, len(result), finished)
+
+    if settings.SLOW_QUERY_SECONDS is not None and queue_seconds + db_seconds > settings.SLOW_QUERY_SECONDS:
+        record = current_request.get()
+        profile = record.profile if record is not None else None
+        logger.warning("Slow %s query %s(%s): %.2f s in the backend after %.2f s in the queue, %d rows%s",
+                       query_class, method.__name__, parameters or {}, db_seconds, queue_seconds, len(result),
+                       f", profile: {profile}" if profile else "")
+    return result
+
+
+async def stream_backend_query(method: Callable[..., Iterator[dict]], parameters: Optional[dict] = None,
+                               query_class: str = LOOKUP) -> AsyncIterator[List[dict]]:
+    """Runs a streaming query method of a backend without blocking the event loop, a chunk of rows at a time, so that
+    the rows are written while the rest are still read and only a chunk is kept in memory
+    :param method: The streaming query method of the backend
+    :param parameters: The parameters of the query
+    :param query_class: The class of the query, LOOKUP or ANALYTICS
+    :return: The chunks of rows of the result
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor(query_class)
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+    started = None
+    db_seconds = 0.0
+    rows = 0
+
+    def next_chunk(iterator: Iterator[dict]) -> List[dict]:
+        nonlocal started
+        if started is None:
+            started = time.perf_counter()
+        return context.run(list, islice(iterator, settings.STREAM_CHUNK_ROWS))
+
+    iterator = iter(method(**(parameters or {})))
+    try:
+        while True:
+            chunk_started = time.perf_counter()
+            chunk = await loop.run_in_executor(executor, next_chunk, iterator)
+            db_seconds += time.perf_counter() - max(chunk_started, started)
+            if not chunk:
+                break
+            rows += len(chunk)
+            yield chunk
+    finally:
+        if started is not None:
+            record_query(started - submitted, db_seconds, rows, time.perf_counter())
+
+
+def shutdown_executors() -> None:
+    """Stops the thread pools of all query classes
+    :return: None
+    """
+    with executors_lock:
+        for executor in executors.values():
+            executor.shutdown(wait=False)
+        executors.clear()
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional
+
+import redis
+
+from app.core.config import settings
+
+GENERATION_QUERY = "MATCH (g:DatasetGeneration) RETURN g.generation AS generation"
+
+
+class MemoryCache:
+    """In-process cache of query results with LRU eviction once it holds max_entries results and expiry of the
+    results that are older than ttl seconds
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached result of a key, or None if it is missing or has expired
+        :param key: The key of the result
+        :return: The cached result
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Caches the result of a key, evicting the least recently used results if the cache is full
+        :param key: The key of the result
+        :param value: The result
+        :return: None
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drops all cached results
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache:
+    """Cache of query results shared by all API processes through Redis. Redis takes care of the expiry and, when
+    configured with an LRU maxmemory-policy, of the eviction. The keys are prefixed with the dataset generation, so the
+    results of previous imports are never read again and simply expire.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, ttl: Optional[float] = None):
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = "dblp:"
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(self.ttl) if self.ttl else None)
+
+    def clear(self) -> None:
+        # Entries of other generations are left to expire, since other processes may still use the same generation
+        pass
+
+    def size(self) -> int:
+        return self.client.dbsize()
+
+
+class ResultCache:
+    """Caches the results of the queries until the dataset changes. Every import bumps the generation of the
+    DatasetGeneration node, which is checked at most every CACHE_GENERATION_CHECK_INTERVAL seconds, and all results of
+    the previous generation are dropped when it changes.
+    """
+
+    def __init__(self):
+        if settings.CACHE_REDIS_URL:
+            self.store = RedisCache(settings.CACHE_REDIS_URL, settings.CACHE_TTL)
+        else:
+            self.store = MemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL)
+        self.generation = None
+        self._checked = None
+
+    def needs_generation_check(self) -> bool:
+        """Returns whether the dataset generation should be checked again
+        :return: Whether the generation should be checked
+        """
+        return self._checked is None or time.monotonic() - self._checked > settings.CACHE_GENERATION_CHECK_INTERVAL
+
+    def update_generation(self, generation: Optional[int]) -> None:
+        """Sets the current dataset generation, dropping the cached results if it has changed
+        :param generation: The generation of the DatasetGeneration node
+        :return: None
+        """
+        self._checked = time.monotonic()
+        if generation != self.generation:
+            self.store.clear()
+            self.generation = generation
+            if isinstance(self.store, RedisCache):
+                self.store.prefix = f"dblp:{generation}:"
+
+    def key(self, query: str, parameters: Optional[dict]) -> str:
+        """Returns the cache key of a query
+        :param query: The Cypher query, which identifies the endpoint and its variant
+        :param parameters: The parameters of the query
+        :return: The cache key
+        """
+        return hashlib.sha1(json.dumps([query, parameters or {}], sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.store.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.store.set(key, value)
+
+    def stats(self) -> dict:
+        """Returns the usage statistics of the cache
+        :return: The statistics
+        """
+        return {
+            "backend": self.store.backend,
+            "generation": self.generation,
+            "entries": self.store.size(),
+            "hits": self.store.hits,
+            "misses": self.store.misses,
+            "evictions": self.store.evictions,
+        }
+
+
+result_cache: Optional[ResultCache] = ResultCache() if settings.CACHE_ENABLED else None
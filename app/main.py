@@ -1,9 +1,18 @@
+import logging
+
 import uvicorn
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.backends.neo4j_backend import Neo4jBackend
+from app.backends.numpy_backend import get_numpy_backend
+from app.backends.sqlite_backend import get_sqlite_backend
+from app.db.author_index import get_author_index
+from app.db.db_connection import connect, disconnect
+from app.db.query_executor import shutdown_executors
 
 
 app = FastAPI(
@@ -19,9 +28,42 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Query-Profile"],
     )
 
+app.add_middleware(MetricsMiddleware)
+
+# The slow query log and the sampled query profiles, next to the logs of uvicorn
+logger = logging.getLogger("app")
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s - %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+
+@app.on_event("startup")
+def startup() -> None:
+    if settings.QUERY_BACKEND == "sqlite":
+        get_author_index(get_sqlite_backend())
+        return
+    if settings.QUERY_BACKEND == "numpy" and settings.NUMPY_SNAPSHOT_PATH:
+        get_author_index(get_numpy_backend())
+        return
+    db_pool = connect()
+    if settings.QUERY_BACKEND == "numpy":
+        get_author_index(get_numpy_backend(db_pool.graph))
+    else:
+        get_author_index(Neo4jBackend(db_pool.graph))
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    shutdown_executors()
+    disconnect()
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 
 
 class NameCount(BaseModel):
@@ -47,3 +47,80 @@ class TitleYear(BaseModel):
 
 class TotalPages(BaseModel):
     total_pages: int
+
+
+class AuthorYear(BaseModel):
+    author: str
+    year: str
+
+
+class AuthorsBatch(BaseModel):
+    authors: List[str]
+
+
+class AuthorYearsBatch(BaseModel):
+    lookups: List[AuthorYear]
+
+
+class AuthorTitleYears(BaseModel):
+    author: str
+    result: List[TitleYear]
+
+
+class AuthorYearNameCounts(BaseModel):
+    author: str
+    year: str
+    result: List[NameCount]
+
+
+class AuthorYearTotalPages(BaseModel):
+    author: str
+    year: str
+    result: List[TotalPages]
+
+
+class AuthorMatch(BaseModel):
+    name: str
+    authors: List[str]
+
+
+class PoolStats(BaseModel):
+    max_size: int
+    in_use: int
+    peak_in_use: int
+    connections_in_use: int
+    acquisitions: int
+    timeouts: int
+    average_wait_ms: float
+    liveness_failures: int
+
+
+class CacheStats(BaseModel):
+    backend: str
+    generation: Optional[int]
+    entries: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class HistogramStats(BaseModel):
+    count: int
+    sum: float
+    p50: Optional[float]
+    p95: Optional[float]
+    p99: Optional[float]
+    buckets: Dict[str, int]
+
+
+class RouteMetrics(BaseModel):
+    requests: int
+    errors: int
+    in_flight: int
+    latency_seconds: HistogramStats
+    queue_seconds: HistogramStats
+    db_seconds: HistogramStats
+    serialization_seconds: HistogramStats
+    queries: int
+    rows: int
+    bytes: int
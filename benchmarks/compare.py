@@ -0,0 +1,75 @@
+import json
+
+from argparse import ArgumentParser
+from typing import Dict, Iterator, Tuple
+
+parser = ArgumentParser(description="Compares two benchmark reports, e.g. of two commits")
+parser.add_argument("baseline", help="The JSON report of the baseline")
+parser.add_argument("candidate", help="The JSON report to compare with the baseline")
+parser.add_argument("-threshold", type=float, default=0.1,
+                    help="The relative change that is flagged as a regression or an improvement")
+
+# The fields that identify a measurement of every benchmark
+KEYS = {
+    "import": ("stage", "parser", "workers"),
+    "load_test": ("endpoint", "concurrency"),
+    "serialization": ("model", "rows", "typed"),
+}
+# The metrics that are better when they are higher, all the others are better when they are lower
+HIGHER_IS_BETTER = ("records_per_s", "mb_per_s", "compressed_mb_per_s", "requests_per_s", "speedup")
+# The fields that describe a measurement instead of measuring something
+SETTINGS = ("workers", "concurrency", "parameters", "requests", "rows")
+
+
+def metrics(result: dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yields the numeric metrics of a measurement, flattening the nested ones like latency_ms.p99
+    :param result: The measurement
+    :param prefix: The prefix of the nested metrics
+    :return: The name and the value of every metric
+    """
+    for name, value in result.items():
+        if name in SETTINGS:
+            continue
+        if isinstance(value, dict):
+            yield from metrics(value, f"{prefix}{name}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{name}", value
+
+
+def index(report: dict) -> Dict[tuple, dict]:
+    """Returns the measurements of a report by their identifying fields
+    :param report: The benchmark report
+    :return: The measurements by key
+    """
+    keys = KEYS[report["benchmark"]]
+    return {tuple(result.get(key) for key in keys): result for result in report["results"]}
+
+
+def main() -> None:
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["benchmark"] != candidate["benchmark"]:
+        raise ValueError(f"Cannot compare a {baseline['benchmark']} report with a {candidate['benchmark']} report")
+
+    print(f"{baseline['benchmark']}: {baseline['commit']} -> {candidate['commit']}")
+    baseline_results = index(baseline)
+    for key, result in index(candidate).items():
+        if key not in baseline_results:
+            continue
+        baseline_metrics = dict(metrics(baseline_results[key]))
+        for name, value in metrics(result):
+            previous = baseline_metrics.get(name)
+            if not previous:
+                continue
+            change = (value - previous) / previous
+            better = change > 0 if name.split(".")[-1] in HIGHER_IS_BETTER else change < 0
+            flag = "" if abs(change) < args.threshold else " improved" if better else " REGRESSED"
+            print(f"{' '.join(str(part) for part in key if part is not None)} {name}: {previous:.4g} -> "
+                  f"{value:.4g} ({change:+.1%}){flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import gzip
+import os
+import time
+
+from argparse import ArgumentParser
+from typing import Iterator, List, TextIO
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+parser = ArgumentParser(description="Generates a synthetic dblp.xml.gz file with power-law distributed authors, "
+                                    "co-authors, venues and years")
+parser.add_argument("-o", default="synthetic-dblp.xml.gz", help="The xml.gz file to write")
+parser.add_argument("-records", type=int, default=100000, help="The number of records")
+parser.add_argument("-authors", type=int, help="The number of distinct authors, half the records by default")
+parser.add_argument("-venues", type=int, help="The number of journals, conferences and books of each kind, a record "
+                                               "per 200 by default")
+parser.add_argument("-start_year", type=int, default=2000, help="The year of the oldest records")
+parser.add_argument("-end_year", type=int, default=2020, help="The year of the newest records")
+parser.add_argument("-author_exponent", type=float, default=0.6,
+                    help="The exponent of the power-law that ranks the productivity of the authors, where the default "
+                         "gives the most productive author a few hundred times the average number of publications, "
+                         "as in DBLP")
+parser.add_argument("-venue_exponent", type=float, default=1.0,
+                    help="The exponent of the power-law that ranks the popularity of the venues")
+parser.add_argument("-growth", type=float, default=1.08, help="The yearly growth of the number of publications")
+parser.add_argument("-seed", type=int, default=0, help="The seed of the random generator, for reproducible files")
+
+# Most DBLP records are journal articles and conference papers, while the other kinds are skipped by the import
+RECORD_TYPES = ["article", "inproceedings", "incollection", "proceedings", "phdthesis", "www"]
+RECORD_TYPE_WEIGHTS = [0.40, 0.48, 0.04, 0.03, 0.01, 0.04]
+# The number of authors of a record follows a power-law too, up to the large collaborations
+MAX_CO_AUTHORS = 100
+CO_AUTHORS_EXPONENT = 2.2
+# Records without pages or with roman numbered pages, which the import treats differently
+MISSING_PAGES_RATE = 0.05
+ROMAN_PAGES_RATE = 0.01
+CHUNK_SIZE = 10000
+
+FIRST_NAMES = ["Wei", "Maria", "John", "Anna", "Jiawei", "Andreas", "Yuki", "Sanjay", "Elena", "Michael", "Li",
+               "J&uuml;rgen", "Fran&ccedil;ois", "Jos&eacute;", "S&oslash;ren", "Bj&ouml;rn", "Ana", "Hiroshi",
+               "Ahmed", "Sofia", "David", "Chen", "Olga", "Pedro", "Nikos", "Ingrid", "Rahul", "Fatima"]
+LAST_NAMES = ["Zhang", "Wang", "M&uuml;ller", "Smith", "Garc&iacute;a", "Kim", "Nguyen", "Rossi", "Papadopoulos",
+              "Tanaka", "Kumar", "Schmidt", "Ivanova", "Silva", "Andersson", "Dubois", "Cohen", "Yilmaz", "Novak",
+              "Kowalski", "Jensen", "Chen", "Liu", "Ali", "Martin", "Fischer", "Costa", "Sato", "Lee", "Br&auml;uer"]
+TITLE_WORDS = ["Efficient", "Scalable", "Learning", "Graph", "Query", "Processing", "Neural", "Networks", "Towards",
+               "Distributed", "Systems", "Analysis", "Optimization", "Robust", "Models", "Data", "Streams", "Secure",
+               "Adaptive", "Algorithms", "Approximate", "Index", "Structures", "Semantic", "Web", "Mining", "Privacy"]
+# The entities of the names above, as the DTD of DBLP defines them
+ENTITIES = {"auml": 228, "ccedil": 231, "eacute": 233, "iacute": 237, "oslash": 248, "ouml": 246, "uuml": 252}
+
+
+def power_law_weights(count: int, exponent: float) -> np.ndarray:
+    """Returns the probabilities of the ranks 1..count of a power-law (Zipf) distribution
+    :param count: The number of ranks
+    :param exponent: The exponent of the distribution
+    :return: The normalized probabilities
+    """
+    weights = np.arange(1, count + 1, dtype=np.float64) ** -exponent
+    return weights / weights.sum()
+
+
+def author_names(count: int, rng: np.random.Generator) -> List[str]:
+    """Returns distinct author names, numbering the homonyms the way DBLP does, e.g. "Wei Wang 0002"
+    :param count: The number of names
+    :param rng: The random generator
+    :return: The names
+    """
+    first = rng.integers(len(FIRST_NAMES), size=count)
+    last = rng.integers(len(LAST_NAMES), size=count)
+    seen = {}
+    names = []
+    for it in range(count):
+        name = f"{FIRST_NAMES[first[it]]} {LAST_NAMES[last[it]]}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name} {seen[name]:04d}")
+    return names
+
+
+def generate_records(args, rng: np.random.Generator) -> Iterator[str]:
+    """Generates the XML of the records, a chunk of records at a time so that the memory usage stays bounded
+    :param args: The command line arguments
+    :param rng: The random generator
+    :return: The XML of every record
+    """
+    authors_count = args.authors or max(args.records // 2, 10)
+    venues_count = args.venues or max(args.records // 200, 10)
+    names = author_names(authors_count, rng)
+    author_weights = power_law_weights(authors_count, args.author_exponent)
+    venue_weights = power_law_weights(venues_count, args.venue_exponent)
+    co_author_weights = power_law_weights(MAX_CO_AUTHORS, CO_AUTHORS_EXPONENT)
+    years = np.arange(args.start_year, args.end_year + 1)
+    year_weights = args.growth ** (years - args.start_year)
+    year_weights = year_weights / year_weights.sum()
+
+    for start in range(0, args.records, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, args.records - start)
+        types = rng.choice(len(RECORD_TYPES), size=size, p=RECORD_TYPE_WEIGHTS)
+        record_years = rng.choice(years, size=size, p=year_weights)
+        venues = rng.choice(venues_count, size=size, p=venue_weights)
+        co_authors = rng.choice(MAX_CO_AUTHORS, size=size, p=co_author_weights) + 1
+        record_authors = rng.choice(authors_count, size=int(co_authors.sum()), p=author_weights)
+        offsets = np.concatenate(([0], np.cumsum(co_authors)))
+        start_pages = rng.integers(1, 1000, size=size)
+        page_counts = rng.zipf(1.8, size=size).clip(max=80)
+        pages_kind = rng.random(size=size)
+        title_words = rng.integers(len(TITLE_WORDS), size=(size, 4))
+
+        for it in range(size):
+            key = start + it
+            tag = RECORD_TYPES[types[it]]
+            # The same author never appears twice in the author list of a record
+            authors = dict.fromkeys(record_authors[offsets[it]:offsets[it + 1]])
+            lines = [f'<{tag} mdate="2021-01-{key % 28 + 1:02d}" key="{tag}/synthetic/{key}">']
+            lines += [f"<author>{names[author]}</author>" for author in authors]
+            title = " ".join(TITLE_WORDS[word] for word in title_words[it])
+            lines.append(f"<title>{escape(title)} {key}.</title>")
+            if pages_kind[it] < ROMAN_PAGES_RATE:
+                lines.append("<pages>i-xiv</pages>")
+            elif pages_kind[it] >= ROMAN_PAGES_RATE + MISSING_PAGES_RATE:
+                lines.append(f"<pages>{start_pages[it]}-{start_pages[it] + page_counts[it] - 1}</pages>")
+            lines.append(f"<year>{record_years[it]}</year>")
+            if tag == "article":
+                lines.append(f"<journal>Synthetic Journal {venues[it]}</journal>")
+            elif tag == "inproceedings":
+                lines.append(f"<booktitle>SYNCONF {venues[it]}</booktitle>")
+            elif tag == "incollection":
+                lines.append(f"<booktitle>Synthetic Book {venues[it]}</booktitle>")
+                lines.append(f"<publisher>Synthetic Press {venues[it] % 10}</publisher>")
+            lines.append(f"</{tag}>")
+            yield "\n".join(lines) + "\n"
+
+
+def write_dataset(f: TextIO, args, rng: np.random.Generator) -> None:
+    """Writes the synthetic dataset in the format of the DBLP dump
+    :param f: The text file to write to
+    :param args: The command line arguments
+    :param rng: The random generator
+    :return: None
+    """
+    f.write('<?xml version="1.0" encoding="ISO-8859-1"?>\n<!DOCTYPE dblp SYSTEM "dblp.dtd">\n<dblp>\n')
+    for record in generate_records(args, rng):
+        f.write(record)
+    f.write("</dblp>\n")
+
+
+def write_dtd(path: str) -> None:
+    """Writes a DTD that defines the entities of the synthetic names, for when the DTD of DBLP is not at hand
+    :param path: The DTD file to write
+    :return: None
+    """
+    with open(path, "w") as f:
+        for name, code in ENTITIES.items():
+            f.write(f'<!ENTITY {name} "&#{code};">\n')
+
+
+def main() -> None:
+    args = parser.parse_args()
+    start = time.time()
+    rng = np.random.default_rng(args.seed)
+
+    with gzip.open(args.o, "wt", encoding="iso-8859-1") as f:
+        write_dataset(f, args, rng)
+
+    dtd_path = os.path.join(os.path.dirname(os.path.abspath(args.o)), "dblp.dtd")
+    if not os.path.exists(dtd_path):
+        write_dtd(dtd_path)
+
+    end = time.time()
+    print(f"Written {args.records} records to {args.o} ({os.path.getsize(args.o) / 2 ** 20:.1f} MB), took "
+          f"{(end - start):.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import gzip
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from argparse import ArgumentParser
+from multiprocessing.connection import Connection
+
+from benchmarks.report import write_report
+
+parser = ArgumentParser(description="Measures the throughput and the peak memory of every stage of data_import.py")
+parser.add_argument("-f", required=True, help="The xml.gz file to import")
+parser.add_argument("-dtd", required=True, help="The DTD file")
+parser.add_argument("-stages", nargs="+", choices=["parse", "export_csv", "export_sqlite", "seed", "pipeline",
+                                                   "post_process"],
+                    default=["parse", "export_csv", "export_sqlite"],
+                    help="The stages to measure, each in a fresh process. seed, pipeline and post_process write to "
+                         "the database, post_process needs a seeded one")
+parser.add_argument("-parsers", nargs="+", choices=["iterparse", "parallel", "records"], default=["iterparse"],
+                    help="The parsers that the parsing stages are measured with")
+parser.add_argument("-workers", type=int, default=os.cpu_count(),
+                    help="The number of worker processes of the parallel parser")
+parser.add_argument("-o", help="The JSON file to write the results to, stdout by default")
+
+# The stages that parse the input file, the others only post-process the database
+PARSING_STAGES = ("parse", "export_csv", "export_sqlite", "seed", "pipeline")
+
+
+def peak_rss(who: int) -> int:
+    """Returns the peak resident set size of the process or of its terminated children
+    :param who: resource.RUSAGE_SELF or resource.RUSAGE_CHILDREN
+    :return: The peak resident set size in bytes
+    """
+    max_rss = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def uncompressed_size(input_file: str) -> int:
+    """Returns the size of the decompressed contents of a gzipped file
+    :param input_file: The xml.gz file
+    :return: The size in bytes
+    """
+    size = 0
+    with gzip.open(input_file, "rb") as f:
+        while True:
+            chunk = f.read(16 * 1024 * 1024)
+            if not chunk:
+                return size
+            size += len(chunk)
+
+
+def run_stage(stage: str, input_file: str, dtd_file: str, parser_name: str, workers: int,
+              connection: Connection) -> None:
+    """Runs a stage of the import and sends its measurements back. It runs in a fresh process, so that the peak memory
+    of every stage is measured on its own.
+    :param stage: The stage to run
+    :param input_file: The xml.gz file
+    :param dtd_file: The DTD file
+    :param parser_name: The parser of the parsing stages
+    :param workers: The number of worker processes of the parallel parser
+    :param connection: The pipe that the measurements are sent to
+    :return: None
+    """
+    import data_import
+
+    args = data_import.parser.parse_args(["-f", input_file, "-dtd", dtd_file, "-parser", parser_name,
+                                          "-workers", str(workers)])
+    records = 0
+
+    def store(record: data_import.ParsedRecord) -> None:
+        nonlocal records
+        records += 1
+        data_import.store_record(record)
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as output_dir:
+        if stage == "export_csv":
+            data_import.pipeline = data_import.CsvExporter(output_dir=output_dir)
+        elif stage == "export_sqlite":
+            data_import.pipeline = data_import.SqliteExporter(path=os.path.join(output_dir, "dblp.sqlite"))
+        elif stage in ("seed", "pipeline"):
+            data_import.clean_database()
+            data_import.create_indices()
+            if stage == "pipeline":
+                data_import.pipeline = data_import.SeedingPipeline(queue_size=args.queue_size)
+                data_import.pipeline.start()
+
+        if stage in PARSING_STAGES:
+            data_import.parse_input_file(input_file, args, store=store)
+        if data_import.pipeline is not None:
+            data_import.pipeline.close()
+        if stage == "seed":
+            data_import.seed_database()
+        elif stage == "post_process":
+            data_import.post_process(args)
+    seconds = time.perf_counter() - start
+
+    connection.send({
+        "seconds": seconds,
+        "records": records if stage in PARSING_STAGES else None,
+        "peak_rss_bytes": peak_rss(resource.RUSAGE_SELF),
+        "workers_peak_rss_bytes": peak_rss(resource.RUSAGE_CHILDREN),
+    })
+    connection.close()
+
+
+def measure(stage: str, input_file: str, dtd_file: str, parser_name: str, workers: int, xml_size: int) -> dict:
+    """Measures a stage of the import in a fresh process
+    :param stage: The stage to measure
+    :param input_file: The xml.gz file
+    :param dtd_file: The DTD file
+    :param parser_name: The parser of the parsing stages
+    :param workers: The number of worker processes of the parallel parser
+    :param xml_size: The size of the decompressed xml file in bytes
+    :return: The measurements of the stage
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=run_stage, args=(stage, input_file, dtd_file, parser_name, workers, sender))
+    process.start()
+    sender.close()
+    try:
+        measurements = receiver.recv()
+    except EOFError:
+        raise RuntimeError(f"Stage {stage} failed with the {parser_name} parser") from None
+    finally:
+        process.join()
+
+    seconds = measurements["seconds"]
+    result = {"stage": stage, "parser": parser_name if stage in PARSING_STAGES else None,
+              "workers": workers if parser_name == "parallel" else 1, **measurements}
+    if stage in PARSING_STAGES:
+        result["records_per_s"] = measurements["records"] / seconds
+        result["mb_per_s"] = xml_size / 2 ** 20 / seconds
+        result["compressed_mb_per_s"] = os.path.getsize(input_file) / 2 ** 20 / seconds
+    return result
+
+
+def main() -> None:
+    args = parser.parse_args()
+    xml_size = uncompressed_size(args.f)
+
+    results = []
+    for stage in args.stages:
+        for parser_name in (args.parsers if stage in PARSING_STAGES else args.parsers[:1]):
+            result = measure(stage, args.f, args.dtd, parser_name, args.workers, xml_size)
+            print(f"{stage} ({result['parser'] or '-'}): {result['seconds']:.2f} seconds, peak RSS "
+                  f"{result['peak_rss_bytes'] / 2 ** 20:.0f} MB", file=sys.stderr)
+            results.append(result)
+
+    write_report("import", results, args.o, input_file=os.path.basename(args.f), input_bytes=os.path.getsize(args.f),
+                 xml_bytes=xml_size)
+
+
+if __name__ == "__main__":
+    main()
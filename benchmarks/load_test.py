@@ -0,0 +1,163 @@
+import sys
+import time
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+from benchmarks.report import write_report
+
+parser = ArgumentParser(description="Load-tests the query endpoints of a running API and reports their latency "
+                                    "percentiles and throughput")
+parser.add_argument("-url", default="http://localhost:8000", help="The base URL of the API")
+parser.add_argument("-endpoints", nargs="+", help="The endpoints to test, e.g. query-1 query-7, all by default")
+parser.add_argument("-concurrency", nargs="+", type=int, default=[1, 8, 32],
+                    help="The numbers of concurrent clients that every endpoint is tested with")
+parser.add_argument("-requests", type=int, default=200,
+                    help="The number of requests per endpoint and concurrency level")
+parser.add_argument("-warmup", type=int, default=5,
+                    help="The number of requests per endpoint that are sent before measuring")
+parser.add_argument("-timeout", type=float, default=300, help="Seconds to wait for a response")
+parser.add_argument("-limit", type=int, default=10, help="The K of the top-K queries")
+parser.add_argument("-author", help="The author of the queries with an author, the most active author by default")
+parser.add_argument("-year", help="The year of the queries with a year, a year of the author by default")
+parser.add_argument("-journal", default="Synthetic Journal 0",
+                    help="The journal of queries 12 and 13, the most popular journal of the synthetic datasets by "
+                         "default")
+parser.add_argument("-k", type=int, default=2, help="The K of query 15")
+parser.add_argument("-o", help="The JSON file to write the results to, stdout by default")
+
+sessions = local()
+
+
+def get_session() -> requests.Session:
+    """Returns the HTTP session of the current thread, which keeps its connections alive between requests
+    :return: The session
+    """
+    if getattr(sessions, "session", None) is None:
+        sessions.session = requests.Session()
+    return sessions.session
+
+
+def endpoint_parameters(author: str, year: str, journal: str, limit: int, k: int) -> Dict[str, dict]:
+    """Returns the query parameters of every endpoint
+    :param author: The author of the queries with an author
+    :param year: The year of the queries with a year
+    :param journal: The journal of queries 12 and 13
+    :param limit: The K of the top-K queries
+    :param k: The K of query 15
+    :return: The parameters by endpoint
+    """
+    return {
+        "query-1": {"author": author},
+        "query-2": {"author": author, "year": year},
+        "query-3": {"limit": limit, "inproc": True},
+        "query-4": {"limit": limit},
+        "query-5": {"year": year, "limit": limit},
+        "query-6": {"limit": limit},
+        "query-7": {"limit": limit},
+        "query-8": {"limit": limit},
+        "query-9": {"limit": limit},
+        "query-10": {"year": year, "limit": limit},
+        "query-11": {"author": author, "year": year},
+        "query-12": {"title": journal, "year": year, "limit": limit, "first_author": True},
+        "query-13": {"title": journal, "limit": limit},
+        "query-14": {"limit": limit},
+        "query-15": {"k": k, "limit": limit},
+        "query-16": {"limit": limit},
+        "query-17": {"limit": limit},
+        "query-18": {},
+    }
+
+
+def discover_samples(url: str, timeout: float) -> Tuple[str, str]:
+    """Finds an author and a year with data, so that the lookups do not measure empty results
+    :param url: The base URL of the API
+    :param timeout: Seconds to wait for a response
+    :return: The author and the year
+    """
+    response = get_session().get(f"{url}/api/v1/query-6", params={"limit": 1}, timeout=timeout)
+    response.raise_for_status()
+    author = response.json()[0]["name"]
+    response = get_session().get(f"{url}/api/v1/query-1", params={"author": author}, timeout=timeout)
+    response.raise_for_status()
+    return author, str(response.json()[0]["year"])
+
+
+def timed_request(url: str, parameters: dict, timeout: float) -> Tuple[float, Optional[int]]:
+    """Sends a request and measures its latency
+    :param url: The URL of the endpoint
+    :param parameters: The query parameters
+    :param timeout: Seconds to wait for the response
+    :return: The latency in seconds and the status code, None if the request failed
+    """
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, params=parameters, timeout=timeout)
+        # Read the whole body, as a client would
+        _ = response.content
+        status = response.status_code
+    except requests.RequestException:
+        status = None
+    return time.perf_counter() - start, status
+
+
+def load_test(url: str, parameters: dict, concurrency: int, requests_count: int, timeout: float) -> dict:
+    """Sends requests to an endpoint from concurrent clients
+    :param url: The URL of the endpoint
+    :param parameters: The query parameters
+    :param concurrency: The number of concurrent clients
+    :param requests_count: The total number of requests
+    :param timeout: Seconds to wait for a response
+    :return: The latency percentiles in milliseconds, the throughput and the number of failed requests
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        measurements = list(executor.map(lambda _: timed_request(url, parameters, timeout), range(requests_count)))
+        seconds = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in measurements]) * 1000
+    errors = sum(1 for _, status in measurements if status != 200)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": requests_count,
+        "errors": errors,
+        "seconds": seconds,
+        "requests_per_s": requests_count / seconds,
+        "latency_ms": {"p50": p50, "p95": p95, "p99": p99, "mean": latencies.mean(), "max": latencies.max()},
+    }
+
+
+def main() -> None:
+    args = parser.parse_args()
+    url = args.url.rstrip("/")
+    author, year = args.author, args.year
+    if author is None or year is None:
+        discovered_author, discovered_year = discover_samples(url, args.timeout)
+        author = author or discovered_author
+        year = year or discovered_year
+
+    parameters = endpoint_parameters(author, year, args.journal, args.limit, args.k)
+    endpoints = args.endpoints or list(parameters)
+    results: List[dict] = []
+    for endpoint in endpoints:
+        endpoint_url = f"{url}/api/v1/{endpoint}"
+        for _ in range(args.warmup):
+            timed_request(endpoint_url, parameters[endpoint], args.timeout)
+        for concurrency in args.concurrency:
+            result = load_test(endpoint_url, parameters[endpoint], concurrency, args.requests, args.timeout)
+            print(f"{endpoint} x{concurrency}: p50 {result['latency_ms']['p50']:.1f} ms, p99 "
+                  f"{result['latency_ms']['p99']:.1f} ms, {result['requests_per_s']:.1f} requests/s, "
+                  f"{result['errors']} errors", file=sys.stderr)
+            results.append({"endpoint": endpoint, "concurrency": concurrency, "parameters": parameters[endpoint],
+                            **result})
+
+    write_report("load_test", results, args.o, url=url, requests=args.requests, warmup=args.warmup)
+
+
+if __name__ == "__main__":
+    main()
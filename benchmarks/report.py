@@ -0,0 +1,44 @@
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from typing import List, Optional
+
+
+def current_commit() -> Optional[str]:
+    """Returns the git commit of the working tree, so that reports of different commits can be told apart
+    :return: The commit hash or None outside of a git repository
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(benchmark: str, results: List[dict], output: Optional[str] = None, **settings) -> dict:
+    """Writes the results of a benchmark as JSON along with the environment they were measured in
+    :param benchmark: The name of the benchmark
+    :param results: The measurements
+    :param output: The JSON file to write, stdout if None
+    :param settings: The settings of the benchmark run
+    :return: The report
+    """
+    report = {
+        "benchmark": benchmark,
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": settings,
+        "results": results,
+    }
+    if output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,106 @@
+import asyncio
+import sys
+import time
+
+from argparse import ArgumentParser
+from typing import Any, Callable, List, Type
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST
+
+from app.core.serialization import FastJSONResponse, validated_rows
+from app.models.models import AuthorTitleYears, AuthorYearNameCounts, AuthorYearTotalPages, NameAverageAuthors, \
+    NameBookParts, NameConsecutiveYears, NameConsecutiveYearsDifferences, NameCount, NamesCount, NamesPair, \
+    TitleYear, TotalPages
+from benchmarks.report import write_report
+
+# The models of the rows that the query and batch endpoints return
+MODELS = {model.__name__: model for model in [NameCount, NameConsecutiveYears, NameConsecutiveYearsDifferences,
+                                              NameAverageAuthors, NameBookParts, NamesCount, NamesPair, TitleYear,
+                                              TotalPages, AuthorTitleYears, AuthorYearNameCounts,
+                                              AuthorYearTotalPages]}
+
+parser = ArgumentParser(description="Measures the serialization of the results of the endpoints, validated by FastAPI "
+                                    "against their response model and encoded with json, against FAST_SERIALIZATION")
+parser.add_argument("-models", nargs="+", choices=list(MODELS), help="The models of the rows, all by default")
+parser.add_argument("-rows", nargs="+", type=int, default=[100, 10000], help="The numbers of rows of the results")
+parser.add_argument("-nested_rows", type=int, default=10, help="The rows of every nested result of the batch models")
+parser.add_argument("-repeat", type=int, default=5, help="The times every measurement runs, the fastest one counts")
+parser.add_argument("-o", help="The JSON file to write the results to, stdout by default")
+
+
+def generate_row(model: Type[BaseModel], it: int, typed: bool, nested_rows: int) -> dict:
+    """Generates a row of a model as the backends return it
+    :param model: The model of the row
+    :param it: The number of the row, which the values are derived from
+    :param typed: Whether the values have the types of their fields, otherwise the integers are strings, like the
+    years that Neo4j stores as strings, which have to be validated
+    :param nested_rows: The rows of every nested result
+    :return: The row
+    """
+    row = {}
+    for field in model.__fields__.values():
+        if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+            value = [generate_row(field.type_, it + nested, typed, nested_rows) for nested in range(nested_rows)]
+        elif field.type_ is int:
+            value = [it % 50, it % 7 + 1] if field.shape == SHAPE_LIST else it % 2000 + 1970
+            if not typed:
+                value = [str(item) for item in value] if field.shape == SHAPE_LIST else str(value)
+        elif field.type_ is float:
+            value = it / 7
+        else:
+            value = f"{field.name} {it} ü"
+        row[field.alias] = value
+    return row
+
+
+def best_time(function: Callable[[], Any], repeat: int) -> float:
+    """Runs a function a few times
+    :param function: The function
+    :param repeat: The times to run it
+    :return: The seconds of the fastest run
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def main() -> None:
+    args = parser.parse_args()
+    loop = asyncio.new_event_loop()
+    results: List[dict] = []
+    for name in args.models or list(MODELS):
+        model = MODELS[name]
+        field = create_response_field(name=f"Response {name}", type_=List[model])
+        for rows_count in args.rows:
+            for typed in (True, False):
+                rows = [generate_row(model, it, typed, args.nested_rows) for it in range(rows_count)]
+
+                def validated() -> bytes:
+                    # What FastAPI does with the result of an endpoint with a response model
+                    content = loop.run_until_complete(serialize_response(field=field, response_content=rows))
+                    return JSONResponse(content).body
+
+                def fast() -> bytes:
+                    return FastJSONResponse(validated_rows(rows, model)).body
+
+                validated_seconds = best_time(validated, args.repeat)
+                fast_seconds = best_time(fast, args.repeat)
+                print(f"{name} {rows_count} {'typed' if typed else 'untyped'}: {validated_seconds * 1000:.2f} ms -> "
+                      f"{fast_seconds * 1000:.2f} ms ({validated_seconds / fast_seconds:.1f}x)", file=sys.stderr)
+                results.append({"model": name, "rows": rows_count, "typed": typed,
+                                "validated_ms": validated_seconds * 1000, "fast_ms": fast_seconds * 1000,
+                                "speedup": validated_seconds / fast_seconds})
+    loop.close()
+
+    write_report("serialization", results, args.o, repeat=args.repeat, nested_rows=args.nested_rows)
+
+
+if __name__ == "__main__":
+    main()
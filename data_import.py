@@ -1,44 +1,547 @@
+import csv
 import gzip
+import hashlib
+import html
+import io
+import json
+import math
 import os
+import random
 import re
+import sqlite3
+import sys
 import time
 
+from abc import ABC, abstractmethod
+from array import array
 from lxml import etree
 from argparse import ArgumentParser
-from py2neo.bulk import create_nodes, create_relationships
-from itertools import islice
-
+from collections import Counter, deque
+from itertools import chain
+from multiprocessing import Pool
+from queue import Queue
+from threading import Lock, Thread
+from py2neo.bulk import create_nodes, create_relationships, merge_nodes
+from py2neo.errors import TransientError
+from typing import BinaryIO, Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, \
+    Tuple, Union
+
+from app.analytics.author_statistics import AUTHOR_STATISTICS, AUTHOR_YEARS, Contribution, \
+    compute_author_statistics
+from app.analytics.co_authorships import compute_co_authorships
+from app.analytics.triads import TRIAD_STATISTICS, build_co_author_graph, compute_triads
+from app.backends.sqlite_backend import create_table_indices, create_tables
+from app.db.parsed_snapshot import FIRST_AUTHOR, LAST_AUTHOR, MISSING_PAGES, PUBLICATION_VENUE_LABELS, \
+    ParsedSnapshot, SnapshotWriter, file_digest, relationships_name, snapshot_key
 from app.db.db_connection import get_db
 
+# The records of the imported types that are read by default, where the original import stopped
+MAX_RECORDS = 999999
+
 parser = ArgumentParser()
 parser.add_argument("-f", nargs="+", help="The input file to parse")
 parser.add_argument("-dtd", nargs="+", help="The DTD file")
+parser.add_argument("-parser", choices=["iterparse", "parallel", "records"], default="iterparse",
+                    help="How to parse the xml.gz file: a single streaming iterparse pass (default), iterparse on "
+                         "multiple processes or the legacy record by record parsing")
+parser.add_argument("-workers", type=int, default=os.cpu_count(),
+                    help="The number of worker processes of the parallel parser and of the triad statistics of "
+                         "queries 7 and 9")
+parser.add_argument("-pipeline", action="store_true",
+                    help="Write batches to the database while parsing, instead of seeding after the parsing finishes")
+parser.add_argument("-queue_size", type=int, default=8,
+                    help="The maximum number of batches waiting to be written by the pipeline")
+parser.add_argument("-seed_workers", type=int, default=1,
+                    help="The number of writers that seed the database concurrently, each with its own connection")
+parser.add_argument("-commit_seconds", type=float, default=1.0,
+                    help="The commit latency that the writers of -seed_workers tune the size of their transactions to")
+parser.add_argument("-export_csv", metavar="DIR",
+                    help="Write gzipped CSV files for neo4j-admin import to the given directory, instead of seeding the "
+                         "database")
+parser.add_argument("-csv_part_size", type=int, default=1000000,
+                    help="The maximum number of rows of each CSV part file")
+parser.add_argument("-export_sqlite", metavar="PATH",
+                    help="Write the local SQLite store of the sqlite query backend to the given file, instead of "
+                         "seeding the database")
+parser.add_argument("-delta", action="store_true",
+                    help="Only write the records that changed since the previous delta import, instead of cleaning "
+                         "the database and importing everything")
+parser.add_argument("-manifest", default="dblp_import_manifest.sqlite",
+                    help="The file that keeps track of the records written by the delta imports")
+parser.add_argument("-indices", action="store_true",
+                    help="Only create the constraints, the indices, the precomputed statistics and the CO_AUTHORED "
+                         "relationships of the database, e.g. after a neo4j-admin import")
+parser.add_argument("-skip_statistics", action="store_true",
+                    help="Do not precompute the statistics of the leaderboard queries after importing")
+parser.add_argument("-skip_co_authorships", action="store_true",
+                    help="Do not create the CO_AUTHORED relationships of the authors after importing")
+parser.add_argument("-snapshot", metavar="DIR",
+                    help="Keep a columnar snapshot of the parsed data of all the years in the given directory, keyed "
+                         "by a hash of the input file and the import options besides the years, and read the records "
+                         "of the year window from it instead of parsing the input file again")
+parser.add_argument("-record_types", nargs="+", choices=["article", "inproceedings", "incollection"],
+                    default=["article", "inproceedings", "incollection"], help="The record types to import")
+parser.add_argument("-start_year", type=int, default=2010, help="The first year of the imported records")
+parser.add_argument("-end_year", type=int, default=2014, help="The last year of the imported records")
+parser.add_argument("-required_fields", nargs="*", default=["pages"],
+                    help="The fields that a record must have to be imported, besides its authors, title, year and "
+                         "venue")
+parser.add_argument("-venues", nargs="+",
+                    help="Only import the records of the given journals, conferences and books")
+parser.add_argument("-exclude_venues", nargs="+",
+                    help="Do not import the records of the given journals, conferences and books")
+parser.add_argument("-max_records", type=int, default=MAX_RECORDS,
+                    help="Stop after reading the given number of records of the imported types, 0 to read them all")
+
+RECORD_TAGS = ("article", "inproceedings", "incollection")
+# Start of any top level DBLP record, used to split the decompressed stream into chunks for the parallel parser
+RECORD_START_PATTERN = re.compile(rb"<(article|inproceedings|proceedings|book|incollection|phdthesis|mastersthesis"
+                                  rb"|www|person|data)[\s>]")
+# The same at the start of any line of a block of the decompressed stream, since every record starts on a new line
+RECORD_LINE_START_PATTERN = re.compile(b"^" + RECORD_START_PATTERN.pattern, re.MULTILINE)
+RECORD_TAG_PATTERN = re.compile(rb"<(\w+)")
+YEAR_PATTERN = re.compile(rb"<year>([^<]*)</year>")
+# The element of the venue of every record type
+VENUE_PATTERNS = {
+    "article": re.compile(rb"<journal>(.*?)</journal>", re.DOTALL),
+    "inproceedings": re.compile(rb"<booktitle>(.*?)</booktitle>", re.DOTALL),
+    "incollection": re.compile(rb"<booktitle>(.*?)</booktitle>", re.DOTALL),
+}
+ENCODING_PATTERN = re.compile(rb"encoding=[\"']([\w.:-]+)[\"']")
+RAW_BLOCK_SIZE = 1024 * 1024
+PARALLEL_CHUNK_SIZE = 16 * 1024 * 1024
+BATCH_SIZE = 5000
+# Seconds of the first backoff of a transaction that failed with a transient error, doubled on every retry
+RETRY_DELAY = 0.1
+
+
+class NodeColumns:
+    """The nodes of a label that are staged for the bulk insert. Every node gets a dense integer id in the order it was
+    first seen, so the relationships refer to it by its id and its key is kept only once. The nodes from the last taken
+    id onwards are the ones that still have to be written. The keys and ids of the written nodes are kept for the whole
+    import, since later records and relationships refer to them, so they grow with the number of distinct nodes.
+    """
+
+    def __init__(self, fields: Tuple[str, ...], key_size: Optional[int] = None):
+        """
+        :param fields: The fields of the nodes that are kept along with their ids
+        :param key_size: The number of leading fields that identify a node, all of them if None
+        """
+        self.fields = fields
+        self.key_size = len(fields) if key_size is None else key_size
+        self.ids: Dict[Hashable, int] = {}
+        self.keys: Sequence[Hashable] = []
+        # The properties of the nodes besides their key, only for the few nodes that have any
+        self.properties: Dict[int, dict] = {}
+        self.taken = 0
+
+    def __len__(self) -> int:
+        return len(self.keys) - self.taken
+
+    def add(self, key: Hashable, properties: Optional[dict] = None) -> int:
+        """Adds a node unless a node with the same key exists
+        :param key: The value of the only field, or a tuple of the values of the fields
+        :param properties: The rest of the properties of the node, kept only when the node is new
+        :return: The id of the node
+        """
+        identity = key if self.key_size == len(self.fields) else self.match_key(key)
+        node_id = self.ids.get(identity)
+        if node_id is None:
+            node_id = self.ids[identity] = len(self.keys)
+            self.keys.append(key)
+            if properties:
+                self.properties[node_id] = properties
+        return node_id
+
+    def load(self, keys: Sequence[Hashable], properties: Dict[int, dict]) -> None:
+        """Replaces the nodes with the nodes of a snapshot, which are only read and cannot be added to
+        :param keys: The key of every node by its id
+        :param properties: The rest of the properties of the nodes that have any
+        :return: None
+        """
+        self.ids = {}
+        self.keys = keys
+        self.properties = properties
+        self.taken = 0
+
+    def match_key(self, key: Hashable) -> Hashable:
+        """Returns the part of the fields of a node that the relationships find it by
+        :param key: The value of the only field, or a tuple of the values of the fields
+        :return: The value of the only key field, or a tuple of the values of the key fields
+        """
+        if self.key_size == len(self.fields):
+            return key
+        return key[0] if self.key_size == 1 else tuple(key[:self.key_size])
+
+    def take(self, count: Optional[int] = None) -> List[dict]:
+        """Removes the next nodes that have to be written and returns them in the format of the bulk insert
+        :param count: The maximum number of nodes, all if None
+        :return: The properties of every node
+        """
+        stop = len(self.keys) if count is None else min(self.taken + count, len(self.keys))
+        if len(self.fields) == 1:
+            rows = [{self.fields[0]: self.keys[it]} for it in range(self.taken, stop)]
+        else:
+            rows = [dict(zip(self.fields, self.keys[it])) for it in range(self.taken, stop)]
+        if self.properties:
+            for it, row in enumerate(rows, self.taken):
+                row.update(self.properties.pop(it, ()))
+        self.taken = stop
+        return rows
+
+
+class RelationshipColumns:
+    """The relationships between the nodes of two labels that are staged for the bulk insert, kept as arrays of the ids
+    of their nodes instead of a tuple per relationship. The arrays are emptied once all of their relationships have
+    been taken.
+    """
+
+    # The name and the array type code of every column
+    COLUMNS = (("start_ids", "i"), ("end_ids", "i"))
+
+    def __init__(self, start_nodes: NodeColumns, end_nodes: NodeColumns):
+        self.start_nodes = start_nodes
+        self.end_nodes = end_nodes
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.start_ids) - self.taken
+
+    def append(self, start_id: int, end_id: int) -> None:
+        """Adds a relationship without properties
+        :param start_id: The id of the start node
+        :param end_id: The id of the end node
+        :return: None
+        """
+        self.start_ids.append(start_id)
+        self.end_ids.append(end_id)
+
+    def clear(self) -> None:
+        """Removes all the relationships
+        :return: None
+        """
+        for name, typecode in self.COLUMNS:
+            setattr(self, name, array(typecode))
+        self.taken = 0
+
+    def columns(self) -> Dict[str, Sequence[int]]:
+        """Returns the columns by their name
+        :return: The arrays of the columns
+        """
+        return {name: getattr(self, name) for name, _ in self.COLUMNS}
+
+    def load(self, columns: Dict[str, Sequence[int]]) -> None:
+        """Replaces the relationships with the memory mapped columns of a snapshot, which are only read
+        :param columns: The arrays of the columns by their name
+        :return: None
+        """
+        for name, _ in self.COLUMNS:
+            setattr(self, name, columns[name])
+        self.taken = 0
+
+    def take(self, count: Optional[int] = None) -> List[tuple]:
+        """Removes the next relationships and returns them in the format of the bulk insert
+        :param count: The maximum number of relationships, all if None
+        :return: The key of the start node, the properties and the key of the end node of every relationship
+        """
+        stop = len(self.start_ids) if count is None else min(self.taken + count, len(self.start_ids))
+        start_keys = self.start_nodes.keys
+        end_keys = self.end_nodes.keys
+        start_key = self.start_nodes.match_key
+        end_key = self.end_nodes.match_key
+        rows = [(start_key(start_keys[start_id]), rel_dict, end_key(end_keys[end_id]))
+                for start_id, rel_dict, end_id in zip(self.start_ids[self.taken:stop].tolist(),
+                                                      self.relationships_properties(self.taken, stop),
+                                                      self.end_ids[self.taken:stop].tolist())]
+        self.taken = stop
+        if self.taken == len(self.start_ids):
+            self.clear()
+        return rows
+
+    def relationships_properties(self, start: int, stop: int) -> Iterable[dict]:
+        return ({} for _ in range(start, stop))
+
+
+class ContributionColumns(RelationshipColumns):
+    """The CONTRIBUTED relationships of a publication label, along with the pages of the publication and the position
+    of the author in columns of their own
+    """
+
+    COLUMNS = RelationshipColumns.COLUMNS + (("start_pages", "q"), ("end_pages", "q"), ("total_pages", "q"),
+                                             ("positions", "b"))
+
+    def extend(self, author_ids: List[int], publication_id: int, pages_dict: dict) -> None:
+        """Adds the contributions of the authors of a publication
+        :param author_ids: The ids of the authors in the order they are listed
+        :param publication_id: The id of the publication
+        :param pages_dict: The pages dictionary
+        :return: None
+        """
+        for it, author_id in enumerate(author_ids):
+            self.append(author_id, publication_id)
+            self.start_pages.append(pages_dict.get("start_page", MISSING_PAGES))
+            self.end_pages.append(pages_dict.get("end_page", MISSING_PAGES))
+            self.total_pages.append(pages_dict.get("total_pages", MISSING_PAGES))
+            if it == 0:
+                self.positions.append(FIRST_AUTHOR)
+            elif it == len(author_ids) - 1:
+                self.positions.append(LAST_AUTHOR)
+            else:
+                self.positions.append(0)
+
+    def relationships_properties(self, start: int, stop: int) -> Iterable[dict]:
+        # The same properties as associate_authors_with_publications
+        for start_page, end_page, total_pages, position in zip(self.start_pages[start:stop].tolist(),
+                                                               self.end_pages[start:stop].tolist(),
+                                                               self.total_pages[start:stop].tolist(),
+                                                               self.positions[start:stop].tolist()):
+            rel_dict = {}
+            if start_page != MISSING_PAGES:
+                rel_dict.update({"start_page": start_page, "end_page": end_page, "total_pages": total_pages})
+            if position == FIRST_AUTHOR:
+                rel_dict["first_author"] = True
+            elif position == LAST_AUTHOR:
+                rel_dict["last_author"] = True
+            yield rel_dict
+
+
+class RecordColumns:
+    """The label, the publication id, the year and the number of authors of every stored record in the order they were
+    stored, which the snapshot keeps to select the records of a year window
+    """
+
+    # The name and the array type code of every column
+    COLUMNS = (("labels", "b"), ("publication_ids", "i"), ("years", "i"), ("authors", "i"))
+
+    def __init__(self):
+        self.clear()
+
+    def append(self, label: int, publication_id: int, year: int, authors_count: int) -> None:
+        """Adds a record
+        :param label: The index of the labels of the record in PUBLICATION_VENUE_LABELS
+        :param publication_id: The id of the publication of the record
+        :param year: The year of the record
+        :param authors_count: The number of the authors of the record, the CONTRIBUTED relationships it added
+        :return: None
+        """
+        self.labels.append(label)
+        self.publication_ids.append(publication_id)
+        self.years.append(year)
+        self.authors.append(authors_count)
+
+    def clear(self) -> None:
+        """Removes all the records
+        :return: None
+        """
+        for name, typecode in self.COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def columns(self) -> Dict[str, Sequence[int]]:
+        """Returns the columns by their name
+        :return: The arrays of the columns
+        """
+        return {name: getattr(self, name) for name, _ in self.COLUMNS}
+
+
+# The fields that are kept for every publication, the first one identifies it
+PUBLICATION_FIELDS = ("key", "title", "year", "mdate")
+
+# The staged data, nodes are identified by their name/title and publications by the key of their DBLP record
+authors_data = NodeColumns(("name",))
+article_data = NodeColumns(PUBLICATION_FIELDS, key_size=1)
+inproceedings_data = NodeColumns(PUBLICATION_FIELDS, key_size=1)
+incollection_data = NodeColumns(PUBLICATION_FIELDS, key_size=1)
+journal_data = NodeColumns(("title",))
+conference_data = NodeColumns(("title",))
+book_data = NodeColumns(("title",))
+
+authors_article_relations_data = ContributionColumns(authors_data, article_data)
+authors_inproceedings_relations_data = ContributionColumns(authors_data, inproceedings_data)
+authors_incollection_relations_data = ContributionColumns(authors_data, incollection_data)
+article_journal_relations_data = RelationshipColumns(article_data, journal_data)
+inproceedings_conference_relations_data = RelationshipColumns(inproceedings_data, conference_data)
+incollection_book_relations_data = RelationshipColumns(incollection_data, book_data)
+records_data = RecordColumns()
+
+# The staged data along with the labels of their nodes
+NODES_DATA = [
+    (authors_data, {"Author"}),
+    (article_data, {"Article"}),
+    (inproceedings_data, {"Inproceedings"}),
+    (incollection_data, {"Incollection"}),
+    (journal_data, {"Journal"}),
+    (conference_data, {"Conference"}),
+    (book_data, {"Book"}),
+]
+
+# The staged data along with the type of their relationships and the keys of the start and end nodes
+RELATIONS_DATA = [
+    (authors_article_relations_data, "CONTRIBUTED", ("Author", "name"), ("Article", "key")),
+    (authors_inproceedings_relations_data, "CONTRIBUTED", ("Author", "name"), ("Inproceedings", "key")),
+    (authors_incollection_relations_data, "CONTRIBUTED", ("Author", "name"), ("Incollection", "key")),
+    (article_journal_relations_data, "PUBLISHED", ("Article", "key"), ("Journal", "title")),
+    (inproceedings_conference_relations_data, "PUBLISHED", ("Inproceedings", "key"), ("Conference", "title")),
+    (incollection_book_relations_data, "PUBLISHED", ("Incollection", "key"), ("Book", "title")),
+]
+
+PUBLICATION_LABELS = ["Article", "Inproceedings", "Incollection"]
+# The labels of the publication and the venue nodes of every record type
+RECORD_LABELS = {
+    "article": ("Article", "Journal"),
+    "inproceedings": ("Inproceedings", "Conference"),
+    "incollection": ("Incollection", "Book"),
+}
+# The staged publications, venues, CONTRIBUTED and PUBLISHED relationships of every record type
+RECORD_DATA = {
+    "article": (article_data, journal_data, authors_article_relations_data, article_journal_relations_data),
+    "inproceedings": (inproceedings_data, conference_data, authors_inproceedings_relations_data,
+                      inproceedings_conference_relations_data),
+    "incollection": (incollection_data, book_data, authors_incollection_relations_data,
+                     incollection_book_relations_data),
+}
+# The index of the labels of every record type in the label column of the records of the snapshot
+RECORD_LABEL_INDEX = {tag: PUBLICATION_VENUE_LABELS.index(labels) for tag, labels in RECORD_LABELS.items()}
+
+# The batch writer that is fed after every stored record, when the data are written while parsing
+pipeline = None
+
+
+class ParsedRecord(NamedTuple):
+    """The fields of a DBLP record that are stored to the database"""
+    key: str
+    tag: str
+    title: str
+    year: str
+    pages: str
+    authors: List[str]
+    venue: str
+    publisher: Optional[str]
+    # Last, so that the records of older delta import manifests can still be read
+    mdate: str = ""
+
+
+class RecordFilter:
+    """Selects the records to import. Every record is first checked on its raw bytes, so most of the records that are
+    not imported are never parsed, and the parsed fields of the rest are checked again, since the raw checks can not
+    resolve nested markup. Counts the records that every rule rejected.
+    """
 
-args = parser.parse_args()
-start = time.time()
-
-authors_data = []
-article_data = []
-inproceedings_data = []
-incollection_data = []
-journal_data = []
-conference_data = []
-book_data = []
-
-authors_article_relations_data = []
-authors_inproceedings_relations_data = []
-authors_incollection_relations_data = []
-article_journal_relations_data = []
-inproceedings_conference_relations_data = []
-incollection_book_relations_data = []
-
-authors_names_set = set()
-article_titles_set = set()
-inproceedings_titles_set = set()
-incollection_titles_set = set()
-journal_titles_set = set()
-conference_titles_set = set()
-book_titles_set = set()
+    def __init__(self, record_types: Sequence[str] = RECORD_TAGS, start_year: int = 2010, end_year: int = 2014,
+                 required_fields: Sequence[str] = ("pages",), venues: Optional[Sequence[str]] = None,
+                 excluded_venues: Optional[Sequence[str]] = None, max_records: int = MAX_RECORDS):
+        """
+        :param record_types: The record types to import
+        :param start_year: The first year of the imported records
+        :param end_year: The last year of the imported records
+        :param required_fields: The fields that a record must have besides its authors, title, year and venue
+        :param venues: The only journals, conferences and books whose records are imported, all if None
+        :param excluded_venues: The journals, conferences and books whose records are not imported
+        :param max_records: The number of records that are read before the parsing stops, all if 0
+        """
+        self.record_types = list(record_types)
+        self.start_year = start_year
+        self.end_year = end_year
+        self.required_fields = list(required_fields)
+        self.venues = set(venues) if venues is not None else None
+        self.excluded_venues = set(excluded_venues or ())
+        self.max_records = max_records
+        self.field_patterns = [re.compile(rb"<%s[\s>]" % field.encode()) for field in ["author", "title"] +
+                               self.required_fields]
+        self.rejected = Counter()
+
+    @classmethod
+    def from_args(cls, args, all_years: bool = False) -> "RecordFilter":
+        """Creates the filter of the command line arguments
+        :param args: The command line arguments
+        :param all_years: Whether the records of all the years pass, instead of the ones of the year arguments
+        :return: The filter
+        """
+        start_year, end_year = (0, sys.maxsize) if all_years else (args.start_year, args.end_year)
+        return cls(record_types=args.record_types, start_year=start_year, end_year=end_year,
+                   required_fields=args.required_fields, venues=args.venues, excluded_venues=args.exclude_venues,
+                   max_records=args.max_records)
+
+    def options(self) -> dict:
+        """Returns the options of the filter
+        :return: The options, JSON serializable
+        """
+        return {"record_types": self.record_types, "start_year": self.start_year, "end_year": self.end_year,
+                "required_fields": self.required_fields, "max_records": self.max_records,
+                "venues": sorted(self.venues) if self.venues is not None else None,
+                "excluded_venues": sorted(self.excluded_venues)}
+
+    def check(self, record: bytes, encoding: str) -> Optional[str]:
+        """Checks the raw bytes of a record
+        :param record: The raw record, starting with its opening tag
+        :param encoding: The encoding of the XML document
+        :return: The rule that rejects the record or None if it may be imported
+        """
+        tag = record_tag(record)
+        if tag not in self.record_types:
+            return "type"
+        year = YEAR_PATTERN.search(record)
+        if year is None:
+            return "fields"
+        if not self.year_in_range(year.group(1).decode(encoding)):
+            return "year"
+        if any(pattern.search(record) is None for pattern in self.field_patterns):
+            return "fields"
+        venue = VENUE_PATTERNS[tag].search(record)
+        if venue is None:
+            return "fields"
+        # A venue with nested markup is left to the check of the parsed fields
+        if (self.venues is not None or self.excluded_venues) and b"<" not in venue.group(1):
+            if not self.venue_allowed(html.unescape(venue.group(1).decode(encoding))):
+                return "venue"
+        return None
+
+    def check_record(self, record: ParsedRecord) -> Optional[str]:
+        """Checks the parsed fields of a record
+        :param record: The extracted record
+        :return: The rule that rejects the record or None if it is imported
+        """
+        if record.tag not in self.record_types:
+            return "type"
+        if not self.year_in_range(record.year):
+            return "year"
+        if "pages" in self.required_fields and not record.pages:
+            return "fields"
+        if not self.venue_allowed(record.venue):
+            return "venue"
+        return None
+
+    def filter(self, records: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        """Counts the records of the imported types and yields the ones that pass the raw checks, until the maximum
+        number of records has been read
+        :param records: The raw top level records, see iter_raw_records
+        :param encoding: The encoding of the XML document
+        :return: Iterator of the raw records that may be imported
+        """
+        count = 0
+        for record in records:
+            if record_tag(record) not in RECORD_TAGS:
+                continue
+            rule = self.check(record, encoding)
+            if rule is None:
+                yield record
+            else:
+                self.rejected[rule] += 1
+            count += 1
+            if count == self.max_records:
+                return
+
+    def summary(self) -> str:
+        """Returns the number of records that every rule rejected
+        :return: The summary
+        """
+        rejected = ", ".join(f"{count} by {rule}" for rule, count in self.rejected.most_common())
+        return f"Skipped {sum(self.rejected.values())} records" + (f": {rejected}" if rejected else "")
+
+    def year_in_range(self, year: str) -> bool:
+        return year.isdigit() and self.start_year <= int(year) <= self.end_year
+
+    def venue_allowed(self, venue: str) -> bool:
+        return (self.venues is None or venue in self.venues) and venue not in self.excluded_venues
 
 
 def clean_database() -> None:
@@ -50,22 +553,28 @@ def clean_database() -> None:
     graph_db.delete_all()
 
 
+def bump_dataset_generation() -> None:
+    """Marks the dataset as changed, so that the API drops the cached query results of the previous import
+    :return: None
+    """
+    # Get database connection
+    graph_db = next(get_db())
+    # A timestamp keeps increasing even after the database has been cleaned
+    graph_db.run("MERGE (g:DatasetGeneration) SET g.generation = timestamp()")
+
+
 def create_constraints() -> None:
-    """Creates required constraints in the database
-    :return:
+    """Creates required constraints in the database: the key of the DBLP record of every publication is unique, which
+    also indexes the keys that the relationships find the publications by
+    :return: None
     """
     # Get database connection
     graph_db = next(get_db())
-    graph_db.run("CREATE CONSTRAINT AuthorNameConstraint IF NOT EXISTS ON (n:Author) ASSERT n.name IS UNIQUE")
-    graph_db.run("CREATE CONSTRAINT ArticleTitleConstraint IF NOT EXISTS ON (n:Article) ASSERT (n.title, n.year) "
-                 "IS UNIQUE")
-    graph_db.run("CREATE CONSTRAINT InproceedingsTitleConstraint IF NOT EXISTS ON (n:Inproceedings) "
-                 "ASSERT (n.title, n.year) IS UNIQUE")
-    graph_db.run("CREATE CONSTRAINT IncollectionTitleConstraint IF NOT EXISTS ON (n:Incollection) "
-                 "ASSERT (n.title, n.year) IS UNIQUE")
-    graph_db.run("CREATE CONSTRAINT JournalTitleConstraint IF NOT EXISTS ON (n:Article) ASSERT n.title IS UNIQUE")
-    graph_db.run("CREATE CONSTRAINT ConferenceConstraint IF NOT EXISTS ON (n:Conference) ASSERT n.title IS UNIQUE")
-    graph_db.run("CREATE CONSTRAINT BookTitleConstraint IF NOT EXISTS ON (n:Book) ASSERT n.title IS UNIQUE")
+    graph_db.run("CREATE CONSTRAINT ArticleKeyConstraint IF NOT EXISTS ON (n:Article) ASSERT n.key IS UNIQUE")
+    graph_db.run("CREATE CONSTRAINT InproceedingsKeyConstraint IF NOT EXISTS ON (n:Inproceedings) "
+                 "ASSERT n.key IS UNIQUE")
+    graph_db.run("CREATE CONSTRAINT IncollectionKeyConstraint IF NOT EXISTS ON (n:Incollection) "
+                 "ASSERT n.key IS UNIQUE")
 
 
 def create_indices() -> None:
@@ -75,9 +584,6 @@ def create_indices() -> None:
     # Get database connection
     graph_db = next(get_db())
     graph_db.run("CREATE INDEX AuthorNameIndex IF NOT EXISTS FOR (t:Author) ON (t.name)")
-    graph_db.run("CREATE INDEX ArticleTitleYearIndex IF NOT EXISTS FOR (t:Article) ON (t.title, t.year)")
-    graph_db.run("CREATE INDEX InproceedingsTitleYearIndex IF NOT EXISTS FOR (t:Inproceedings) ON (t.title, t.year)")
-    graph_db.run("CREATE INDEX IncollectionTitleYearIndex IF NOT EXISTS FOR (t:Incollection) ON (t.title, t.year)")
     graph_db.run("CREATE INDEX ArticleTitleIndex IF NOT EXISTS FOR (t:Article) ON (t.title)")
     graph_db.run("CREATE INDEX InproceedingsTitleIndex IF NOT EXISTS FOR (t:Inproceedings) ON (t.title)")
     graph_db.run("CREATE INDEX IncollectionTitleIndex IF NOT EXISTS FOR (t:Incollection) ON (t.title)")
@@ -87,6 +593,11 @@ def create_indices() -> None:
     graph_db.run("CREATE INDEX JournalTitleIndex IF NOT EXISTS FOR (t:Journal) ON (t.title)")
     graph_db.run("CREATE INDEX ConferenceIndex IF NOT EXISTS FOR (t:Conference) ON (t.title)")
     graph_db.run("CREATE INDEX BookTitleIndex IF NOT EXISTS FOR (t:Book) ON (t.title)")
+    for statistic in AUTHOR_STATISTICS + TRIAD_STATISTICS:
+        graph_db.run(f"CREATE INDEX Author{statistic[0].upper() + statistic[1:]}Index IF NOT EXISTS "
+                     f"FOR (t:Author) ON (t.{statistic})")
+    graph_db.run("CREATE INDEX AuthorYearStatsYearIndex IF NOT EXISTS FOR (t:AuthorYearStats) ON (t.year)")
+    graph_db.run("CREATE INDEX AuthorYearStatsCoAuthorsIndex IF NOT EXISTS FOR (t:AuthorYearStats) ON (t.coAuthors)")
     # graph_db.run("CALL db.index.fulltext.createRelationshipIndex(\"PagesIndex\", [\"WROTE\"], [\"pages\"])")
     # graph_db.run("CALL db.index.fulltext.createRelationshipIndex(\"TotalPagesIndex\", [\"WROTE\"], [\"total_pages\"])")
 
@@ -98,91 +609,846 @@ def seed_database() -> None:
     # Get database connection
     graph_db = next(get_db())
 
-    batch_size = 5000
-    authors_iter = iter(authors_data)
-    article_iter = iter(article_data)
-    inproceedings_iter = iter(inproceedings_data)
-    incollection_iter = iter(incollection_data)
-
-    journal_iter = iter(journal_data)
-    conference_iter = iter(conference_data)
-    book_iter = iter(book_data)
-
-    authors_articles_relations_iter = iter(authors_article_relations_data)
-    authors_inproceedings_relations_iter = iter(authors_inproceedings_relations_data)
-    authors_incollection_relations_iter = iter(authors_incollection_relations_data)
-
-    article_journal_relations_iter = iter(article_journal_relations_data)
-    inproceedings_conference_relations_iter = iter(inproceedings_conference_relations_data)
-    incollection_book_relations_iter = iter(incollection_book_relations_data)
-
     # Insert all nodes first
     while True:
-        authors_data_batch = list(islice(authors_iter, batch_size))
-        articles_data_batch = list(islice(article_iter, batch_size))
-        inproceedings_data_batch = list(islice(inproceedings_iter, batch_size))
-        incollection_data_batch = list(islice(incollection_iter, batch_size))
-
-        journal_data_batch = list(islice(journal_iter, batch_size))
-        conference_data_batch = list(islice(conference_iter, batch_size))
-        book_data_batch = list(islice(book_iter, batch_size))
-
-        if authors_data_batch:
-            create_nodes(graph_db.auto(), data=authors_data_batch, labels={"Author"})
-        if articles_data_batch:
-            create_nodes(graph_db.auto(), data=articles_data_batch, labels={"Article"})
-        if inproceedings_data_batch:
-            create_nodes(graph_db.auto(), data=inproceedings_data_batch, labels={"Inproceedings"})
-        if incollection_data_batch:
-            create_nodes(graph_db.auto(), data=incollection_data_batch, labels={"Incollection"})
-        if journal_data_batch:
-            create_nodes(graph_db.auto(), data=journal_data_batch, labels={"Journal"})
-        if conference_data_batch:
-            create_nodes(graph_db.auto(), data=conference_data_batch, labels={"Conference"})
-        if book_data_batch:
-            create_nodes(graph_db.auto(), data=book_data_batch, labels={"Book"})
-
-        if not any([authors_data_batch, articles_data_batch, inproceedings_data_batch, incollection_data_batch,
-                    journal_data_batch, conference_data_batch, book_data_batch]):
+        inserted = False
+        for data, labels in NODES_DATA:
+            data_batch = data.take(BATCH_SIZE)
+            if data_batch:
+                create_nodes(graph_db.auto(), data=data_batch, labels=labels)
+                inserted = True
+
+        if not inserted:
             break
 
     # Continue up with relationships
     while True:
-        authors_articles_relations_data_batch = list(islice(authors_articles_relations_iter, batch_size))
-        authors_inproceedings_relations_data_batch = list(islice(authors_inproceedings_relations_iter, batch_size))
-        authors_incollection_relations_data_batch = list(islice(authors_incollection_relations_iter, batch_size))
-
-        article_journal_relations_data_batch = list(islice(article_journal_relations_iter, batch_size))
-        inproceedings_conference_relations_data_batch = \
-            list(islice(inproceedings_conference_relations_iter, batch_size))
-        incollection_book_relations_data_batch = list(islice(incollection_book_relations_iter, batch_size))
-
-        if authors_articles_relations_data_batch:
-            create_relationships(graph_db.auto(), authors_articles_relations_data_batch, "CONTRIBUTED",
-                                 start_node_key=("Author", "name"), end_node_key=("Article", "title", "year"))
-        if authors_inproceedings_relations_data_batch:
-            create_relationships(graph_db.auto(), authors_inproceedings_relations_data_batch, "CONTRIBUTED",
-                                 start_node_key=("Author", "name"), end_node_key=("Inproceedings", "title", "year"))
-        if authors_incollection_relations_data_batch:
-            create_relationships(graph_db.auto(), authors_incollection_relations_data_batch, "CONTRIBUTED",
-                                 start_node_key=("Author", "name"), end_node_key=("Incollection", "title", "year"))
-        if article_journal_relations_data_batch:
-            create_relationships(graph_db.auto(), article_journal_relations_data_batch, "PUBLISHED",
-                                 start_node_key=("Article", "title", "year"), end_node_key=("Journal", "title"))
-        if inproceedings_conference_relations_data_batch:
-            create_relationships(graph_db.auto(), inproceedings_conference_relations_data_batch, "PUBLISHED",
-                                 start_node_key=("Inproceedings", "title", "year"),
-                                 end_node_key=("Conference", "title"))
-        if incollection_book_relations_data_batch:
-            create_relationships(graph_db.auto(), incollection_book_relations_data_batch, "PUBLISHED",
-                                 start_node_key=("Incollection", "title", "year"), end_node_key=("Book", "title"))
-
-        if not any([authors_articles_relations_data_batch, authors_inproceedings_relations_data_batch,
-                    authors_incollection_relations_data_batch, article_journal_relations_data_batch,
-                    inproceedings_conference_relations_data_batch, incollection_book_relations_data_batch]):
+        inserted = False
+        for data, rel_type, start_node_key, end_node_key in RELATIONS_DATA:
+            data_batch = data.take(BATCH_SIZE)
+            if data_batch:
+                create_relationships(graph_db.auto(), data_batch, rel_type,
+                                     start_node_key=start_node_key, end_node_key=end_node_key)
+                inserted = True
+
+        if not inserted:
             break
 
 
+def snapshot_options(args) -> dict:
+    """Returns the options of the import that change the parsed data, so that the snapshot of the data is keyed by them.
+    The snapshot holds the records of all the years, so the year window is not one of them.
+    :param args: The command line arguments
+    :return: The options
+    """
+    options = {name: value for name, value in RecordFilter.from_args(args, all_years=True).options().items()
+               if name not in ("start_year", "end_year")}
+    return {**options, "dtd": file_digest(get_dtd_path(args.dtd[0]))}
+
+
+def save_staged_data(path: str, source: str, options: dict) -> None:
+    """Writes all the staged data to a snapshot, before any of them have been taken
+    :param path: The path of the snapshot
+    :param source: The parsed input file
+    :param options: The options of the import that the snapshot is keyed by
+    :return: None
+    """
+    writer = SnapshotWriter(path, source, options)
+    try:
+        for data, labels in NODES_DATA:
+            writer.write_nodes(next(iter(labels)), data.fields, data.keys, data.properties)
+        for data, rel_type, start_node_key, end_node_key in RELATIONS_DATA:
+            writer.write_relationships(relationships_name(rel_type, start_node_key[0], end_node_key[0]),
+                                       data.columns())
+        writer.write_records(records_data.columns())
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+
+def load_staged_data(snapshot: ParsedSnapshot) -> None:
+    """Replaces the staged data with the memory mapped data of a snapshot, instead of parsing the input file
+    :param snapshot: The snapshot, usually the window of the imported years, see ParsedSnapshot.window
+    :return: None
+    """
+    records_data.clear()
+    for data, labels in NODES_DATA:
+        data.load(*snapshot.nodes(next(iter(labels))))
+    for data, rel_type, start_node_key, end_node_key in RELATIONS_DATA:
+        data.load(snapshot.relationships(relationships_name(rel_type, start_node_key[0], end_node_key[0])))
+
+
+class BatchWriter(ABC):
+    """Drains the staged data in batches while the parsing continues, so that the relationships and the properties of
+    the nodes do not pile up in memory, while the keys of the nodes are kept, see NodeColumns. Nodes are always handed
+    over before the relationships that point at them, even from partially filled batches. Subclasses decide where the
+    batches are written.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+        self.nodes_count = 0
+        self.relationships_count = 0
+
+    def flush(self, force: bool = False) -> None:
+        """Writes the full batches of the extracted data and removes them from the staged data
+        :param force: Write all extracted data, even if the batches are not full
+        :return: None
+        """
+        relations_ready = force or any(len(data) >= self.batch_size for data, _, _, _ in RELATIONS_DATA)
+        for data, labels in NODES_DATA:
+            for data_batch in self._batches(data, relations_ready):
+                self.write_nodes(data_batch, labels)
+                self.nodes_count += len(data_batch)
+
+        if not relations_ready:
+            return
+
+        self.wait_for_nodes()
+        for data, rel_type, start_node_key, end_node_key in RELATIONS_DATA:
+            for data_batch in self._batches(data, force):
+                self.write_relationships(data_batch, rel_type, start_node_key, end_node_key)
+                self.relationships_count += len(data_batch)
+
+    def _batches(self, data, force: bool) -> Iterator[list]:
+        # Only full batches, unless forced, so that the data of a loaded snapshot are written in batches too
+        while len(data) >= self.batch_size or (force and len(data)):
+            yield data.take(self.batch_size)
+
+    def close(self) -> None:
+        """Writes the remaining data
+        :return: None
+        """
+        self.flush(force=True)
+
+    def wait_for_nodes(self) -> None:
+        """Waits until the handed over nodes are written, for the writers that may write a relationship before the
+        nodes that it points at
+        :return: None
+        """
+
+    @abstractmethod
+    def write_nodes(self, data_batch: list, labels: set) -> None:
+        """Writes a batch of nodes
+        :param data_batch: The properties of every node
+        :param labels: The labels of the nodes
+        :return: None
+        """
+
+    @abstractmethod
+    def write_relationships(self, data_batch: list, rel_type: str, start_node_key: tuple, end_node_key: tuple) -> None:
+        """Writes a batch of relationships
+        :param data_batch: The key of the start node, the properties and the key of the end node of every relationship
+        :param rel_type: The type of the relationships
+        :param start_node_key: The label and the key field of the start nodes
+        :param end_node_key: The label and the key field of the end nodes
+        :return: None
+        """
+
+
+class SeedingPipeline(BatchWriter):
+    """Writes the extracted data to the database while the parsing continues. The parser hands full batches over to a
+    writer thread through a bounded queue, so it blocks whenever the database falls behind and only a few batches wait
+    for the writer. The single writer commits the batches in queue order, so nodes are committed before the
+    relationships that point at them.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, queue_size: int = 8):
+        super().__init__(batch_size)
+        self.queue = Queue(maxsize=queue_size)
+        self.writer = Thread(target=self._write, name="seeding-pipeline-writer", daemon=True)
+        self.error = None
+
+    def start(self) -> None:
+        """Starts the writer thread
+        :return: None
+        """
+        self.writer.start()
+
+    def flush(self, force: bool = False) -> None:
+        if self.error is not None:
+            raise RuntimeError("Seeding pipeline writer failed") from self.error
+        super().flush(force)
+
+    def close(self) -> None:
+        """Queues the remaining data and waits until everything has been written to the database
+        :return: None
+        """
+        super().close()
+        self.queue.put(None)
+        self.writer.join()
+        if self.error is not None:
+            raise RuntimeError("Seeding pipeline writer failed") from self.error
+
+    def write_nodes(self, data_batch: list, labels: set) -> None:
+        # Blocks while the queue is full, which throttles the parser to the speed of the database
+        self.queue.put(("nodes", data_batch, labels))
+
+    def write_relationships(self, data_batch: list, rel_type: str, start_node_key: tuple, end_node_key: tuple) -> None:
+        self.queue.put(("relationships", data_batch, rel_type, start_node_key, end_node_key))
+
+    def _write(self) -> None:
+        graph_db = next(get_db())
+
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                # Keep draining the queue so that the parser does not block forever
+                continue
+            try:
+                if item[0] == "nodes":
+                    _, data_batch, labels = item
+                    create_nodes(graph_db.auto(), data=data_batch, labels=labels)
+                else:
+                    _, data_batch, rel_type, start_node_key, end_node_key = item
+                    create_relationships(graph_db.auto(), data_batch, rel_type,
+                                         start_node_key=start_node_key, end_node_key=end_node_key)
+            except Exception as e:
+                self.error = e
+
+
+class AdaptiveBatchSize:
+    """Tunes the number of rows per transaction so that the commits take about the target time. After every commit
+    the size moves halfway towards the rows that the commit would have written in the target time, at most doubling,
+    and it is halved after a failed commit.
+    """
+
+    def __init__(self, size: int, target_seconds: float, minimum: int = 100, maximum: int = 100000):
+        self.size = size
+        self.target_seconds = target_seconds
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def update(self, rows: int, seconds: float) -> None:
+        """Adjusts the size after a commit
+        :param rows: The rows of the committed transaction
+        :param seconds: The time that the transaction took
+        :return: None
+        """
+        ideal = rows * self.target_seconds / max(seconds, 0.001)
+        self.size = int(min(max((self.size + ideal) / 2, self.minimum), self.size * 2, self.maximum))
+
+    def shrink(self) -> None:
+        """Halves the size after a failed commit
+        :return: None
+        """
+        self.size = max(self.minimum, self.size // 2)
+
+
+class ParallelSeeder(BatchWriter):
+    """Writes the extracted data to the database with several writer threads, each with its own connection and queue.
+    The relationships are partitioned by their start node, so every start node is only locked by a single writer, and
+    the relationships of every transaction are sorted by their end node, so the writers lock the shared end nodes in
+    the same order and never wait for each other in a cycle. The nodes do not contend and are split evenly, but all of
+    them are committed before any relationship is handed over.
+
+    Every writer tunes its transaction size to the observed commit latency and retries the transactions that fail with
+    a transient error, e.g. a lock timeout or a deadlock, with a smaller size after a random backoff.
+    """
+
+    def __init__(self, workers: int, batch_size: int = BATCH_SIZE, max_batch_size: int = 4 * BATCH_SIZE,
+                 queue_size: int = 8, target_seconds: float = 1.0, retries: int = 5):
+        # Every writer gets up to the largest transaction size from each batch that is handed over
+        super().__init__(max_batch_size * workers)
+        self.initial_batch_size = batch_size
+        self.max_batch_size = max_batch_size
+        self.target_seconds = target_seconds
+        self.retries = retries
+        self.queues = [Queue(maxsize=queue_size) for _ in range(workers)]
+        self.writers = [Thread(target=self._write, args=(queue,), name=f"parallel-seeder-writer-{it}", daemon=True)
+                        for it, queue in enumerate(self.queues)]
+        self.error = None
+        self.nodes_pending = False
+        self.lock = Lock()
+        # The rows, the start of the first and the end of the last commit of every label and relationship type
+        self.statistics = {}
+        self.retries_count = 0
+
+    def start(self) -> None:
+        """Starts the writer threads
+        :return: None
+        """
+        for writer in self.writers:
+            writer.start()
+
+    def flush(self, force: bool = False) -> None:
+        if self.error is not None:
+            raise RuntimeError("Parallel seeder writer failed") from self.error
+        super().flush(force)
+
+    def close(self) -> None:
+        """Queues the remaining data and waits until everything has been written to the database
+        :return: None
+        """
+        super().close()
+        for queue in self.queues:
+            queue.put(None)
+        for writer in self.writers:
+            writer.join()
+        if self.error is not None:
+            raise RuntimeError("Parallel seeder writer failed") from self.error
+
+    def write_nodes(self, data_batch: list, labels: set) -> None:
+        size = math.ceil(len(data_batch) / len(self.queues))
+        for queue, it in zip(self.queues, range(0, len(data_batch), size)):
+            queue.put(("nodes", data_batch[it:it + size], labels))
+        self.nodes_pending = True
+
+    def wait_for_nodes(self) -> None:
+        if self.nodes_pending:
+            for queue in self.queues:
+                queue.join()
+            self.nodes_pending = False
+
+    def write_relationships(self, data_batch: list, rel_type: str, start_node_key: tuple, end_node_key: tuple) -> None:
+        partitions = [[] for _ in self.queues]
+        for row in data_batch:
+            partitions[hash(row[0]) % len(partitions)].append(row)
+        for queue, rows in zip(self.queues, partitions):
+            if rows:
+                rows.sort(key=lambda row: row[2])
+                queue.put(("relationships", rows, rel_type, start_node_key, end_node_key))
+
+    def report(self) -> List[dict]:
+        """Returns the throughput of every label and relationship type
+        :return: The written rows and the rows per second, from the start of their first commit to the end of their
+        last one
+        """
+        return [{"name": name, "rows": rows, "rows_per_s": rows / max(last_end - first_start, 0.001)}
+                for name, (rows, first_start, last_end) in self.statistics.items()]
+
+    def _write(self, queue: Queue) -> None:
+        graph_db = next(get_db())
+        sizes = {kind: AdaptiveBatchSize(self.initial_batch_size, self.target_seconds, maximum=self.max_batch_size)
+                 for kind in ("nodes", "relationships")}
+
+        while True:
+            item = queue.get()
+            try:
+                if item is None:
+                    break
+                # Keep draining the queue after a failure so that the parser does not block forever
+                if self.error is None:
+                    self._write_rows(graph_db, item, sizes[item[0]])
+            except Exception as e:
+                self.error = e
+            finally:
+                queue.task_done()
+
+    def _write_rows(self, graph_db, item: tuple, size: AdaptiveBatchSize) -> None:
+        if item[0] == "nodes":
+            _, rows, labels = item
+            name = next(iter(labels))
+
+            def write(tx, chunk: list) -> None:
+                create_nodes(tx, data=chunk, labels=labels)
+        else:
+            _, rows, rel_type, start_node_key, end_node_key = item
+            name = f"{start_node_key[0]}-{rel_type}->{end_node_key[0]}"
+
+            def write(tx, chunk: list) -> None:
+                create_relationships(tx, chunk, rel_type, start_node_key=start_node_key, end_node_key=end_node_key)
+
+        it = 0
+        attempt = 0
+        while it < len(rows):
+            chunk = rows[it:it + size.size]
+            start = time.perf_counter()
+            tx = graph_db.begin()
+            try:
+                write(tx, chunk)
+                graph_db.commit(tx)
+            except TransientError:
+                graph_db.rollback(tx)
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+                with self.lock:
+                    self.retries_count += 1
+                size.shrink()
+                time.sleep(random.uniform(0, RETRY_DELAY * 2 ** attempt))
+                continue
+
+            end = time.perf_counter()
+            size.update(len(chunk), end - start)
+            it += len(chunk)
+            attempt = 0
+            with self.lock:
+                rows_count, first_start, _ = self.statistics.get(name, (0, start, end))
+                self.statistics[name] = (rows_count + len(chunk), min(first_start, start), end)
+
+
+class CsvPartsWriter:
+    """Writes the rows of a label or a relationship to a header file and to gzipped CSV part files"""
+
+    def __init__(self, output_dir: str, prefix: str, header: list, part_size: int):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.part_size = part_size
+        self.files = [f"{prefix}-header.csv"]
+        self.part = None
+        self.writer = None
+        self.rows_count = 0
+
+        with open(os.path.join(output_dir, self.files[0]), "w", newline="") as f:
+            csv.writer(f).writerow(header)
+
+    def write(self, rows: Iterator[list]) -> None:
+        """Appends the rows to the current part file, starting a new one when it is full
+        :param rows: The rows to write
+        :return: None
+        """
+        for row in rows:
+            if self.part is None or self.rows_count >= self.part_size:
+                self.close()
+                part_file = f"{self.prefix}-part-{len(self.files) - 1:05d}.csv.gz"
+                self.part = gzip.open(os.path.join(self.output_dir, part_file), "wt", newline="", encoding="utf-8")
+                self.writer = csv.writer(self.part)
+                self.rows_count = 0
+                self.files.append(part_file)
+            self.writer.writerow(row)
+            self.rows_count += 1
+
+    def close(self) -> None:
+        """Closes the current part file
+        :return: None
+        """
+        if self.part is not None:
+            self.part.close()
+            self.part = None
+
+
+class CsvExporter(BatchWriter):
+    """Writes the extracted data to gzipped CSV files in the format that `neo4j-admin import` expects, instead of
+    seeding the database. Authors and venues are identified by their name/title and publications by the key of their
+    DBLP record, each label in its own ID space.
+    """
+
+    def __init__(self, output_dir: str, part_size: int = 1000000, batch_size: int = BATCH_SIZE):
+        super().__init__(batch_size)
+        self.output_dir = output_dir
+        self.part_size = part_size
+        self.nodes_writers = {}
+        self.relationships_writers = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write_nodes(self, data_batch: list, labels: set) -> None:
+        label = next(iter(labels))
+        if label not in self.nodes_writers:
+            if label == "Author":
+                header = ["name:ID(Author)"]
+            elif label == "Incollection":
+                header = ["key:ID(Incollection)", "title", "year", "mdate", "publisher"]
+            elif label in PUBLICATION_LABELS:
+                header = [f"key:ID({label})", "title", "year", "mdate"]
+            else:
+                header = [f"title:ID({label})"]
+            self.nodes_writers[label] = CsvPartsWriter(self.output_dir, label, header, self.part_size)
+
+        if label == "Author":
+            rows = ([node["name"]] for node in data_batch)
+        elif label == "Incollection":
+            rows = ([node["key"], node["title"], node["year"], node["mdate"], node.get("publisher", "")]
+                    for node in data_batch)
+        elif label in PUBLICATION_LABELS:
+            rows = ([node["key"], node["title"], node["year"], node["mdate"]] for node in data_batch)
+        else:
+            rows = ([node["title"]] for node in data_batch)
+        self.nodes_writers[label].write(rows)
+
+    def write_relationships(self, data_batch: list, rel_type: str, start_node_key: tuple, end_node_key: tuple) -> None:
+        key = (rel_type, start_node_key[0], end_node_key[0])
+        if key not in self.relationships_writers:
+            header = [f":START_ID({start_node_key[0]})", f":END_ID({end_node_key[0]})"]
+            if rel_type == "CONTRIBUTED":
+                header += ["start_page:int", "end_page:int", "total_pages:int", "first_author:boolean",
+                           "last_author:boolean"]
+            self.relationships_writers[key] = CsvPartsWriter(self.output_dir, "-".join(key), header, self.part_size)
+
+        if rel_type == "CONTRIBUTED":
+            # Missing properties are written as empty fields, which neo4j-admin skips
+            rows = ([name, key, rel_dict.get("start_page", ""), rel_dict.get("end_page", ""),
+                     rel_dict.get("total_pages", ""), "true" if rel_dict.get("first_author") else "",
+                     "true" if rel_dict.get("last_author") else ""]
+                    for name, rel_dict, key in data_batch)
+        else:
+            rows = ([key, venue] for key, _, venue in data_batch)
+        self.relationships_writers[key].write(rows)
+
+    def close(self) -> None:
+        """Writes the remaining data, closes the CSV files and writes the import script
+        :return: None
+        """
+        super().close()
+
+        arguments = ["neo4j-admin import", "--database=neo4j", "--multiline-fields=true"]
+        for label, writer in self.nodes_writers.items():
+            writer.close()
+            arguments.append(f"--nodes={label}=" + ",".join(writer.files))
+        for (rel_type, _, _), writer in self.relationships_writers.items():
+            writer.close()
+            arguments.append(f"--relationships={rel_type}=" + ",".join(writer.files))
+
+        with open(os.path.join(self.output_dir, "import.sh"), "w") as f:
+            f.write("#!/bin/sh\n# Run from this directory while the database is stopped\n")
+            f.write(" \\\n    ".join(arguments) + "\n")
+
+
+class SqliteExporter(BatchWriter):
+    """Writes the extracted data to the local SQLite store that the sqlite query backend answers from, instead of
+    seeding the database. Every label has its own table and the relationships find their nodes through the same keys
+    as the bulk insert, so the store holds the same graph as a seeded database.
+    """
+
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE, workers: int = 1):
+        super().__init__(batch_size)
+        self.workers = workers
+        if os.path.exists(path):
+            os.remove(path)
+        self.connection = sqlite3.connect(path)
+        # The store is rebuilt from scratch if the export fails, so it does not need a journal
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        create_tables(self.connection)
+
+    def write_nodes(self, data_batch: list, labels: set) -> None:
+        label = next(iter(labels))
+        if label == "Author":
+            self.connection.executemany("INSERT OR IGNORE INTO authors (name) VALUES (?)",
+                                        ((node["name"],) for node in data_batch))
+        elif label in PUBLICATION_LABELS:
+            self.connection.executemany("INSERT OR IGNORE INTO publications (label, key, title, year, mdate) "
+                                        "VALUES (?, ?, ?, ?, ?)",
+                                        ((label, node["key"], node["title"], node["year"], node["mdate"])
+                                         for node in data_batch))
+        else:
+            self.connection.executemany("INSERT OR IGNORE INTO venues (label, title) VALUES (?, ?)",
+                                        ((label, node["title"]) for node in data_batch))
+        self.connection.commit()
+
+    def write_relationships(self, data_batch: list, rel_type: str, start_node_key: tuple, end_node_key: tuple) -> None:
+        if rel_type == "CONTRIBUTED":
+            self.connection.executemany(
+                "INSERT INTO contributions (author, publication, start_page, end_page, total_pages, first_author, "
+                "last_author) "
+                "SELECT a.id, n.id, ?, ?, ?, ?, ? FROM authors a, publications n "
+                "WHERE a.name = ? AND n.key = ?",
+                ((rel_dict.get("start_page"), rel_dict.get("end_page"), rel_dict.get("total_pages"),
+                  bool(rel_dict.get("first_author")), bool(rel_dict.get("last_author")), name, key)
+                 for name, rel_dict, key in data_batch))
+        else:
+            self.connection.executemany(
+                "INSERT INTO published (publication, venue) "
+                "SELECT n.id, v.id FROM publications n, venues v "
+                "WHERE n.key = ? AND v.label = ? AND v.title = ?",
+                ((key, end_node_key[0], venue) for key, _, venue in data_batch))
+        self.connection.commit()
+
+    def close(self) -> None:
+        """Writes the remaining data, creates the indices and the co-author tables of the store and closes it
+        :return: None
+        """
+        super().close()
+        create_table_indices(self.connection, self.workers)
+        self.connection.close()
+
+
+class DeltaImporter:
+    """Writes only the records that changed since the previous import. Every committed record is kept in a local
+    SQLite manifest along with a fingerprint of its fields, so unchanged records are skipped, changed records replace
+    their previous version and records that disappeared from the dump are removed at the end of the import.
+
+    Every batch is written in a single transaction that also creates an ImportBatch marker node. The batch is staged as
+    pending in the manifest before the transaction and is moved into the manifest after it, so a crash at any point is
+    resolved on the next run by checking for the marker and the import resumes after the last committed batch.
+    """
+
+    def __init__(self, manifest_path: str, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+        self.graph_db = next(get_db())
+        self.manifest = sqlite3.connect(manifest_path)
+        self.manifest.executescript(
+            "CREATE TABLE IF NOT EXISTS records (key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, "
+            "record TEXT NOT NULL, seen INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS pending (batch TEXT NOT NULL, key TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+            "record TEXT NOT NULL, seen INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY AUTOINCREMENT, started REAL NOT NULL, "
+            "finished REAL);"
+        )
+        self.recover()
+        if self.manifest.execute("SELECT count(*) FROM records").fetchone()[0] == 0:
+            # Like the full import, the first delta import starts from a clean database
+            clean_database()
+
+        self.run_id = self.manifest.execute("INSERT INTO runs (started) VALUES (?)", (time.time(),)).lastrowid
+        self.manifest.commit()
+        self.batches_count = 0
+        self.records = []
+        self.unchanged_count = 0
+        self.created_count = 0
+        self.updated_count = 0
+        self.removed_count = 0
+
+    def recover(self) -> None:
+        """Resolves the batches that were pending when a previous import stopped
+        :return: None
+        """
+        for (batch_id,) in self.manifest.execute("SELECT DISTINCT batch FROM pending").fetchall():
+            if self.graph_db.evaluate("MATCH (b:ImportBatch {id: $id}) RETURN count(b) > 0", id=batch_id):
+                self._commit_pending(batch_id)
+            else:
+                self.manifest.execute("DELETE FROM pending WHERE batch = ?", (batch_id,))
+                self.manifest.commit()
+
+    def store(self, record: ParsedRecord) -> None:
+        """Buffers an extracted record and writes the buffered records once a batch is full
+        :param record: The extracted record
+        :return: None
+        """
+        self.records.append(record)
+        if len(self.records) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Compares the buffered records with the manifest and writes the new and changed ones
+        :return: None
+        """
+        records, self.records = self.records, []
+        if not records:
+            return
+
+        previous = {}
+        keys = [record.key for record in records]
+        for it in range(0, len(keys), 500):
+            chunk = keys[it:it + 500]
+            previous.update((key, (fingerprint, record)) for key, fingerprint, record in self.manifest.execute(
+                f"SELECT key, fingerprint, record FROM records WHERE key IN ({','.join('?' * len(chunk))})", chunk))
+
+        unchanged = []
+        changed = []
+        for record in records:
+            encoded = json.dumps(record)
+            fingerprint = hashlib.sha1(encoded.encode()).hexdigest()
+            if record.key in previous and previous[record.key][0] == fingerprint:
+                unchanged.append((self.run_id, record.key))
+                continue
+            old_record = ParsedRecord(*json.loads(previous[record.key][1])) if record.key in previous else None
+            changed.append((record, old_record, fingerprint, encoded))
+
+        self.manifest.executemany("UPDATE records SET seen = ? WHERE key = ?", unchanged)
+        self.manifest.commit()
+        self.unchanged_count += len(unchanged)
+        if changed:
+            self._write_batch(changed)
+
+    def close(self) -> None:
+        """Writes the remaining records and removes the records that are no longer part of the dump
+        :return: None
+        """
+        self.flush()
+
+        while True:
+            rows = self.manifest.execute("SELECT key, record FROM records WHERE seen < ? LIMIT ?",
+                                         (self.run_id, self.batch_size)).fetchall()
+            if not rows:
+                break
+            tx = self.graph_db.begin()
+            retract_records(tx, [ParsedRecord(*json.loads(record)) for _, record in rows])
+            self.graph_db.commit(tx)
+            self.manifest.executemany("DELETE FROM records WHERE key = ?", [(key,) for key, _ in rows])
+            self.manifest.commit()
+            self.removed_count += len(rows)
+
+        self.manifest.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), self.run_id))
+        self.manifest.commit()
+        self.manifest.close()
+
+    def _write_batch(self, changed: list) -> None:
+        self.batches_count += 1
+        batch_id = f"{self.run_id}-{self.batches_count}"
+        self.manifest.executemany("INSERT INTO pending (batch, key, fingerprint, record, seen) VALUES (?, ?, ?, ?, ?)",
+                                  [(batch_id, record.key, fingerprint, encoded, self.run_id)
+                                   for record, _, fingerprint, encoded in changed])
+        self.manifest.commit()
+
+        tx = self.graph_db.begin()
+        retract_records(tx, [old_record for _, old_record, _, _ in changed if old_record is not None])
+        merge_records(tx, [record for record, _, _, _ in changed])
+        tx.run("CREATE (:ImportBatch {id: $id})", id=batch_id)
+        self.graph_db.commit(tx)
+
+        self._commit_pending(batch_id)
+        self.updated_count += sum(1 for _, old_record, _, _ in changed if old_record is not None)
+        self.created_count += sum(1 for _, old_record, _, _ in changed if old_record is None)
+
+    def _commit_pending(self, batch_id: str) -> None:
+        self.manifest.execute("INSERT OR REPLACE INTO records (key, fingerprint, record, seen) "
+                              "SELECT key, fingerprint, record, seen FROM pending WHERE batch = ?", (batch_id,))
+        self.manifest.execute("DELETE FROM pending WHERE batch = ?", (batch_id,))
+        self.manifest.commit()
+        self.graph_db.run("MATCH (b:ImportBatch {id: $id}) DELETE b", id=batch_id)
+
+
+def merge_records(tx, records: List[ParsedRecord]) -> None:
+    """Writes the nodes and the relationships of the given records, merging with the nodes that already exist
+    :param tx: The database transaction
+    :param records: The records to write
+    :return: None
+    """
+    authors = {author for record in records for author in record.authors}
+    if authors:
+        merge_nodes(tx, [{"name": author} for author in authors], merge_key=("Author", "name"))
+
+    for tag, (publication_label, venue_label) in RECORD_LABELS.items():
+        tag_records = [record for record in records if record.tag == tag]
+        if not tag_records:
+            continue
+
+        publications = {}
+        for record in tag_records:
+            publication = {"key": record.key, "title": record.title, "year": record.year, "mdate": record.mdate}
+            if record.publisher:
+                publication["publisher"] = record.publisher
+            publications.setdefault(record.key, publication)
+        merge_nodes(tx, list(publications.values()), merge_key=(publication_label, "key"))
+        merge_nodes(tx, [{"title": venue} for venue in {record.venue for record in tag_records}],
+                    merge_key=(venue_label, "title"))
+
+        contributions = []
+        for record in tag_records:
+            associate_authors_with_publications(record.authors, record.key, contributions,
+                                                extract_pages_info(record.pages))
+        create_relationships(tx, contributions, "CONTRIBUTED", start_node_key=("Author", "name"),
+                             end_node_key=(publication_label, "key"))
+        create_relationships(tx, [(record.key, {}, record.venue) for record in tag_records],
+                             "PUBLISHED", start_node_key=(publication_label, "key"),
+                             end_node_key=(venue_label, "title"))
+
+
+def retract_records(tx, records: List[ParsedRecord]) -> None:
+    """Removes the publications of the given records along with their relationships, and the venues and the authors
+    that are left without any relationship
+    :param tx: The database transaction
+    :param records: The records to remove
+    :return: None
+    """
+    for tag, (publication_label, venue_label) in RECORD_LABELS.items():
+        tag_records = [record for record in records if record.tag == tag]
+        if not tag_records:
+            continue
+
+        # Every publication is the node of a single record, found through the unique constraint of its key
+        tx.run(f"UNWIND $keys AS key "
+               f"MATCH (p:{publication_label} {{key: key}}) "
+               f"DETACH DELETE p", keys=[record.key for record in tag_records])
+        tx.run(f"UNWIND $titles AS title "
+               f"MATCH (v:{venue_label} {{title: title}}) "
+               f"WHERE NOT (v)--() "
+               f"DELETE v", titles=list({record.venue for record in tag_records}))
+
+    # The CO_AUTHORED relationships of the authors are rebuilt after the import
+    tx.run("UNWIND $names AS name "
+           "MATCH (a:Author {name: name}) "
+           "WHERE NOT (a)-[:CONTRIBUTED]->() "
+           "DETACH DELETE a", names=list({author for record in records for author in record.authors}))
+
+
+def read_contributions() -> List[Contribution]:
+    """Reads all the CONTRIBUTED relationships of the database along with their publications
+    :return: The contributions
+    """
+    # Get database connection
+    graph_db = next(get_db())
+    cursor = graph_db.run("MATCH (a:Author)-[r:CONTRIBUTED]->(n) "
+                          "RETURN a.name, id(n), labels(n)[0], n.year, r.start_page, r.end_page, "
+                          "coalesce(r.first_author, false)")
+    return [Contribution(*record) for record in cursor]
+
+
+def precompute_statistics(contributions: List[Contribution]) -> None:
+    """Computes the statistics of the leaderboard queries for every author and stores them as indexed properties of
+    the authors and as AuthorYearStats nodes, so that the queries read them instead of aggregating every relationship
+    :param contributions: All the contributions of the database
+    :return: None
+    """
+    # Get database connection
+    graph_db = next(get_db())
+    author_rows, author_year_rows = compute_author_statistics(contributions)
+
+    # Every statistic is set, even when missing, so that the values of a previous import are removed
+    statistics = ", ".join(f"a.{statistic} = row.{statistic}" for statistic in AUTHOR_STATISTICS + AUTHOR_YEARS)
+    for it in range(0, len(author_rows), BATCH_SIZE):
+        graph_db.run(f"UNWIND $rows AS row "
+                     f"MATCH (a:Author {{name: row.name}}) "
+                     f"SET {statistics}", rows=author_rows[it:it + BATCH_SIZE])
+
+    while graph_db.evaluate("MATCH (s:AuthorYearStats) WITH s LIMIT $limit DELETE s RETURN count(*)",
+                            limit=BATCH_SIZE * 10):
+        pass
+    for it in range(0, len(author_year_rows), BATCH_SIZE):
+        create_nodes(graph_db.auto(), data=author_year_rows[it:it + BATCH_SIZE], labels={"AuthorYearStats"})
+
+
+def precompute_triads(contributions: List[Contribution], workers: int) -> None:
+    """Computes the open triads and the friends of friends of every author in the co-authorship graph and stores them as
+    indexed properties of the authors, so that queries 7 and 9 read them instead of expanding every pair of co-authors
+    :param contributions: All the contributions of the database
+    :param workers: The number of worker processes
+    :return: None
+    """
+    # Get database connection
+    graph_db = next(get_db())
+    author_rows = compute_triads(build_co_author_graph(contributions), workers)
+
+    # Every statistic is set, even for the authors without co-authors, so that the values of a previous import are
+    # removed
+    names = {row["name"] for row in author_rows}
+    author_rows += [{"name": name, **{statistic: None for statistic in TRIAD_STATISTICS}}
+                    for name in {contribution.name for contribution in contributions} - names]
+    statistics = ", ".join(f"a.{statistic} = row.{statistic}" for statistic in TRIAD_STATISTICS)
+    for it in range(0, len(author_rows), BATCH_SIZE):
+        graph_db.run(f"UNWIND $rows AS row "
+                     f"MATCH (a:Author {{name: row.name}}) "
+                     f"SET {statistics}", rows=author_rows[it:it + BATCH_SIZE])
+
+
+def create_co_authorships(contributions: List[Contribution]) -> None:
+    """Replaces the CO_AUTHORED relationships of the authors with ones computed from the current contributions. Each
+    relationship keeps the number of co-authorships per year and the types of the co-authored publications, so that the
+    co-authorship queries traverse a single relationship instead of comparing the pages of two CONTRIBUTED ones.
+    :param contributions: All the contributions of the database
+    :return: None
+    """
+    # Get database connection
+    graph_db = next(get_db())
+    while graph_db.evaluate("MATCH ()-[r:CO_AUTHORED]->() WITH r LIMIT $limit DELETE r RETURN count(*)",
+                            limit=BATCH_SIZE * 10):
+        pass
+
+    relationships = compute_co_authorships(contributions)
+    for it in range(0, len(relationships), BATCH_SIZE):
+        create_relationships(graph_db.auto(), relationships[it:it + BATCH_SIZE], "CO_AUTHORED",
+                             start_node_key=("Author", "name"), end_node_key=("Author", "name"))
+
+
+def post_process(args) -> None:
+    """Derives the precomputed data of the queries from the imported contributions, unless skipped
+    :param args: The parsed arguments
+    :return: None
+    """
+    if args.skip_statistics and args.skip_co_authorships:
+        return
+    contributions = read_contributions()
+    if not args.skip_statistics:
+        precompute_statistics(contributions)
+        precompute_triads(contributions, args.workers)
+    if not args.skip_co_authorships:
+        create_co_authorships(contributions)
+
+
 def extract_pages_info(pages: str) -> dict:
     """Extracts the total number of pages given string input in format <digit>-<digit>
     :param pages: The pages range
@@ -200,15 +1466,13 @@ def extract_pages_info(pages: str) -> dict:
 
 
 def associate_authors_with_publications(authors_names: list,
-                                        title: str,
-                                        year: str,
+                                        key: str,
                                         data_list: list,
                                         pages_dict: dict
                                         ) -> None:
     """Makes association list of authors with a publication
     :param authors_names: The names of the authors in list
-    :param title: The title of the publication
-    :param year: The year of the publication
+    :param key: The key of the DBLP record of the publication
     :param data_list: The list that contains existing relations in order to append a new one
     :param pages_dict: The pages dictionary
     :return: None
@@ -220,123 +1484,157 @@ def associate_authors_with_publications(authors_names: list,
             rel_dict.update({'first_author': True})
         elif it == len(authors_names) - 1:
             rel_dict.update({'last_author': True})
-        data_list.append((author_name, rel_dict, (title, year)))
+        data_list.append((author_name, rel_dict, key))
 
 
-def extract_authors(authors: list) -> list:
-    """Extracts authors to data list in order to be stored in bulk insert and returns a list with their names
-    :param authors: The authors list parsed from the XML
-    :return: List of the names of the authors
+def extract_authors(authors: list) -> List[int]:
+    """Stages the authors that have not been seen before in order to be stored in bulk insert and returns their ids
+    :param authors: The names of the authors parsed from the XML
+    :return: List of the ids of the authors
+    """
+    return [authors_data.add(sys.intern(author)) for author in authors]
+
+
+def get_dtd_path(dtd_file: str) -> str:
+    """Returns the absolute path of the DTD file
+    :param dtd_file: DTD file in order to parse correctly the XML
+    :return: The absolute path of the DTD file
     """
-    authors_names = []
-    for author in authors:
-        author_dict = {"name": author.text}
-        authors_names.append(author.text)
-        if author.text not in authors_names_set:
-            authors_names_set.add(author.text)
-            authors_data.append(author_dict)
-    return authors_names
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), dtd_file)
 
 
-def import_data(article_xml: str, dtd_file: str) -> None:
+class DTDResolver(etree.Resolver):
+    """Resolves the DTD that is referenced by the DOCTYPE of the xml file to the given DTD file"""
+
+    def __init__(self, dtd_path: str):
+        super().__init__()
+        self.dtd_path = dtd_path
+
+    def resolve(self, system_url, public_id, context):
+        if system_url and system_url.endswith(".dtd"):
+            return self.resolve_filename(self.dtd_path, context)
+        return None
+
+
+def import_data(article_xml: str, dtd_file: str, store: Callable[[ParsedRecord], None] = None,
+                record_filter: Optional[RecordFilter] = None) -> None:
     """Given a XML entity, parses the required fields in order to store them to the database
     :param article_xml: The entity XML
     :param dtd_file: DTD file in order to parse correctly the XML
+    :param store: The function that stores the extracted record, store_record by default
+    :param record_filter: The filter of the imported records, the default options if None
     :return: None
     """
     # Parse xml element
-    dtd_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), dtd_file)
-    dtd = f"<!DOCTYPE dblp SYSTEM '{dtd_path}'>"
+    dtd = f"<!DOCTYPE dblp SYSTEM '{get_dtd_path(dtd_file)}'>"
     xml = dtd + article_xml
     parser = etree.XMLParser(load_dtd=True)
     tree = etree.fromstring(xml, parser=parser)
+    import_record(tree, store, record_filter)
 
-    authors = tree.xpath("//author")
-    title = tree.xpath("//title")
-    year = tree.xpath("//year")
-    pages = tree.xpath("//pages")
-
-    if not (authors and title and year and pages and title[0].text and year[0].text and pages[0].text):
-        return
 
-    title = title[0].text
-    year = year[0].text
-    pages = pages[0].text
-
-    # Select papers between 2009 - 2015
-    if not "2009" < year < "2015":
-        return
-
-    publication_dict = {"title": title, "year": year}
-
-    if tree.tag == "article":
-        journal = tree.xpath("//journal")
-        if journal and journal[0].text:
-            authors_names = extract_authors(authors)
-            if f'{title + year}' not in article_titles_set:
-                article_titles_set.add(f'{title + year}')
-                article_data.append(publication_dict)
-
-            if f'{journal[0].text}' not in journal_titles_set:
-                journal_titles_set.add(f'{journal[0].text}')
-                journal_data.append({'title': journal[0].text})
-
-            article_journal_relations_data.append(((title, year), {}, journal[0].text))
-
-            associate_authors_with_publications(authors_names, title, year, authors_article_relations_data,
-                                                extract_pages_info(pages))
-
-    elif tree.tag == "inproceedings":
-        booktitle = tree.xpath("//booktitle")
+def import_record(tree: etree.ElementBase, store: Callable[[ParsedRecord], None] = None,
+                  record_filter: Optional[RecordFilter] = None) -> None:
+    """Given a parsed XML entity, extracts the required fields in order to store them to the database
+    :param tree: The parsed entity element
+    :param store: The function that stores the extracted record, store_record by default
+    :param record_filter: The filter of the imported records, the default options if None
+    :return: None
+    """
+    record_filter = record_filter or RecordFilter()
+    record = filter_record(tree, record_filter)
+    if isinstance(record, str):
+        record_filter.rejected[record] += 1
+    else:
+        (store or store_record)(record)
 
-        if booktitle and booktitle[0].text:
-            authors_names = extract_authors(authors)
-            if f'{title + year}' not in inproceedings_titles_set:
-                inproceedings_titles_set.add(f'{title + year}')
-                inproceedings_data.append(publication_dict)
 
-            if booktitle[0].text not in conference_titles_set:
-                conference_titles_set.add(booktitle[0].text)
-                conference_data.append({'title': booktitle[0].text})
+def filter_record(tree: etree.ElementBase, record_filter: RecordFilter) -> Union[ParsedRecord, str]:
+    """Extracts the required fields of a parsed XML entity and checks them. This function does not touch any of the
+    module state, so it can run in worker processes.
+    :param tree: The parsed entity element
+    :param record_filter: The filter of the imported records
+    :return: The extracted record or the rule that rejects it
+    """
+    record = extract_record(tree)
+    if record is None:
+        return "incomplete"
+    return record_filter.check_record(record) or record
 
-            inproceedings_conference_relations_data.append(
-                ((title, year), {}, booktitle[0].text))
 
-            associate_authors_with_publications(authors_names, title, year, authors_inproceedings_relations_data,
-                                                extract_pages_info(pages))
+def extract_record(tree: etree.ElementBase) -> Optional[ParsedRecord]:
+    """Extracts the required fields of a parsed XML entity. This function does not touch any of the module state, so
+    it can run in worker processes.
+    :param tree: The parsed entity element
+    :return: The extracted record or None if the entity misses a field that the graph needs
+    """
+    authors = tree.xpath(".//author")
+    title = tree.xpath(".//title")
+    year = tree.xpath(".//year")
+    pages = tree.xpath(".//pages")
 
-    elif tree.tag == "incollection":
-        booktitle = tree.xpath("//booktitle")
-        publisher = tree.xpath("//publisher")
+    if not (tree.get("key") and authors and title and year and title[0].text and year[0].text):
+        return None
 
-        if booktitle and booktitle[0].text:
-            authors_names = extract_authors(authors)
-            if f'{title + year}' not in incollection_titles_set:
-                incollection_titles_set.add(f'{title + year}')
-                if publisher and publisher[0].text:
-                    publication_dict.update({'publisher': publisher[0].text})
-                incollection_data.append(publication_dict)
+    title = title[0].text
+    year = year[0].text
+    # Whether the pages are required is up to the record filter
+    pages = (pages[0].text or "") if pages else ""
 
-            if booktitle[0].text not in book_titles_set:
-                book_titles_set.add(booktitle[0].text)
-                book_data.append({'title': booktitle[0].text})
+    publisher = None
+    if tree.tag == "article":
+        venue = tree.xpath(".//journal")
+    elif tree.tag in ("inproceedings", "incollection"):
+        venue = tree.xpath(".//booktitle")
+        if tree.tag == "incollection":
+            publisher = tree.xpath(".//publisher")
+            publisher = publisher[0].text if publisher and publisher[0].text else None
+    else:
+        return None
 
-            incollection_book_relations_data.append(((title, year), {}, booktitle[0].text))
+    if not (venue and venue[0].text):
+        return None
 
-            associate_authors_with_publications(authors_names, title, year, authors_incollection_relations_data,
-                                                extract_pages_info(pages))
+    return ParsedRecord(key=tree.get("key"), tag=tree.tag, title=title, year=year, pages=pages,
+                        authors=[author.text for author in authors], venue=venue[0].text, publisher=publisher,
+                        mdate=tree.get("mdate", ""))
 
 
-def parse_xml_gz_file(input_file: str, dtd_file: str) -> None:
+def store_record(record: ParsedRecord) -> None:
+    """Stores an extracted record to the staged data that are used for the bulk insert. The names, the venues and the
+    years are interned, since they repeat across records.
+    :param record: The extracted record
+    :return: None
+    """
+    if record.tag in RECORD_DATA:
+        publications, venues, contributions, published = RECORD_DATA[record.tag]
+        properties = {"publisher": record.publisher} if record.tag == "incollection" and record.publisher else None
+        publication_id = publications.add((record.key, record.title, sys.intern(record.year),
+                                           sys.intern(record.mdate)), properties)
+        venue_id = venues.add(sys.intern(record.venue))
+        published.append(publication_id, venue_id)
+        author_ids = extract_authors(record.authors)
+        contributions.extend(author_ids, publication_id, extract_pages_info(record.pages))
+        records_data.append(RECORD_LABEL_INDEX[record.tag], publication_id, int(record.year), len(author_ids))
+
+    if pipeline is not None:
+        pipeline.flush()
+
+
+def parse_xml_gz_file(input_file: str, dtd_file: str, store: Callable[[ParsedRecord], None] = None,
+                      record_filter: Optional[RecordFilter] = None) -> None:
     """Parses a given xml.gz file and extracts required data
     :param input_file: The xml.gz file
     :param dtd_file: DTD file in order to parse correctly the XML
+    :param store: The function that stores every extracted record, store_record by default
+    :param record_filter: The filter of the imported records, the default options if None
     :return: None
     """
+    record_filter = record_filter or RecordFilter()
     open_tags = ["<article", "<inproceedings", "<incollection"]
     close_tags = ["</article>", "</inproceedings>", "</incollection>"]
 
-    count = 1
+    count = 0
 
     with gzip.open(input_file, "rt") as f:
         extract = False
@@ -348,10 +1646,14 @@ def parse_xml_gz_file(input_file: str, dtd_file: str) -> None:
                     extract = False
                     idx = line.index(tag)
                     buffer += line[:idx] + tag
-                    import_data(buffer, dtd_file)
+                    rule = record_filter.check(buffer.encode(), "utf-8")
+                    if rule is None:
+                        import_data(buffer, dtd_file, store, record_filter)
+                    else:
+                        record_filter.rejected[rule] += 1
                     # print(count)
                     count += 1
-                    if count == 1000000:
+                    if count == record_filter.max_records:
                         return
                     buffer = ""
                     break
@@ -367,16 +1669,328 @@ def parse_xml_gz_file(input_file: str, dtd_file: str) -> None:
                 buffer += str(line)
 
 
-for input_file in args.f:
-    print(f"Processing file {input_file}")
-    if input_file.endswith("dblp.xml.gz"):
-        clean_database()
-        # create_constraints()
-        create_indices()
-        parse_xml_gz_file(input_file=input_file, dtd_file=args.dtd[0])
-        seed_database()
+def iterparse_records(source: BinaryIO, dtd_path: str) -> Iterator[etree.ElementBase]:
+    """Parses the given XML stream in a single pass and yields the elements of the records that can be stored. The DTD
+    is loaded once for the whole stream and every record is cleared as soon as it has been processed, so memory usage
+    stays flat.
+    :param source: The XML stream
+    :param dtd_path: The absolute path of the DTD file
+    :return: Iterator of the record elements
+    """
+    context = etree.iterparse(source, events=("end",), tag=RECORD_TAGS, load_dtd=True, huge_tree=True)
+    context.resolvers.add(DTDResolver(dtd_path))
+
+    for _, element in context:
+        yield element
+        # Free the processed record along with any skipped siblings (www, phdthesis, etc.) that precede it
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def iterparse_xml_gz_file(input_file: str, dtd_file: str, store: Callable[[ParsedRecord], None] = None,
+                          record_filter: Optional[RecordFilter] = None) -> None:
+    """Parses a given xml.gz file in a single streaming pass and extracts required data. The records are split and
+    checked on their raw bytes first, so only the records that pass the filter are parsed.
+    :param input_file: The xml.gz file
+    :param dtd_file: DTD file in order to parse correctly the XML
+    :param store: The function that stores every extracted record, store_record by default
+    :param record_filter: The filter of the imported records, the default options if None
+    :return: None
+    """
+    record_filter = record_filter or RecordFilter()
+
+    with gzip.open(input_file, "rb") as f:
+        prologue = read_prologue(f)
+        records = record_filter.filter(iter_raw_records(f), xml_encoding(prologue))
+        source = IteratorStream(chain([prologue], records, [b"</dblp>"]))
+        for element in iterparse_records(source, get_dtd_path(dtd_file)):
+            import_record(element, store, record_filter)
+
+
+def read_prologue(f: BinaryIO) -> bytes:
+    """Reads the XML declaration, the DOCTYPE and the opening root tag from the decompressed stream
+    :param f: The decompressed stream
+    :return: The prologue of the XML document
+    """
+    prologue = b""
+    for line in f:
+        prologue += line
+        if b"<dblp" in line:
+            break
+    return prologue
+
+
+def xml_encoding(prologue: bytes) -> str:
+    """Returns the encoding of the XML document that is declared in its prologue
+    :param prologue: The prologue of the XML document
+    :return: The encoding, UTF-8 if not declared
+    """
+    match = ENCODING_PATTERN.search(prologue)
+    return match.group(1).decode() if match else "utf-8"
+
+
+def record_tag(record: bytes) -> str:
+    """Returns the tag of a raw top level record
+    :param record: The raw record, starting with its opening tag
+    :return: The tag
+    """
+    return RECORD_TAG_PATTERN.match(record).group(1).decode()
+
+
+def iter_raw_records(f: BinaryIO) -> Iterator[bytes]:
+    """Splits the rest of the decompressed stream into the raw bytes of its top level records, without parsing them
+    :param f: The decompressed stream, positioned after the prologue
+    :return: Iterator of the raw records
+    """
+    rest = b""
+    while True:
+        block = f.read(RAW_BLOCK_SIZE)
+        data = rest + block
+        starts = [match.start() for match in RECORD_LINE_START_PATTERN.finditer(data)]
+        if not block:
+            for start, end in zip(starts, starts[1:]):
+                yield data[start:end]
+            if starts:
+                yield data[starts[-1]:].replace(b"</dblp>", b"")
+            return
+        for start, end in zip(starts, starts[1:]):
+            yield data[start:end]
+        # The last record may continue in the next block
+        rest = data[starts[-1]:] if starts else data
+
+
+class IteratorStream(io.RawIOBase):
+    """A readable binary stream over the byte strings of an iterator, so that the records that pass the filter can be
+    parsed as a single document
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        super().__init__()
+        self.chunks = iter(chunks)
+        self.chunk = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = 0
+        while size < len(buffer):
+            if not len(self.chunk):
+                chunk = next(self.chunks, None)
+                if chunk is None:
+                    break
+                self.chunk = memoryview(chunk)
+            length = min(len(buffer) - size, len(self.chunk))
+            buffer[size:size + length] = self.chunk[:length]
+            self.chunk = self.chunk[length:]
+            size += length
+        return size
+
+
+def iter_record_chunks(f: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """Splits the rest of the decompressed stream into chunks of roughly chunk_size bytes. Every chunk ends right
+    before the start of a record, so each one can be parsed on its own.
+    :param f: The decompressed stream, positioned after the prologue
+    :param chunk_size: The minimum size of a chunk in bytes
+    :return: Iterator of the chunks
+    """
+    lines = []
+    size = 0
+    for line in f:
+        if size >= chunk_size and RECORD_START_PATTERN.match(line):
+            yield b"".join(lines)
+            lines = []
+            size = 0
+        lines.append(line)
+        size += len(line)
+    if lines:
+        yield b"".join(lines).replace(b"</dblp>", b"")
+
+
+def parse_chunk(prologue: bytes, chunk: bytes, dtd_path: str,
+                record_filter: RecordFilter) -> List[Union[ParsedRecord, str]]:
+    """Filters and parses a chunk of records in a worker process
+    :param prologue: The prologue of the XML document
+    :param chunk: The records of the chunk
+    :param dtd_path: The absolute path of the DTD file
+    :param record_filter: The filter of the imported records
+    :return: The extracted records in document order, or the rules that rejected them
+    """
+    encoding = xml_encoding(prologue)
+    rules = []
+    kept = []
+    for record in iter_raw_records(io.BytesIO(chunk)):
+        if record_tag(record) in RECORD_TAGS:
+            rule = record_filter.check(record, encoding)
+            rules.append(rule)
+            if rule is None:
+                kept.append(record)
+
+    source = io.BytesIO(prologue + b"".join(kept) + b"</dblp>")
+    records = (filter_record(element, record_filter) for element in iterparse_records(source, dtd_path))
+    return [rule if rule is not None else next(records) for rule in rules]
+
+
+def iter_parsed_chunks(f: BinaryIO, dtd_path: str, pool: Pool, workers: int,
+                       record_filter: RecordFilter) -> Iterator[List[Union[ParsedRecord, str]]]:
+    """Distributes the chunks of the decompressed stream to the worker processes and yields their results in input
+    order. At most two chunks per worker are in flight, so the decompressed file is never held in memory.
+    :param f: The decompressed stream
+    :param dtd_path: The absolute path of the DTD file
+    :param pool: The worker processes
+    :param workers: The number of the worker processes
+    :param record_filter: The filter of the imported records
+    :return: Iterator of the extracted records or the rules that rejected them of each chunk
+    """
+    prologue = read_prologue(f)
+    pending = deque()
+
+    for chunk in iter_record_chunks(f, PARALLEL_CHUNK_SIZE):
+        pending.append(pool.apply_async(parse_chunk, (prologue, chunk, dtd_path, record_filter)))
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().get()
+
+    while pending:
+        yield pending.popleft().get()
+
+
+def parallel_parse_xml_gz_file(input_file: str, dtd_file: str, workers: int,
+                               store: Callable[[ParsedRecord], None] = None,
+                               record_filter: Optional[RecordFilter] = None) -> None:
+    """Parses a given xml.gz file using multiple processes and extracts required data. The workers only filter, parse
+    and extract the records, while deduplication and storing happen here in input order, so the extracted data are
+    exactly the same as the single process parsing.
+    :param input_file: The xml.gz file
+    :param dtd_file: DTD file in order to parse correctly the XML
+    :param workers: The number of the worker processes
+    :param store: The function that stores every extracted record, store_record by default
+    :param record_filter: The filter of the imported records, the default options if None
+    :return: None
+    """
+    store = store or store_record
+    record_filter = record_filter or RecordFilter()
+    count = 0
+
+    with gzip.open(input_file, "rb") as f, Pool(processes=workers) as pool:
+        for records in iter_parsed_chunks(f, get_dtd_path(dtd_file), pool, workers, record_filter):
+            for record in records:
+                if isinstance(record, str):
+                    record_filter.rejected[record] += 1
+                else:
+                    store(record)
+                count += 1
+                if count == record_filter.max_records:
+                    return
+
+
+def parse_input_file(input_file: str, args, store: Callable[[ParsedRecord], None] = None,
+                     all_years: bool = False) -> RecordFilter:
+    """Parses a given xml.gz file with the parser and the filter that were selected in the command line arguments
+    :param input_file: The xml.gz file
+    :param args: The command line arguments
+    :param store: The function that stores every extracted record, store_record by default
+    :param all_years: Whether the records of all the years are parsed, e.g. for the snapshot
+    :return: The record filter, with the number of records that every rule rejected
+    """
+    record_filter = RecordFilter.from_args(args, all_years)
+    if args.parser == "records":
+        parse_xml_gz_file(input_file=input_file, dtd_file=args.dtd[0], store=store, record_filter=record_filter)
+    elif args.parser == "parallel":
+        parallel_parse_xml_gz_file(input_file=input_file, dtd_file=args.dtd[0], workers=args.workers, store=store,
+                                   record_filter=record_filter)
     else:
-        print(f"File '{input_file}' cannot be processed, skipping.")
+        iterparse_xml_gz_file(input_file=input_file, dtd_file=args.dtd[0], store=store, record_filter=record_filter)
+    return record_filter
+
+
+def main() -> None:
+    global pipeline
+
+    args = parser.parse_args()
+    start = time.time()
+
+    if args.indices:
+        create_constraints()
+        create_indices()
+        post_process(args)
+        bump_dataset_generation()
+        return
 
-end = time.time()
-print(f"Finished importing dataset, took {(end - start):.2f} seconds")
+    for input_file in args.f:
+        print(f"Processing file {input_file}")
+        if input_file.endswith("dblp.xml.gz") and args.delta:
+            create_constraints()
+            create_indices()
+            delta_importer = DeltaImporter(manifest_path=args.manifest)
+            record_filter = parse_input_file(input_file, args, store=delta_importer.store)
+            print(record_filter.summary())
+            delta_importer.close()
+            post_process(args)
+            bump_dataset_generation()
+            print(f"Created {delta_importer.created_count}, updated {delta_importer.updated_count}, removed "
+                  f"{delta_importer.removed_count} and skipped {delta_importer.unchanged_count} unchanged records")
+        elif input_file.endswith("dblp.xml.gz"):
+            exporting = args.export_csv or args.export_sqlite
+            writer = None
+            if args.export_csv:
+                writer = CsvExporter(output_dir=args.export_csv, part_size=args.csv_part_size)
+            elif args.export_sqlite:
+                writer = SqliteExporter(path=args.export_sqlite, workers=args.workers)
+            else:
+                clean_database()
+                create_constraints()
+                create_indices()
+            if args.seed_workers > 1 and not exporting:
+                writer = ParallelSeeder(workers=args.seed_workers, queue_size=args.queue_size,
+                                        target_seconds=args.commit_seconds)
+                writer.start()
+            elif args.pipeline and not exporting:
+                writer = SeedingPipeline(queue_size=args.queue_size)
+                writer.start()
+
+            snapshot_path = None
+            snapshot = None
+            if args.snapshot:
+                options = snapshot_options(args)
+                snapshot_path = os.path.join(args.snapshot, snapshot_key(input_file, options))
+                snapshot = ParsedSnapshot.find(snapshot_path)
+            if snapshot is not None:
+                print(f"Reading the parsed data from the snapshot {snapshot_path}")
+            else:
+                # The snapshot needs all the parsed data, so they are only written after the parsing in that case
+                pipeline = writer if (exporting or args.pipeline) and snapshot_path is None else None
+                record_filter = parse_input_file(input_file, args, all_years=snapshot_path is not None)
+                pipeline = None
+                print(record_filter.summary())
+                if snapshot_path is not None:
+                    save_staged_data(snapshot_path, input_file, options)
+                    print(f"Saved the parsed data to the snapshot {snapshot_path}")
+                    snapshot = ParsedSnapshot(snapshot_path)
+            if snapshot is not None:
+                # The same data whether the snapshot was just saved or read again
+                window = snapshot.window(args.start_year, args.end_year)
+                load_staged_data(window)
+                print(f"Selected the records of {args.start_year} to {args.end_year} from the snapshot")
+
+            if writer is not None:
+                writer.close()
+                print(f"Written {writer.nodes_count} nodes and {writer.relationships_count} relationships")
+                if isinstance(writer, ParallelSeeder):
+                    for row in writer.report():
+                        print(f"  {row['name']}: {row['rows']} at {row['rows_per_s']:.0f}/s")
+                    print(f"  {writer.retries_count} transactions retried after transient errors")
+            else:
+                seed_database()
+            if not exporting:
+                post_process(args)
+                bump_dataset_generation()
+        else:
+            print(f"File '{input_file}' cannot be processed, skipping.")
+
+    end = time.time()
+    print(f"Finished importing dataset, took {(end - start):.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
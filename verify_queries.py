@@ -0,0 +1,322 @@
+import json
+import sys
+
+from argparse import ArgumentParser
+from itertools import groupby
+from typing import Any, Collection, List, Optional, Tuple
+
+from app.backends.base import GraphBackend
+from app.backends.neo4j_backend import Neo4jBackend
+from app.backends.numpy_backend import get_numpy_backend
+from app.backends.sqlite_backend import SqliteBackend
+from app.core.config import settings
+from app.db.db_connection import get_db
+
+parser = ArgumentParser()
+parser.add_argument("-samples", type=int, default=20,
+                    help="The number of authors and years that the queries with parameters are checked for")
+parser.add_argument("-backend", choices=["co_authored_edges", "precomputed_statistics", "publication_identity", "numpy",
+                                        "sqlite"],
+                    default="co_authored_edges",
+                    help="The query variants that are compared with the Cypher of the endpoints, the sqlite backend "
+                         "reads the store of SQLITE_PATH")
+parser.add_argument("-limit", type=int, default=10 ** 9,
+                    help="The limit of the top-K queries, large enough by default to compare the complete results")
+parser.add_argument("-reference", choices=["neo4j", "sqlite"], default="neo4j",
+                    help="What the numpy or sqlite backend is compared with: the Cypher of the endpoints, or the store "
+                         "of SQLITE_PATH, which compares the numpy backend of NUMPY_SNAPSHOT_PATH without a Neo4j "
+                         "server")
+
+
+def normalize(result: List[dict]) -> List[str]:
+    """Returns the rows of a result in a comparable form, regardless of their order and of the numeric types
+    :param result: The result of an endpoint
+    :return: The sorted rows
+    """
+    rows = [{key: round(float(value), 6) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+             for key, value in row.items()} for row in result]
+    return sorted(json.dumps(row, sort_keys=True) for row in rows)
+
+
+def year_ranges(years: List[Optional[str]]) -> List[dict]:
+    """Returns the ranges of years that the queries with a range are checked with: open ones from and up to every
+    year and the closed ones between every two of them
+    :param years: The sampled years
+    :return: The start_year and end_year of every range
+    """
+    years = sorted({int(year) for year in years if year is not None})
+    ranges = [{"start_year": year} for year in years] + [{"end_year": year} for year in years]
+    ranges += [{"start_year": start_year, "end_year": end_year} for it, start_year in enumerate(years)
+               for end_year in years[it:]]
+    return ranges
+
+
+def compare(backends: Tuple[GraphBackend, GraphBackend], name: str, method: str, fields: Optional[List[str]] = None,
+            excluded_authors: Collection[str] = (), **parameters: Any) -> bool:
+    """Runs a query on the reference and on the compared backend and compares the results
+    :param backends: The reference and the compared backend
+    :param name: The name of the compared variant
+    :param method: The name of the query method
+    :param fields: The fields of the rows that are compared, all if None
+    :param excluded_authors: The authors whose rows are not compared, the rows with any of them in a name field
+    :param parameters: The parameters of the query
+    :return: Whether the results are the same
+    """
+    results = []
+    for backend in backends:
+        result = getattr(backend, method)(**parameters)
+        if excluded_authors:
+            result = [row for row in result if not any(field.startswith("name") and value in excluded_authors
+                                                       for field, value in row.items())]
+        if fields is not None:
+            result = [{field: row[field] for field in fields} for row in result]
+        results.append(normalize(result))
+
+    if results[0] == results[1]:
+        return True
+    missing = sorted(set(results[0]) - set(results[1]))
+    extra = sorted(set(results[1]) - set(results[0]))
+    print(f"{method}({parameters}) differs with {name}: {len(missing)} rows missing, {len(extra)} rows extra")
+    for row in missing[:5]:
+        print(f"  - {row}")
+    for row in extra[:5]:
+        print(f"  + {row}")
+    return False
+
+
+def verify_co_authored_edges(samples: int, limit: int) -> bool:
+    """Checks that the queries give the same results through the CO_AUTHORED relationships
+    :param samples: The number of authors and years to check the queries with parameters for
+    :param limit: The limit of the top-K queries
+    :return: Whether all the results are the same
+    """
+    # Get database connection
+    graph_db = next(get_db())
+    authors = graph_db.run("MATCH (a:Author)-[:CO_AUTHORED]-() "
+                           "WITH DISTINCT a LIMIT $samples "
+                           "MATCH (a)-[:CONTRIBUTED]->(n) "
+                           "RETURN a.name, COLLECT(DISTINCT n.year)", samples=samples).to_table()
+    years = [record[0] for record in graph_db.run("MATCH (:Author)-[:CONTRIBUTED]->(n) "
+                                                  "RETURN DISTINCT n.year LIMIT $samples", samples=samples)]
+
+    checks = [("query_4", {"limit": limit}),
+              ("query_7", {"limit": limit}),
+              ("query_9", {"limit": limit}),
+              ("query_14", {"limit": limit})]
+    checks += [("query_5", {"year": year, "limit": limit}) for year in years]
+    checks += [("query_2", {"author": author, "year": year}) for author, author_years in authors
+               for year in author_years]
+
+    backends = (Neo4jBackend(graph_db), Neo4jBackend(graph_db, co_authored_edges=True))
+    passed = True
+    for method, parameters in checks:
+        passed &= compare(backends, "CO_AUTHORED_EDGES", method, **parameters)
+    print(f"CO_AUTHORED_EDGES: {len(checks)} checks {'passed' if passed else 'failed'}")
+    return passed
+
+
+def verify_precomputed_statistics(samples: int, limit: int) -> bool:
+    """Checks that the queries give the same results from the statistics precomputed by the import.
+    Queries 7 and 9 are compared with the CO_AUTHORED relationships, since their statistics are computed over the
+    co-authorships of works too, and query 16 is left out, since its precomputed average counts all the co-authors.
+    :param samples: The number of years to check the queries with a year for
+    :param limit: The limit of the top-K queries
+    :return: Whether all the results are the same
+    """
+    # Get database connection
+    graph_db = next(get_db())
+    years = [record[0] for record in graph_db.run("MATCH (:Author)-[:CONTRIBUTED]->(n) "
+                                                  "RETURN DISTINCT n.year LIMIT $samples", samples=samples)]
+
+    checks = [("query_3", {"limit": limit, "inproc": True}),
+              ("query_3", {"limit": limit, "inproc": False}),
+              ("query_4", {"limit": limit}),
+              ("query_6", {"limit": limit}),
+              ("query_7", {"limit": limit}),
+              ("query_8", {"limit": limit}),
+              ("query_9", {"limit": limit})]
+    checks += [("query_15", {"k": k, "limit": limit}) for k in range(10)]
+    checks += [("query_17", {"limit": limit})]
+    checks += [("query_5", {"year": year, "limit": limit}) for year in years]
+    checks += [(method, {"limit": limit, **year_range}) for year_range in year_ranges(years)
+               for method in ("query_6", "query_8", "query_17")]
+    checks += [("query_15", {"k": k, "limit": limit, **year_range}) for year_range in year_ranges(years)
+               for k in range(3)]
+
+    backends = (Neo4jBackend(graph_db, co_authored_edges=True), Neo4jBackend(graph_db, precomputed_statistics=True))
+    passed = True
+    for method, parameters in checks:
+        passed &= compare(backends, "PRECOMPUTED_STATISTICS", method, **parameters)
+    print(f"PRECOMPUTED_STATISTICS: {len(checks)} checks {'passed' if passed else 'failed'}")
+    return passed
+
+
+def verify_publication_identity(samples: int, limit: int) -> bool:
+    """Checks that the queries give the same results when they tell the works apart by their publication node.
+    Query 14 is left out, since its page comparisons also tell apart the works that share their first or last page.
+    Only what both forms can express is compared: the page comparisons skip the contributions without pages, e.g. of
+    the pages `i-xii`, so the rows of their authors are left out, and for queries 7 and 9, which also depend on whether
+    the co-authors of an author have worked together, the rows of their co-authors too.
+    :param samples: The number of authors, years and journals to check the queries with parameters for
+    :param limit: The limit of the top-K queries
+    :return: Whether all the results are the same
+    """
+    # Get database connection
+    graph_db = next(get_db())
+    without_pages = {record[0] for record in graph_db.run("MATCH (a:Author)-[r:CONTRIBUTED]->() "
+                                                          "WHERE r.start_page IS NULL "
+                                                          "RETURN DISTINCT a.name")}
+    near_without_pages = without_pages | {record[0] for record in graph_db.run(
+        "MATCH (a:Author)-[r:CONTRIBUTED]->() "
+        "WHERE r.start_page IS NULL "
+        "WITH DISTINCT a "
+        "MATCH (a)-[:CONTRIBUTED]->()<-[:CONTRIBUTED]-(b:Author) "
+        "RETURN DISTINCT b.name")}
+    authors = graph_db.run("MATCH (a:Author)-[r:CONTRIBUTED]->(n) "
+                           "WITH a, COLLECT(DISTINCT n.year) AS years, "
+                           "COUNT(r.start_page) = COUNT(r) AS with_pages "
+                           "WHERE with_pages "
+                           "WITH a, years LIMIT $samples "
+                           "RETURN a.name, years", samples=samples).to_table()
+    years = [record[0] for record in graph_db.run("MATCH (:Author)-[:CONTRIBUTED]->(n) "
+                                                  "RETURN DISTINCT n.year LIMIT $samples", samples=samples)]
+    journals = graph_db.run("MATCH (:Author)-[:CONTRIBUTED]->(:Article)-[:PUBLISHED]->(j:Journal) "
+                            "RETURN DISTINCT j.title LIMIT $samples", samples=samples).to_table()
+
+    checks = [("query_4", {"limit": limit, "excluded_authors": without_pages}),
+              ("query_7", {"limit": limit, "excluded_authors": near_without_pages}),
+              ("query_9", {"limit": limit, "excluded_authors": near_without_pages}),
+              ("query_16", {"limit": limit, "excluded_authors": without_pages})]
+    checks += [("query_5", {"year": year, "limit": limit, "excluded_authors": without_pages}) for year in years]
+    # The sampled authors have pages in all their contributions
+    checks += [("query_2", {"author": author, "year": year}) for author, author_years in authors
+               for year in author_years]
+    checks += [("query_13", {"title": title, "limit": limit, "excluded_authors": without_pages})
+               for title, in journals]
+
+    backends = (Neo4jBackend(graph_db), Neo4jBackend(graph_db, publication_identity=True))
+    passed = True
+    for method, parameters in checks:
+        passed &= compare(backends, "PUBLICATION_IDENTITY", method, **parameters)
+    print(f"PUBLICATION_IDENTITY: {len(checks)} checks {'passed' if passed else 'failed'}")
+    return passed
+
+
+def sample_neo4j(graph_db, samples: int) -> Tuple[List[tuple], List[Optional[str]], List[tuple]]:
+    """Samples the parameters of the queries from the database
+    :param graph_db: The graph database
+    :param samples: The number of authors, years and journals
+    :return: The authors and the journals, each with its years, and the years
+    """
+    authors = graph_db.run("MATCH (a:Author)-[:CONTRIBUTED]->(n) "
+                           "WITH a, COLLECT(DISTINCT n.year) AS years LIMIT $samples "
+                           "RETURN a.name, years", samples=samples).to_table()
+    years = [record[0] for record in graph_db.run("MATCH (:Author)-[:CONTRIBUTED]->(n) "
+                                                  "RETURN DISTINCT n.year LIMIT $samples", samples=samples)]
+    journals = graph_db.run("MATCH (:Author)-[:CONTRIBUTED]->(n:Article)-[:PUBLISHED]->(j:Journal) "
+                            "RETURN j.title, COLLECT(DISTINCT n.year) LIMIT $samples", samples=samples).to_table()
+    return authors, years, journals
+
+
+def sample_sqlite(store: SqliteBackend, samples: int) -> Tuple[List[tuple], List[Optional[str]], List[tuple]]:
+    """Samples the parameters of the queries from the SQLite store, like sample_neo4j
+    :param store: The SQLite store
+    :param samples: The number of authors, years and journals
+    :return: The authors and the journals, each with its years, and the years
+    """
+    rows = store.run("SELECT a.name AS name, n.year AS year "
+                     "FROM (SELECT DISTINCT author FROM contributions ORDER BY author LIMIT :samples) s "
+                     "JOIN authors a ON a.id = s.author "
+                     "JOIN contributions r ON r.author = s.author "
+                     "JOIN publications n ON n.id = r.publication "
+                     "WHERE n.year IS NOT NULL "
+                     "GROUP BY s.author, n.year "
+                     "ORDER BY s.author, n.year", {"samples": samples})
+    authors = [(name, [row["year"] for row in group]) for name, group in groupby(rows, key=lambda row: row["name"])]
+    years = [row["year"] for row in store.run("SELECT DISTINCT n.year AS year "
+                                              "FROM contributions r "
+                                              "JOIN publications n ON n.id = r.publication "
+                                              "WHERE n.year IS NOT NULL "
+                                              "LIMIT :samples", {"samples": samples})]
+    rows = store.run("SELECT v.title AS title, n.year AS year "
+                     "FROM (SELECT id, title FROM venues WHERE label = 'Journal' ORDER BY id LIMIT :samples) v "
+                     "JOIN published p ON p.venue = v.id "
+                     "JOIN publications n ON n.id = p.publication "
+                     "WHERE n.label = 'Article' AND n.year IS NOT NULL "
+                     "AND EXISTS (SELECT 1 FROM contributions r WHERE r.publication = n.id) "
+                     "GROUP BY v.id, n.year "
+                     "ORDER BY v.id, n.year", {"samples": samples})
+    journals = [(title, [row["year"] for row in group]) for title, group in groupby(rows, key=lambda row: row["title"])]
+    return authors, years, journals
+
+
+def verify_backend(backend: str, samples: int, limit: int, reference: str = "neo4j") -> bool:
+    """Checks that a backend gives the same results as the Cypher of every query, or as the SQLite store
+    :param backend: The compared backend, numpy or sqlite
+    :param samples: The number of authors, years and journals to check the queries with parameters for
+    :param limit: The limit of the top-K queries
+    :param reference: What the backend is compared with, neo4j or sqlite, which needs no database when the numpy
+    backend reads NUMPY_SNAPSHOT_PATH
+    :return: Whether all the results are the same
+    """
+    if reference == "sqlite":
+        store = SqliteBackend(settings.SQLITE_PATH)
+        authors, years, journals = sample_sqlite(store, samples)
+        backends = (store, get_numpy_backend())
+    else:
+        # Get database connection
+        graph_db = next(get_db())
+        authors, years, journals = sample_neo4j(graph_db, samples)
+        compared = get_numpy_backend(graph_db) if backend == "numpy" else SqliteBackend(settings.SQLITE_PATH)
+        backends = (Neo4jBackend(graph_db), compared)
+
+    checks = [("query_3", {"limit": limit, "inproc": True}),
+              ("query_3", {"limit": limit, "inproc": False}),
+              ("query_4", {"limit": limit}),
+              ("query_6", {"limit": limit}),
+              ("query_7", {"limit": limit}),
+              ("query_8", {"limit": limit}),
+              ("query_9", {"limit": limit}),
+              ("query_14", {"limit": limit}),
+              ("query_16", {"limit": limit}),
+              ("query_17", {"limit": limit}),
+              # Only the count of the top author is compared, since the query keeps any of the tied authors
+              ("query_18", {"fields": ["parts"]})]
+    checks += [("query_15", {"k": k, "limit": limit}) for k in range(10)]
+    checks += [("query_1", {"author": author}) for author, _ in authors]
+    checks += [(method, {"author": author, "year": year}) for author, author_years in authors
+               for year in author_years for method in ("query_2", "query_11")]
+    checks += [(method, {"year": year, "limit": limit}) for year in years for method in ("query_5", "query_10")]
+    checks += [(method, {"limit": limit, **year_range}) for year_range in year_ranges(years)
+               for method in ("query_6", "query_8", "query_17")]
+    checks += [("query_15", {"k": k, "limit": limit, **year_range}) for year_range in year_ranges(years)
+               for k in range(3)]
+    checks += [("query_13", {"title": title, "limit": limit}) for title, _ in journals]
+    checks += [("query_12", {"title": title, "year": year, "limit": limit, "first_author": first_author})
+               for title, journal_years in journals for year in journal_years for first_author in (True, False)]
+
+    name = f"QUERY_BACKEND={backend}" + (" against the SQLite store" if reference == "sqlite" else "")
+    passed = True
+    for method, parameters in checks:
+        passed &= compare(backends, name, method, **parameters)
+    print(f"{name}: {len(checks)} checks {'passed' if passed else 'failed'}")
+    return passed
+
+
+def main() -> None:
+    args = parser.parse_args()
+    if args.reference == "sqlite" and (args.backend != "numpy" or not settings.NUMPY_SNAPSHOT_PATH):
+        parser.error("-reference sqlite compares -backend numpy read from NUMPY_SNAPSHOT_PATH")
+    if args.backend == "co_authored_edges":
+        passed = verify_co_authored_edges(args.samples, args.limit)
+    elif args.backend == "precomputed_statistics":
+        passed = verify_precomputed_statistics(args.samples, args.limit)
+    elif args.backend == "publication_identity":
+        passed = verify_publication_identity(args.samples, args.limit)
+    else:
+        passed = verify_backend(args.backend, args.samples, args.limit, args.reference)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()